@@ -1,20 +1,36 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from fastapi.responses import StreamingResponse
+import asyncio
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from typing import Literal
+
+from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from contextlib import asynccontextmanager
 
+from configs import metrics_config, scheduler_config, startup_config
+from src.utils import metrics, stream_protocol
+from src.utils.exceptions import AdmissionError
 from src.utils.logger import logger
-from src.utils.session_store import SessionStore
+from src.utils.session_store import REDIS_UNAVAILABLE_ERRORS, create_session_store
+from src.pipelines.history import HistoryCompactor, window_messages
+from src.pipelines.turn_writer import TurnWriter
+from src.pipelines.warmup import WarmUp
 from src.pipelines.rag_chain import (
-    build_rag_answer,
-    stream_rag_answer,
-    stream_chat_answer,
+    abuild_rag_answer,
+    astream_rag_answer,
+    astream_chat_answer,
+    asummarize_history,
+    get_scheduler,
 )
 
 # -----------------------------------
 # GLOBAL SESSION STORE
 # -----------------------------------
 session_store = None
+history_compactor = None
+turn_writer = None
+warm_up = None
 
 
 # -----------------------------------
@@ -22,18 +38,34 @@ session_store = None
 # -----------------------------------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global session_store
+    global session_store, history_compactor, turn_writer, warm_up
     try:
-        logger.info("Starting application... Initializing Redis...")
-        session_store = SessionStore()
-        logger.info("Redis Session Store Ready")
+        logger.info("Starting application... Initializing session store...")
+        session_store = await create_session_store()
+        logger.info(f"Session store ready ({session_store.name})")
     except Exception as e:
-        logger.error(f"Redis initialization failed: {e}")
+        logger.error(f"Session store initialization failed: {e}")
         session_store = None
 
+    history_compactor = HistoryCompactor(summarize_fn=asummarize_history)
+
+    if session_store is not None:
+        turn_writer = TurnWriter(session_store, compactor=history_compactor)
+        turn_writer.start()
+
+    # /health answers at once; /ready waits for the warm-up below
+    warm_up = WarmUp(steps=None if startup_config.WARMUP_ENABLED else [])
+    warm_up_task = asyncio.create_task(warm_up.run())
+
     yield
 
     logger.info("Shutting down application...")
+    warm_up_task.cancel()
+    if turn_writer is not None:
+        await turn_writer.aclose()
+    await history_compactor.aclose()
+    if session_store is not None:
+        await session_store.aclose()
 
 
 # -----------------------------------
@@ -46,17 +78,59 @@ app = FastAPI(
     description="Reliable medical chatbot backed by RAG, Ollama, Chroma",
 )
 
+if metrics_config.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+
+# -----------------------------------
+# LLM ADMISSION (429 QUEUE FULL / 503 DEADLINE)
+# -----------------------------------
+@app.exception_handler(AdmissionError)
+async def admission_error_handler(request: Request, exc: AdmissionError):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def _primed(events):
+    """
+    Runs a stream up to its first event before the response starts, so an
+    AdmissionError still becomes a 429/503 instead of a 200 that ends in
+    an error event. Headers are sent with the first token.
+    """
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def replay():
+        if first is not None:
+            yield first
+        async for event in events:
+            yield event
+
+    return replay()
+
 
 # -----------------------------------
 # REQUEST MODELS
 # -----------------------------------
 class QueryRequest(BaseModel):
     question: str
+    k: int = Field(default=4, ge=1, le=20)
+    # reranking stage; None uses RERANK_MODE / RERANK_FETCH_K
+    rerank: Literal["none", "mmr", "cross_encoder"] | None = None
+    fetch_k: int | None = Field(default=None, ge=1, le=100)
 
 
 class ChatRequest(BaseModel):
     session_id: str
     question: str
+    k: int = Field(default=4, ge=1, le=20)
+    rerank: Literal["none", "mmr", "cross_encoder"] | None = None
+    fetch_k: int | None = Field(default=None, ge=1, le=100)
 
 
 # -----------------------------------
@@ -67,79 +141,145 @@ def health_check():
     return {"status": "ok", "message": "Medical RAG API running"}
 
 
+# -----------------------------------
+# READINESS (LOAD BALANCER GATE)
+# -----------------------------------
+@app.get("/ready")
+def readiness_check():
+    """503 until the startup warm-up has loaded the indexes, embedding model and LLM."""
+    if warm_up is None:
+        return JSONResponse(status_code=503, content={"ready": False, "steps": {}, "error": None})
+
+    status = warm_up.status()
+    status["session_store"] = session_store.name if session_store is not None else None
+
+    scheduler = get_scheduler()
+    status["llm"] = scheduler.stats() if scheduler is not None else None
+
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+# -----------------------------------
+# METRICS (PROMETHEUS TEXT FORMAT)
+# -----------------------------------
+@app.get("/metrics")
+def prometheus_metrics():
+    if not metrics_config.METRICS_ENABLED:
+        raise HTTPException(404, "Metrics are disabled")
+
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 # -----------------------------------
 # ASK (NON-STREAMING, JSON)
 # -----------------------------------
 @app.post("/ask")
-def ask_question(request: QueryRequest):
+async def ask_question(request: QueryRequest):
     try:
         logger.info(f"[ASK] Question: {request.question}")
 
-        result = build_rag_answer(
+        result = await abuild_rag_answer(
             question=request.question,
-            k=4,
+            k=request.k,
+            rerank=request.rerank,
+            fetch_k=request.fetch_k,
+            priority=scheduler_config.ENDPOINT_PRIORITY["ask"],
         )
 
         return result
 
+    except AdmissionError:
+        raise
+
     except Exception as e:
         logger.error(f"/ask failed: {str(e)}")
         raise HTTPException(500, "Medical answer generation failed")
 
 
 # -----------------------------------
-# ASK STREAM (TEXT ONLY)
+# ASK STREAM (NDJSON, OR SSE WITH "Accept: text/event-stream")
 # -----------------------------------
 @app.post("/ask-stream")
-def ask_stream(request: QueryRequest):
+async def ask_stream(request: QueryRequest, accept: str = Header(default="")):
     try:
         logger.info(f"[ASK-STREAM] Question: {request.question}")
+        encode, media_type = stream_protocol.negotiate(accept)
+
+        events = await _primed(astream_rag_answer(
+            question=request.question,
+            k=request.k,
+            rerank=request.rerank,
+            fetch_k=request.fetch_k,
+            priority=scheduler_config.ENDPOINT_PRIORITY["ask-stream"],
+        ))
 
-        def event_generator():
-            for chunk in stream_rag_answer(
-                question=request.question,
-                k=4,
-            ):
-                yield chunk
+        async def event_generator():
+            async for event in events:
+                yield encode(event)
 
         return StreamingResponse(
             event_generator(),
-            media_type="text/plain",
+            media_type=media_type,
         )
 
+    except AdmissionError:
+        raise
+
     except Exception as e:
         logger.error(f"/ask-stream failed: {str(e)}")
         raise HTTPException(500, "Streaming failed")
 
 
 # -----------------------------------
-# CHAT (STREAMING ONLY — NO JSON EVER)
+# CHAT (STREAMING ONLY, SAME PROTOCOL AS /ask-stream)
 # -----------------------------------
 @app.post("/chat")
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest, accept: str = Header(default="")):
     if session_store is None:
-        raise HTTPException(500, "Session service not ready")
+        raise HTTPException(503, "Session service not ready")
 
     session_id = request.session_id
     question = request.question
-    history = session_store.get_history(session_id)
+    encode, media_type = stream_protocol.negotiate(accept)
+
+    try:
+        with metrics.span("session_load"):
+            history, summary = await session_store.load_session(session_id, window_messages())
+    except REDIS_UNAVAILABLE_ERRORS as e:
+        logger.error(f"[CHAT] Session store unavailable: {e}")
+        raise HTTPException(503, "Session service unavailable")
 
     logger.info(f"[CHAT] Session: {session_id}")
     logger.info(f"[CHAT] Question: {question}")
 
-    def event_generator():
+    answer = {}
+
+    events = await _primed(astream_chat_answer(
+        question=question,
+        history=history,
+        summary=summary,
+        k=request.k,
+        rerank=request.rerank,
+        fetch_k=request.fetch_k,
+        priority=scheduler_config.ENDPOINT_PRIORITY["chat"],
+        on_answer=lambda text: answer.update(text=text),
+    ))
+
+    async def event_generator():
         try:
-            for chunk in stream_chat_answer(
-                question=question,
-                history=history,
-                k=4,
-            ):
-                yield chunk
+            async for event in events:
+                yield encode(event)
         except Exception as e:
             logger.error(f"[CHAT STREAM ERROR]: {e}")
-            yield "\n\n[ERROR] Chat streaming failed."
+            yield encode(stream_protocol.error_event("Chat streaming failed."))
+
+    # runs after the last byte is sent; failed or cut-off answers are not stored
+    async def persist_turn():
+        if turn_writer is not None and answer.get("text"):
+            turn_writer.submit(session_id, question, answer["text"])
 
     return StreamingResponse(
         event_generator(),
-        media_type="text/plain",
+        media_type=media_type,
+        background=BackgroundTask(persist_turn),
     )
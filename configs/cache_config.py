@@ -0,0 +1,23 @@
+import os
+
+# -----------------------------------
+# ANSWER CACHE (rag_chain)
+# -----------------------------------
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1024))
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", 32 * 1024 * 1024))  # 32 MB
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))  # 1 hour
+
+# cosine similarity needed for a near-duplicate question to reuse an answer
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.95))
+
+# how often to check whether the Chroma collection changed underneath us
+ANSWER_CACHE_VERSION_CHECK_SECONDS = float(os.getenv("ANSWER_CACHE_VERSION_CHECK_SECONDS", 30))
+
+# -----------------------------------
+# IN-FLIGHT COALESCING (rag_chain)
+# -----------------------------------
+# identical questions asked while an answer is still being generated
+# share that generation instead of starting their own
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
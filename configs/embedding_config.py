@@ -0,0 +1,30 @@
+import os
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "mxbai-embed-large")
+
+# seconds Ollama keeps the embedding model loaded after the last call (-1 never unloads)
+EMBED_KEEP_ALIVE = int(os.getenv("EMBED_KEEP_ALIVE_SECONDS", 1800))
+
+# -----------------------------------
+# EMBEDDING CACHE
+# -----------------------------------
+# in-process LRU (query embeddings)
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", 4096))
+
+# optional persistent tier (SQLite), shared by queries and document builds
+EMBED_CACHE_DISK_ENABLED = os.getenv("EMBED_CACHE_DISK_ENABLED", "false").lower() == "true"
+EMBED_CACHE_DISK_PATH = os.getenv("EMBED_CACHE_DISK_PATH", "data/cache/embeddings.sqlite3")
+EMBED_CACHE_DISK_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_DISK_MAX_ENTRIES", 200_000))
+
+# -----------------------------------
+# QUERY MICRO-BATCHING
+# -----------------------------------
+# concurrent query-embedding misses are sent to the model as one batch call
+EMBED_QUERY_BATCHING = os.getenv("EMBED_QUERY_BATCHING", "true").lower() == "true"
+
+# extra wait for stragglers once a batch already has 2+ queries; a lone query is sent at once
+EMBED_QUERY_BATCH_WINDOW_MS = float(os.getenv("EMBED_QUERY_BATCH_WINDOW_MS", 5))
+EMBED_QUERY_BATCH_MAX_SIZE = int(os.getenv("EMBED_QUERY_BATCH_MAX_SIZE", 32))
+
+# batch calls allowed in flight at once
+EMBED_QUERY_BATCH_WORKERS = int(os.getenv("EMBED_QUERY_BATCH_WORKERS", 2))
@@ -0,0 +1,12 @@
+import os
+
+# -----------------------------------
+# BATCH EVALUATION
+# -----------------------------------
+EVAL_DATASET_PATH = os.getenv("EVAL_DATASET_PATH", "src/evaluation/eval_questions.json")
+
+# questions run concurrently; generation is bounded by how many requests
+# Ollama serves in parallel (OLLAMA_NUM_PARALLEL), so more rarely helps
+EVAL_MAX_WORKERS = int(os.getenv("EVAL_MAX_WORKERS", 4))
+
+REFUSAL_TEXT = "I cannot answer this based on the provided medical reference"
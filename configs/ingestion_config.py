@@ -1,8 +1,22 @@
+import os
+
 PDF_PATH = "data/raw/Medical-book.pdf" # Path where pdf exists
 
+# Corpus to index: a directory (searched recursively for *.pdf), a glob, or a single PDF
+PDF_SOURCES = "data/raw"
+
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 150
 
+# PDF parsing: pages are extracted in a process pool, PARSE_PAGES_PER_TASK pages per task
+PARSE_MAX_WORKERS = os.cpu_count() or 1
+PARSE_PAGES_PER_TASK = 16
+
+# Vector build: chunks per embed request and how many requests run at once
+# (match OLLAMA_NUM_PARALLEL on the embed server)
+EMBED_BATCH_SIZE = 64
+EMBED_MAX_CONCURRENCY = 4
+
 # Later we will add:
 # EMBEDDING_MODEL
 # CHROMA_DB_PATH
@@ -0,0 +1,9 @@
+import os
+
+# -----------------------------------
+# METRICS (/metrics, src/utils/metrics.py)
+# -----------------------------------
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# requests slower than this log their per-stage breakdown
+METRICS_SLOW_REQUEST_SECONDS = float(os.getenv("METRICS_SLOW_REQUEST_SECONDS", 5.0))
@@ -0,0 +1,51 @@
+import os
+
+# -----------------------------------
+# CONTEXT PACKING
+# -----------------------------------
+# prompt tokens spent on retrieved context (~4000 chars of textbook prose)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1000))
+
+# a truncated tail passage is only kept if at least this many tokens fit
+MIN_PASSAGE_TOKENS = int(os.getenv("MIN_PASSAGE_TOKENS", 40))
+
+# optional tokenizer.json of the served LLM; without it token counts are estimated
+TOKENIZER_PATH = os.getenv("TOKENIZER_PATH")
+
+# -----------------------------------
+# CONVERSATION HISTORY
+# -----------------------------------
+# turns (user + assistant pairs) sent verbatim; older turns live in a rolling summary
+HISTORY_WINDOW_TURNS = int(os.getenv("HISTORY_WINDOW_TURNS", 4))
+
+# compact once this many turns have piled up beyond the window
+HISTORY_COMPACT_EVERY_TURNS = int(os.getenv("HISTORY_COMPACT_EVERY_TURNS", 2))
+
+# prompt tokens for summary + window together
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 600))
+HISTORY_SUMMARY_MAX_WORDS = int(os.getenv("HISTORY_SUMMARY_MAX_WORDS", 120))
+
+# -----------------------------------
+# LLM (OLLAMA)
+# -----------------------------------
+LLM_MODEL = os.getenv("LLM_MODEL", "mistral")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", 0.1))
+
+# how long Ollama keeps the model loaded after the last call ("30m", "24h"; -1 never unloads)
+_keep_alive = os.getenv("LLM_KEEP_ALIVE", "30m")
+LLM_KEEP_ALIVE = int(_keep_alive) if _keep_alive.lstrip("-").isdigit() else _keep_alive
+
+# -----------------------------------
+# REFUSAL GATE
+# -----------------------------------
+# answer with the standard refusal, without calling the LLM, when the best
+# retrieved chunk scores below REFUSAL_GATE_MIN_SCORE; off until the
+# threshold is calibrated with the evaluator's gate report
+REFUSAL_GATE_ENABLED = os.getenv("REFUSAL_GATE_ENABLED", "false").lower() == "true"
+
+# vector store relevance (1 - L2 / sqrt(2) on unit vectors): 0.2 ~ cosine 0.43
+REFUSAL_GATE_MIN_SCORE = float(os.getenv("REFUSAL_GATE_MIN_SCORE", 0.2))
+
+# also gate /chat; off by default since follow-ups ("and its treatment?")
+# retrieve poorly on their own but are answerable from the history
+REFUSAL_GATE_CHAT = os.getenv("REFUSAL_GATE_CHAT", "false").lower() == "true"
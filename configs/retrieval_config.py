@@ -0,0 +1,50 @@
+import os
+
+CHROMA_PATH = "data/chroma_db"
+
+# -----------------------------------
+# VECTOR BACKEND
+# -----------------------------------
+# "chroma" (client + HNSW) or "flat" (exact NumPy scan over vectors exported from Chroma)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+
+FLAT_INDEX_PATH = "data/flat_index"
+# storage precision of the exported vectors: "float32", "float16" or "int8"
+FLAT_INDEX_DTYPE = os.getenv("FLAT_INDEX_DTYPE", "float32")
+# how often a running process checks whether the flat or BM25 index was rebuilt on disk
+FLAT_INDEX_RELOAD_CHECK_SECONDS = float(os.getenv("FLAT_INDEX_RELOAD_CHECK_SECONDS", 5))
+
+# default retriever mode when a caller does not ask for one:
+# "similarity" (Chroma only) or "hybrid" (BM25 + Chroma, fused with RRF)
+DEFAULT_SEARCH_TYPE = os.getenv("RETRIEVAL_SEARCH_TYPE", "similarity")
+
+# -----------------------------------
+# LEXICAL (BM25) INDEX
+# -----------------------------------
+LEXICAL_INDEX_PATH = "data/lexical_index"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# -----------------------------------
+# HYBRID FUSION
+# -----------------------------------
+# candidates pulled from each side before fusion
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", 20))
+# reciprocal rank fusion constant: score = sum(1 / (RRF_K + rank))
+RRF_K = int(os.getenv("RRF_K", 60))
+
+# -----------------------------------
+# RERANKING
+# -----------------------------------
+# "none", "mmr" (diversity over stored vectors) or "cross_encoder" (local
+# sentence-transformers model; falls back to MMR when unavailable).
+# Off by default; deployments opt in here, requests with `rerank`
+RERANK_MODE = os.getenv("RERANK_MODE", "none").lower()
+
+# candidates over-fetched before reranking down to k
+RERANK_FETCH_K = int(os.getenv("RERANK_FETCH_K", 12))
+
+# 1.0 = pure relevance, 0.0 = pure diversity
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", 0.7))
+
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
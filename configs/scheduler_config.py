@@ -0,0 +1,30 @@
+import os
+
+# -----------------------------------
+# LLM GENERATION SCHEDULER (rag_chain)
+# -----------------------------------
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+
+# generations running against Ollama at once; match OLLAMA_NUM_PARALLEL
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+
+# generations allowed to wait for a slot; beyond this requests get 429
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 64))
+
+# lower runs first; FIFO within a priority
+PRIORITIES = {"interactive": 0, "standard": 1, "batch": 2}
+
+# longest a generation may wait for a slot before failing with 503
+QUEUE_DEADLINE_SECONDS = {
+    "interactive": float(os.getenv("LLM_QUEUE_DEADLINE_INTERACTIVE_SECONDS", 10)),
+    "standard": float(os.getenv("LLM_QUEUE_DEADLINE_STANDARD_SECONDS", 20)),
+    "batch": float(os.getenv("LLM_QUEUE_DEADLINE_BATCH_SECONDS", 600)),
+}
+
+# priority each caller queues at
+ENDPOINT_PRIORITY = {
+    "chat": "interactive",
+    "ask-stream": "interactive",
+    "ask": "standard",
+    "eval": "batch",
+}
@@ -0,0 +1,51 @@
+import os
+
+# -----------------------------------
+# SESSION BACKEND
+# -----------------------------------
+# "redis": Redis only; "memory": in-process only;
+# "auto": Redis, falling back to the in-process store while Redis is unreachable
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "auto").lower()
+
+SESSION_TTL = int(os.getenv("SESSION_TTL_SECONDS", 86400))  # 24 hours
+
+# safety cap on stored messages per session (0 = unlimited); compaction
+# normally keeps sessions far below this
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", 200))
+
+# -----------------------------------
+# REDIS
+# -----------------------------------
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+REDIS_SSL = os.getenv("REDIS_SSL", "false").lower() == "true"
+
+REDIS_POOL_MAX_CONNECTIONS = int(os.getenv("REDIS_POOL_MAX_CONNECTIONS", 32))
+
+# seconds a pooled connection may sit idle before it is PINGed on checkout
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 1.0))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 1.0))
+
+# after a Redis failure, serve from the fallback store for this long before retrying
+REDIS_RETRY_AFTER_SECONDS = float(os.getenv("REDIS_RETRY_AFTER_SECONDS", 5.0))
+
+# -----------------------------------
+# IN-PROCESS STORE
+# -----------------------------------
+MEMORY_SESSION_MAX_SESSIONS = int(os.getenv("MEMORY_SESSION_MAX_SESSIONS", 10000))
+
+# -----------------------------------
+# BACKGROUND TURN WRITER
+# -----------------------------------
+# turns waiting to be persisted; new turns are dropped (and logged) beyond this
+TURN_WRITER_QUEUE_SIZE = int(os.getenv("TURN_WRITER_QUEUE_SIZE", 10000))
+
+# turns written per store round trip
+TURN_WRITER_MAX_BATCH = int(os.getenv("TURN_WRITER_MAX_BATCH", 64))
+
+TURN_WRITER_MAX_RETRIES = int(os.getenv("TURN_WRITER_MAX_RETRIES", 3))
+TURN_WRITER_RETRY_BACKOFF_SECONDS = float(os.getenv("TURN_WRITER_RETRY_BACKOFF_SECONDS", 0.2))
@@ -0,0 +1,17 @@
+import os
+
+# -----------------------------------
+# STARTUP WARM-UP (app lifespan, /ready)
+# -----------------------------------
+# load the vector store, embedding model and LLM before /ready reports ready;
+# when off, everything loads lazily on the first request and /ready is ready at once
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+# also load the LLM into Ollama memory (one 1-token generation)
+WARMUP_LLM = os.getenv("WARMUP_LLM", "true").lower() == "true"
+
+# dummy query used for the warm-up embed and search
+WARMUP_QUESTION = os.getenv("WARMUP_QUESTION", "What are the symptoms of diabetes?")
+
+# pause before retrying a failed step (e.g. Ollama still starting)
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", 5))
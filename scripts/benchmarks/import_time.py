@@ -0,0 +1,116 @@
+"""
+Import time of the API process and the CLI entry points.
+
+Each module is imported in a fresh interpreter (`python -X importtime`),
+so nothing is shared between runs; the best of `--runs` is reported with
+the slowest top-level packages behind it. Modules listed in DEFERRED
+must not be loaded by the import at all: they are pulled in on first use.
+
+    python -m scripts.benchmarks.import_time
+    python -m scripts.benchmarks.import_time --modules app.main --top 20
+    python -m scripts.benchmarks.import_time --check
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# seconds, measured on a developer laptop with a warm bytecode cache;
+# IMPORT_BUDGET_SCALE stretches them for slower CI machines
+IMPORT_BUDGETS = {
+    "app.main": 2.0,
+    "src.pipelines.rag_chain": 1.5,
+    "src.pipelines.retrieval": 1.5,
+    "src.utils.logger": 0.1,
+}
+
+# heavy dependencies that are imported lazily (src/utils/lazy.py)
+DEFERRED = ("chromadb", "langchain_chroma", "langchain_ollama", "ollama")
+
+_PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def _parse_importtime(stderr: str) -> dict:
+    """Self time in seconds per top-level package, from `-X importtime` output."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return packages
+
+
+def measure(module: str, runs: int = 3) -> dict:
+    """Best-of-`runs` import of `module` in a fresh interpreter."""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE, module],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.getcwd(),
+        )
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or probe["seconds"] < best["seconds"]:
+            best = {
+                "module": module,
+                "seconds": probe["seconds"],
+                "packages": _parse_importtime(result.stderr),
+                "deferred_loaded": [name for name in DEFERRED if name in probe["modules"]],
+            }
+    return best
+
+
+def budget_for(module: str) -> float:
+    return IMPORT_BUDGETS[module] * float(os.getenv("IMPORT_BUDGET_SCALE", 1.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(IMPORT_BUDGETS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="slowest top-level packages to list per module")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a budget is exceeded or a deferred module loads")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+
+    for module in args.modules:
+        result = measure(module, args.runs)
+        results.append(result)
+
+        budget = budget_for(module) if module in IMPORT_BUDGETS else None
+        over = budget is not None and result["seconds"] > budget
+        failed |= over or bool(result["deferred_loaded"])
+
+        budget_text = f" / budget {budget * 1000:.0f} ms" if budget is not None else ""
+        print(f"\n{module}: {result['seconds'] * 1000:.0f} ms{budget_text}{'  OVER BUDGET' if over else ''}")
+        if result["deferred_loaded"]:
+            print(f"  loaded deferred modules: {', '.join(result['deferred_loaded'])}")
+
+        slowest = sorted(result["packages"].items(), key=lambda item: item[1], reverse=True)[: args.top]
+        for package, seconds in slowest:
+            print(f"  {package:<28}{seconds * 1000:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Throughput and tail latency of /ask, /ask-stream and /chat.
+
+Ollama and Redis are replaced by deterministic stand-ins
+(scripts/benchmarks/stand_ins.py) and the ASGI app is driven in-process
+at a fixed concurrency. The numbers cover our own hot path only:
+retrieval, reranking, context packing, chains, streaming and session
+handling. For streaming endpoints, TTFT is the time to the first body
+chunk. Memory is the peak RSS of each worker process.
+
+    python -m scripts.benchmarks.service_load
+    python -m scripts.benchmarks.service_load --endpoints ask-stream --concurrency 1 32 --requests 500
+    python -m scripts.benchmarks.service_load --processes 4 --json bench.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ENDPOINTS = ("ask", "ask-stream", "chat")
+
+
+# -----------------------------------
+# IN-PROCESS ASGI CLIENT
+# -----------------------------------
+async def call_asgi(app, path: str, body: dict) -> dict:
+    """
+    One POST straight through the ASGI interface, timestamping the first
+    body chunk (an HTTP client transport would buffer the whole stream).
+    """
+    payload = json.dumps(body).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("ascii"),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"accept", b"application/x-ndjson")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+        "state": {},
+    }
+
+    finished = asyncio.Event()
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    started = time.perf_counter()
+    response = {"status": None, "ttft": None, "chunks": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk:
+                if response["ttft"] is None:
+                    response["ttft"] = time.perf_counter() - started
+                response["chunks"].append(chunk)
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+
+    response["latency"] = time.perf_counter() - started
+    text = b"".join(response.pop("chunks")).decode("utf-8", errors="replace")
+    response["error"] = response["status"] != 200 or '"type":"error"' in text
+    return response
+
+
+# -----------------------------------
+# LOAD LOOP
+# -----------------------------------
+def _request(endpoint: str, i: int, sessions: int, k: int):
+    question = f"What are the symptoms and treatment of condition {i}?"
+    if endpoint == "chat":
+        return "/chat", {"session_id": f"bench-{i % sessions}", "question": question, "k": k}
+    return f"/{endpoint}", {"question": question, "k": k}
+
+
+async def run_load(app, endpoint: str, requests: int, concurrency: int, sessions: int = 50, k: int = 4, offset: int = 0) -> dict:
+    """Sends `requests` requests from `concurrency` concurrent clients; returns raw samples."""
+    counter = iter(range(offset, offset + requests))
+    samples = []
+
+    async def client():
+        for i in counter:
+            path, body = _request(endpoint, i, sessions, k)
+            samples.append(await call_asgi(app, path, body))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {"samples": samples, "elapsed": elapsed}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile(sorted_values: list, q: float):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def summarize(runs: list, endpoint: str, concurrency: int) -> dict:
+    """Merges per-process runs into one row of requests/s and latency percentiles (ms)."""
+    samples = [sample for run in runs for sample in run["samples"]]
+    latencies = sorted(sample["latency"] for sample in samples)
+    ttfts = sorted(sample["ttft"] for sample in samples if sample["ttft"] is not None)
+
+    row = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "processes": len(runs),
+        "requests": len(samples),
+        "errors": sum(sample["error"] for sample in samples),
+        # processes run side by side, so their rates add up
+        "rps": sum(len(run["samples"]) / run["elapsed"] for run in runs),
+        "peak_rss_mb": [round(run["peak_rss_mb"], 1) for run in runs],
+    }
+    for name, values in (("latency", latencies), ("ttft", ttfts)):
+        for q in (0.5, 0.95, 0.99):
+            value = _percentile(values, q)
+            row[f"{name}_p{int(q * 100)}_ms"] = round(value * 1000, 2) if value is not None else None
+
+    return row
+
+
+# -----------------------------------
+# WORKER PROCESS
+# -----------------------------------
+def _worker(settings: dict, endpoint: str, concurrency: int, requests: int, offset: int) -> dict:
+    from scripts.benchmarks.stand_ins import stand_ins
+
+    logging.getLogger("medical_rag_chatbot").setLevel(settings["log_level"])
+
+    async def main():
+        from app import main as service
+
+        app = service.app
+        async with app.router.lifespan_context(app):
+            await service.warm_up.wait()
+            # warm singletons and code paths outside the measured window
+            await run_load(app, endpoint, settings["warmup"], min(concurrency, settings["warmup"]) or 1, offset=-settings["warmup"])
+            return await run_load(app, endpoint, requests, concurrency, settings["sessions"], settings["k"], offset)
+
+    with stand_ins(**settings["stand_ins"]):
+        run = asyncio.run(main())
+
+    run["peak_rss_mb"] = _peak_rss_mb()
+    return run
+
+
+def benchmark(settings: dict, endpoint: str, concurrency: int, requests: int, processes: int = 1) -> dict:
+    if processes == 1:
+        return summarize([_worker(settings, endpoint, concurrency, requests, 0)], endpoint, concurrency)
+
+    share = requests // processes
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(_worker, settings, endpoint, concurrency, share, p * share)
+            for p in range(processes)
+        ]
+        return summarize([future.result() for future in futures], endpoint, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per endpoint and concurrency")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=1, help="worker processes, each with its own app")
+    parser.add_argument("--sessions", type=int, default=50, help="distinct /chat sessions")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--answer-tokens", type=int, default=32)
+    parser.add_argument("--embed-ms", type=float, default=10.0)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--answer-cache", action="store_true", help="keep the answer cache on")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", help="also write the result rows to this file")
+    args = parser.parse_args()
+
+    settings = {
+        "warmup": args.warmup,
+        "sessions": args.sessions,
+        "k": args.k,
+        "log_level": args.log_level.upper(),
+        "stand_ins": {
+            "tokens_per_second": args.tokens_per_second,
+            "first_token_latency": args.first_token_ms / 1000,
+            "answer_tokens": args.answer_tokens,
+            "embed_latency": args.embed_ms / 1000,
+            "chunks": args.chunks,
+            "answer_cache": args.answer_cache,
+        },
+    }
+
+    print(
+        f"\nfake LLM: {args.first_token_ms:.0f} ms to first token, {args.tokens_per_second:.0f} tok/s, "
+        f"{args.answer_tokens} tokens | fake embeddings: {args.embed_ms:.0f} ms/call | "
+        f"{args.chunks} chunks | {args.processes} process(es)\n"
+    )
+    print(
+        f"{'endpoint':<12}{'conc':>6}{'req/s':>9}{'ttft p50':>10}{'p95':>8}{'p99':>8}"
+        f"{'lat p50':>10}{'p95':>8}{'p99':>8}{'errors':>8}  peak RSS MB"
+    )
+
+    def fmt(value):
+        return f"{value:.0f}" if value is not None else "-"
+
+    rows = []
+    for endpoint in args.endpoints:
+        for concurrency in args.concurrency:
+            row = benchmark(settings, endpoint, concurrency, args.requests, args.processes)
+            rows.append(row)
+            print(
+                f"{endpoint:<12}{concurrency:>6}{row['rps']:>9.1f}"
+                f"{fmt(row['ttft_p50_ms']) if endpoint != 'ask' else '-':>10}"
+                f"{fmt(row['ttft_p95_ms']) if endpoint != 'ask' else '-':>8}"
+                f"{fmt(row['ttft_p99_ms']) if endpoint != 'ask' else '-':>8}"
+                f"{fmt(row['latency_p50_ms']):>10}{fmt(row['latency_p95_ms']):>8}{fmt(row['latency_p99_ms']):>8}"
+                f"{row['errors']:>8}  {', '.join(str(mb) for mb in row['peak_rss_mb'])}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
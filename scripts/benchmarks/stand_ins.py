@@ -0,0 +1,164 @@
+"""
+Deterministic local stand-ins for Ollama (chat + embeddings), Redis and
+the vector store, so the service can be benchmarked without external
+services. `stand_ins()` patches them in for the duration of a block and
+restores everything afterwards.
+"""
+import asyncio
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from configs import cache_config, embedding_config, session_config
+from src.pipelines import embeddings, rag_chain, retrieval
+from src.pipelines.flat_index import FlatVectorStore
+
+
+_WORDS = (
+    "insulin glucose pressure artery dose symptom chronic acute therapy "
+    "patient diagnosis infection kidney liver cardiac pulmonary tissue"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """Emits `answer_tokens` words after `first_token_latency`, at `tokens_per_second`."""
+
+    tokens_per_second: float = 50.0
+    first_token_latency: float = 0.05
+    answer_tokens: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark-chat"
+
+    def _tokens(self, messages) -> list:
+        seed = int(hashlib.sha256(str(messages[-1].content).encode("utf-8")).hexdigest()[:8], 16)
+        return [_WORDS[(seed + i) % len(_WORDS)] + " " for i in range(self.answer_tokens)]
+
+    def _delays(self):
+        yield self.first_token_latency
+        gap = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        while True:
+            yield gap
+
+    def _generate(self, messages, stop=None, run_manager: CallbackManagerForLLMRun = None, **kwargs: Any) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager: AsyncCallbackManagerForLLMRun = None, **kwargs: Any) -> ChatResult:
+        parts = [chunk.message.content async for chunk in self._astream(messages)]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(parts)))])
+
+    def _stream(self, messages, stop=None, run_manager: CallbackManagerForLLMRun = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for token, delay in zip(self._tokens(messages), self._delays()):
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages, stop=None, run_manager: AsyncCallbackManagerForLLMRun = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        for token, delay in zip(self._tokens(messages), self._delays()):
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class FakeEmbeddings(Embeddings):
+    """Unit vectors seeded by the text hash; each call costs `latency` seconds."""
+
+    def __init__(self, dim: int = 256, latency: float = 0.01):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+
+    def _vector(self, text: str) -> list:
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+        vector = np.random.default_rng(seed).normal(size=self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._vector(text)
+
+
+def synthetic_chunks(count: int, words: int = 120) -> list:
+    return [
+        " ".join(_WORDS[(i * 7 + j) % len(_WORDS)] for j in range(words)) + f" (chunk {i})"
+        for i in range(count)
+    ]
+
+
+@contextmanager
+def stand_ins(
+    tokens_per_second: float = 50.0,
+    first_token_latency: float = 0.05,
+    answer_tokens: int = 40,
+    embed_latency: float = 0.01,
+    dim: int = 256,
+    chunks: int = 2000,
+    answer_cache: bool = False,
+):
+    """
+    Builds the real embedding and LLM singletons around the fakes (so the
+    embedding cache, micro-batcher and chains stay on the measured path),
+    indexes `chunks` synthetic chunks into a flat vector store and selects
+    the in-process session store instead of Redis.
+    """
+    fake_embeddings = FakeEmbeddings(dim=dim, latency=embed_latency)
+    fake_llm = FakeChatModel(
+        tokens_per_second=tokens_per_second,
+        first_token_latency=first_token_latency,
+        answer_tokens=answer_tokens,
+    )
+
+    patches = [
+        (embeddings, "OllamaEmbeddings", lambda **kwargs: fake_embeddings),
+        (embeddings, "_embeddings", None),
+        (embedding_config, "EMBED_CACHE_DISK_ENABLED", False),
+        (rag_chain, "ChatOllama", lambda **kwargs: fake_llm),
+        (rag_chain, "_llm", None),
+        (rag_chain, "_answer_cache", None),
+        (rag_chain, "_scheduler", None),
+        (cache_config, "ANSWER_CACHE_ENABLED", answer_cache),
+        (retrieval, "_vectorstore", None),
+        (retrieval, "_retrievers", {}),
+        (session_config, "SESSION_BACKEND", "memory"),
+    ]
+
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr(module, name, value)
+
+    try:
+        # index with the bare fake: the corpus should not fill the query cache
+        retrieval._vectorstore = FlatVectorStore.from_texts(
+            synthetic_chunks(chunks),
+            fake_embeddings,
+            metadatas=[{"page": i // 4, "source": "synthetic.pdf"} for i in range(chunks)],
+            ids=[f"c{i}" for i in range(chunks)],
+        )
+        retrieval._vectorstore._embedding = embeddings.get_embeddings()
+        yield fake_llm, fake_embeddings
+
+    finally:
+        cached = embeddings._embeddings
+        if cached is not None and cached.batcher is not None:
+            cached.batcher.close()
+        for module, name, value in saved:
+            setattr(module, name, value)
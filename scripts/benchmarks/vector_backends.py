@@ -0,0 +1,123 @@
+"""
+Chroma vs flat (NumPy) vector search latency and throughput.
+
+Queries are pre-embedded so only the vector search is timed. By default a
+synthetic corpus is indexed into temporary stores; pass --chroma-path to
+benchmark an existing collection (e.g. data/chroma_db) instead.
+
+    python -m scripts.benchmarks.vector_backends --chunks 5000 --dim 1024
+    python -m scripts.benchmarks.vector_backends --chroma-path data/chroma_db
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from src.pipelines.flat_index import FlatVectorStore, SUPPORTED_DTYPES, export_chroma_to_flat_index
+
+
+class _RandomEmbeddings(Embeddings):
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def _vectors(self, n: int):
+        vectors = self.rng.normal(size=(n, self.dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def embed_documents(self, texts):
+        return self._vectors(len(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._vectors(1)[0].tolist()
+
+
+def _synthetic_chroma(path: str, chunks: int, dim: int):
+    embeddings = _RandomEmbeddings(dim)
+    store = Chroma(persist_directory=path, embedding_function=embeddings)
+
+    for start in range(0, chunks, 1000):
+        n = min(1000, chunks - start)
+        store._collection.add(
+            ids=[f"c{i}" for i in range(start, start + n)],
+            embeddings=embeddings._vectors(n),
+            documents=[f"chunk {i}" for i in range(start, start + n)],
+            metadatas=[{"page": i // 10, "source": "synthetic.pdf"} for i in range(start, start + n)],
+        )
+
+    return store
+
+
+def _measure(search, queries: list, concurrency: int, k: int) -> dict:
+    latencies = []
+
+    def timed(query):
+        started = time.perf_counter()
+        search(query, k)
+        latencies.append(time.perf_counter() - started)
+
+    for query in queries[:10]:
+        search(query, k)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, queries))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "qps": len(queries) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chroma-path", help="existing Chroma directory; synthetic corpus if omitted")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.chroma_path:
+            chroma = Chroma(persist_directory=args.chroma_path)
+        else:
+            print(f"Indexing {args.chunks} synthetic chunks (dim={args.dim}) into Chroma...")
+            chroma = _synthetic_chroma(os.path.join(tmp, "chroma"), args.chunks, args.dim)
+
+        count = chroma._collection.count()
+        sample = chroma._collection.get(limit=1, include=["embeddings"])["embeddings"]
+        dim = len(sample[0])
+        queries = _RandomEmbeddings(dim, seed=1)._vectors(args.queries).tolist()
+
+        backends = {"chroma": lambda q, k: chroma.similarity_search_by_vector(q, k=k)}
+        for dtype in SUPPORTED_DTYPES:
+            path = os.path.join(tmp, f"flat_{dtype}")
+            export_chroma_to_flat_index(chroma, path, dtype=dtype)
+            flat = FlatVectorStore.load(path, embedding=None)
+            backends[f"flat/{dtype}"] = lambda q, k, flat=flat: flat.similarity_search_by_vector(q, k=k)
+
+        print(f"\n{count} vectors, dim={dim}, k={args.k}, {args.queries} queries per run\n")
+        print(f"{'backend':<14}{'conc':>6}{'qps':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+        for name, search in backends.items():
+            for concurrency in args.concurrency:
+                result = _measure(search, queries, concurrency, args.k)
+                print(
+                    f"{name:<14}{concurrency:>6}{result['qps']:>10.0f}"
+                    f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import asyncio
+
+from src.utils.session_store import RedisSessionStore
+
+
+async def main():
+    store = RedisSessionStore()
+    try:
+        return await store.migrate_legacy_keys()
+    finally:
+        await store.aclose()
+
+
+if __name__ == "__main__":
+    # moves medical_chat:{id} JSON strings into the list layout; run once after deploying
+    migrated = asyncio.run(main())
+    print(f"Migrated sessions: {migrated}")
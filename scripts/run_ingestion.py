@@ -1,5 +1,5 @@
 from src.pipelines.ingestion import run_ingestion_pipeline
 
 if __name__ == "__main__":
-    chunks = run_ingestion_pipeline()
-    print(f"Total chunks ready for embeddings: {len(chunks)}")
\ No newline at end of file
+    total_chunks = sum(1 for _ in run_ingestion_pipeline())
+    print(f"Total chunks ready for embeddings: {total_chunks}")
\ No newline at end of file
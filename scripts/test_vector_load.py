@@ -1,11 +1,13 @@
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
 
-embeddings = OllamaEmbeddings(model="mxbai-embed-large")
+from src.pipelines.embeddings import get_embeddings
+
+embeddings = get_embeddings()
 
 db = Chroma(
     persist_directory="data/chroma_db",
     embedding_function=embeddings
 )
 
-print("Total docs:", db._collection.count())
\ No newline at end of file
+print("Total docs:", db._collection.count())
+print("Embedding cache:", embeddings.stats())
\ No newline at end of file
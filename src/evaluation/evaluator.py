@@ -1,12 +1,13 @@
-import re
 import time
 import json
 import statistics
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-from langchain_ollama import OllamaEmbeddings
-from src.pipelines.rag_chain import build_rag_answer
-from src.pipelines.retrieval import get_retriever
+from configs import eval_config, rag_config, scheduler_config
+from src.evaluation.scoring import gate_report, score_question, is_refusal
+from src.pipelines.embeddings import get_embeddings
+from src.pipelines.rag_chain import build_rag_answer, gate_refuses, get_llm
+from src.pipelines.retrieval import embed_question, stored_vectors
 
 from src.experiments.mlflow_manager import (
     init_mlflow,
@@ -20,15 +21,6 @@ from src.experiments.mlflow_manager import (
 from src.utils.logger import logger
 
 
-# -------------------------------
-# HELPER – COSINE SIMILARITY
-# -------------------------------
-def cosine(a, b):
-    a = np.array(a)
-    b = np.array(b)
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
-
-
 # -------------------------------
 # SINGLE QUERY EVALUATION
 # -------------------------------
@@ -43,7 +35,7 @@ def evaluate_single_query(question: str, k: int = 4):
 
     try:
         t1 = time.time()
-        result = build_rag_answer(question=question, k=k)
+        result = build_rag_answer(question=question, k=k, use_cache=False)
         total_time = round(time.time() - t1, 3)
 
         log_metrics({
@@ -65,7 +57,32 @@ def evaluate_single_query(question: str, k: int = 4):
 # -------------------------------
 # BATCH EVALUATION
 # -------------------------------
-def evaluate_batch(dataset_path="src/evaluation/eval_questions.json", k: int = 4):
+def _run_question(question_text: str, k: int):
+    """
+    One RAG call, plus the vectors needed to score it: the query vector
+    comes from the embedding cache (retrieval just embedded it) and the
+    doc vectors are the ones stored in the index, so no chunk is re-embedded.
+    The refusal gate runs in shadow mode: the LLM always answers, so its
+    refusals can be compared with what the gate would have done.
+    """
+    logger.info(f"Evaluating question: {question_text}")
+
+    result = build_rag_answer(
+        question=question_text,
+        k=k,
+        use_cache=False,
+        priority=scheduler_config.ENDPOINT_PRIORITY["eval"],
+        include_docs=True,
+        refusal_gate=False,
+    )
+    docs = result.pop("documents")
+
+    return result, embed_question(question_text), stored_vectors(docs) if docs else []
+
+
+def evaluate_batch(dataset_path: str = None, k: int = 4, max_workers: int = None):
+    dataset_path = dataset_path or eval_config.EVAL_DATASET_PATH
+    max_workers = max_workers or eval_config.EVAL_MAX_WORKERS
 
     init_mlflow()
     run = start_run(run_name="Batch-Evaluation")
@@ -73,98 +90,71 @@ def evaluate_batch(dataset_path="src/evaluation/eval_questions.json", k: int = 4
     log_params({
         "k_value": k,
         "evaluation_mode": "batch",
-        "dataset": dataset_path
+        "dataset": dataset_path,
+        "max_workers": max_workers,
+        "refusal_gate_enabled": rag_config.REFUSAL_GATE_ENABLED,
+        "refusal_gate_min_score": rag_config.REFUSAL_GATE_MIN_SCORE
     })
 
     try:
         with open(dataset_path, "r") as f:
             questions = json.load(f)
 
-        # Embedding Model (only once)
-        emb = OllamaEmbeddings(model="mxbai-embed-large")
-        retriever = get_retriever(k=k)
-
-        results = []
-
-        total_retrieval_times = []
-        total_generation_times = []
-        total_total_times = []
-
-        retrieval_scores_all = []
-        groundedness_scores_all = []
-        refusal_flags = []
-
-        for q in questions:
-            question_text = q["question"]
-            logger.info(f"Evaluating question: {question_text}")
+        question_texts = [q["question"] for q in questions]
 
-            # -------- Run RAG --------
-            result = build_rag_answer(question=question_text, k=k)
+        # load shared singletons once, before the workers race for them
+        emb = get_embeddings()
+        get_llm()
 
-            total_retrieval_times.append(result["timing"]["retrieval_time"])
-            total_generation_times.append(result["timing"]["generation_time"])
-            total_total_times.append(result["timing"]["total_time"])
-
-            # -------- Get Same Docs Used By RAG --------
-            docs = retriever.invoke(question_text)
-
-            # -------- Retrieval Relevance Score --------
-            q_emb = emb.embed_query(question_text)
-            doc_scores = []
-
-            for d in docs:
-                doc_emb = emb.embed_query(d.page_content[:500])
-                doc_scores.append(cosine(q_emb, doc_emb))
-
-            retrieval_score = round(float(np.mean(doc_scores)), 3)
-            retrieval_scores_all.append(retrieval_score)
-
-            # -------- Answer Groundedness Score --------
-            ans_emb = emb.embed_query(result["answer"])
-            ground_scores = []
+        t1 = time.time()
 
-            for d in docs:
-                doc_emb = emb.embed_query(d.page_content[:500])
-                ground_scores.append(cosine(ans_emb, doc_emb))
+        # -------- Run RAG (bounded concurrency, dataset order kept) --------
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eval") as pool:
+            runs = list(pool.map(lambda text: _run_question(text, k), question_texts))
 
-            groundedness_score = round(float(np.max(ground_scores)), 3)
-            groundedness_scores_all.append(groundedness_score)
+        # -------- Embed all answers in one call --------
+        answer_vectors = emb.embed_documents([result["answer"] for result, _, _ in runs])
 
-            # -------- Refusal Compliance --------
-            refusal_flag = 1 if (
-                "I cannot answer this based on the provided medical reference" in result["answer"]
-            ) else 0
-            refusal_flags.append(refusal_flag)
+        results = []
+        for question_text, (result, query_vector, doc_vectors), answer_vector in zip(question_texts, runs, answer_vectors):
+            retrieval_score, groundedness_score = score_question(query_vector, answer_vector, doc_vectors)
+            top_score = result["rerank"].get("top_score")
 
-            # -------- Store Result --------
             results.append({
                 "question": question_text,
                 "retrieval_relevance": retrieval_score,
                 "groundedness": groundedness_score,
-                "refusal_flag": refusal_flag,
+                "refusal_flag": int(is_refusal(result["answer"])),
+                "top_score": top_score,
+                "gate_flag": int(gate_refuses(top_score)),
                 "answer_preview": result["answer"][:250],
                 "sources": result["sources"],
                 "timing": result["timing"]
             })
 
+        wall_time = round(time.time() - t1, 3)
+        logger.info(f"Evaluated {len(results)} questions in {wall_time}s with {max_workers} workers")
+
         # -------- Averages --------
-        avg_retrieval = round(statistics.mean(total_retrieval_times), 3)
-        avg_generation = round(statistics.mean(total_generation_times), 3)
-        avg_total = round(statistics.mean(total_total_times), 3)
+        def average(values):
+            return round(statistics.mean(values), 3)
 
-        avg_retrieval_rel = round(statistics.mean(retrieval_scores_all), 3)
-        avg_groundedness = round(statistics.mean(groundedness_scores_all), 3)
-        refusal_ratio = round(sum(refusal_flags) / len(refusal_flags), 3)
+        # -------- Refusal gate (shadow mode) --------
+        gate = gate_report([r["gate_flag"] for r in results], [r["refusal_flag"] for r in results])
+        logger.info(f"Refusal gate at {rag_config.REFUSAL_GATE_MIN_SCORE}: {gate}")
 
         # -------- Log to MLflow --------
         log_metrics({
-            "avg_retrieval_time": avg_retrieval,
-            "avg_generation_time": avg_generation,
-            "avg_total_time": avg_total,
-            "avg_retrieval_relevance": avg_retrieval_rel,
-            "avg_answer_groundedness": avg_groundedness,
-            "refusal_policy_compliance": refusal_ratio,
+            "avg_retrieval_time": average([r["timing"]["retrieval_time"] for r in results]),
+            "avg_generation_time": average([r["timing"]["generation_time"] for r in results]),
+            "avg_total_time": average([r["timing"]["total_time"] for r in results]),
+            "avg_retrieval_relevance": average([r["retrieval_relevance"] for r in results]),
+            "avg_answer_groundedness": average([r["groundedness"] for r in results]),
+            "refusal_policy_compliance": average([r["refusal_flag"] for r in results]),
             "total_questions": len(results),
+            "eval_wall_time": wall_time,
+            # undefined ratios (nothing fired / nothing refused) are left out
+            **{name: value for name, value in gate.items() if value is not None},
         })
 
         # -------- Save JSON Artifact --------
@@ -179,4 +169,4 @@ def evaluate_batch(dataset_path="src/evaluation/eval_questions.json", k: int = 4
     except Exception as e:
         logger.error(f"Batch evaluation failed: {str(e)}")
         end_run(status="FAILED")
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,50 @@
+import numpy as np
+
+from configs import eval_config
+
+
+def unit_rows(vectors) -> np.ndarray:
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def similarity_matrix(a, b) -> np.ndarray:
+    """Cosine similarity of every row of `a` against every row of `b`."""
+    return unit_rows(a) @ unit_rows(b).T
+
+
+def score_question(query_vector, answer_vector, doc_vectors) -> tuple:
+    """
+    (retrieval relevance, groundedness) for one question: mean cosine of
+    the query to its docs, and the best cosine of the answer to any doc.
+    """
+    if len(doc_vectors) == 0:
+        return 0.0, 0.0
+
+    scores = similarity_matrix([query_vector, answer_vector], doc_vectors)
+    return round(float(scores[0].mean()), 3), round(float(scores[1].max()), 3)
+
+
+def is_refusal(answer: str) -> bool:
+    return eval_config.REFUSAL_TEXT in answer
+
+
+def gate_report(gate_flags: list, refusal_flags: list) -> dict:
+    """
+    Shadow-mode numbers for the refusal gate, given per question whether
+    the gate would refuse and whether the LLM did: how often it fires, how
+    many of its refusals the LLM agreed with (precision) and how many LLM
+    refusals it would have caught (recall). None where undefined.
+    """
+    fired = sum(gate_flags)
+    refused = sum(refusal_flags)
+    agreed = sum(1 for gate, refusal in zip(gate_flags, refusal_flags) if gate and refusal)
+
+    def ratio(numerator, denominator):
+        return round(numerator / denominator, 3) if denominator else None
+
+    return {
+        "gate_fire_rate": ratio(fired, len(gate_flags)),
+        "gate_precision": ratio(agreed, fired),
+        "gate_recall": ratio(agreed, refused),
+    }
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.utils.logger import logger
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    text = re.sub(r"\s+", " ", question.strip().lower())
+    return text.rstrip(" ?.!")
+
+
+@dataclass
+class CacheEntry:
+    key: tuple
+    result: dict
+    embedding: np.ndarray | None
+    created_at: float
+    nbytes: int
+
+
+class AnswerCache:
+    """
+    Two-tier answer cache.
+
+    Tier one matches the normalized question exactly. Tier two embeds the
+    question and reuses the answer of the closest cached question with the
+    same scope (k, token budget, rerank settings) when cosine similarity is
+    above the threshold. Entries are evicted
+    LRU-first when either the entry count or the byte budget is exceeded,
+    expire after ttl_seconds, and are all dropped when version_fn reports
+    that the underlying collection changed.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        similarity_threshold: float,
+        embed_fn=None,
+        version_fn=None,
+        version_check_seconds: float = 30,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self.version_fn = version_fn
+        self.version_check_seconds = version_check_seconds
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # semantic tier: one matrix row per embedded entry, updated on
+        # put/evict, so a lookup is one product over the rows in use
+        self._matrix = None
+        self._row_scope = None  # scope id per row, -1 for a free row
+        self._row_created = None
+        self._row_keys = []
+        self._rows = {}
+        self._free_rows = []
+        self._scope_ids = {}
+
+        self._version = None
+        self._version_checked_at = 0.0
+
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+
+    # -----------------------------------
+    # PUBLIC API
+    # -----------------------------------
+    def get(self, question: str, scope):
+        """
+        Returns (result, tier, similarity) on a hit, or None on a miss.
+        """
+        self._check_version()
+        return self._lookup(question, scope, lambda: self._embed(question))
+
+    async def aget(self, question: str, scope, query_vec=None):
+        """
+        get() for the event loop: the version check (a store query) runs in
+        a worker thread, and the semantic tier uses the caller's `query_vec`
+        instead of calling embed_fn; without one only the exact tier is used.
+        """
+        if self._version_due():
+            await asyncio.to_thread(self._check_version)
+        return self._lookup(question, scope, lambda: self._unit(query_vec))
+
+    def put(self, question: str, scope, result: dict):
+        self._store(question, scope, result, self._embed(question))
+
+    async def aput(self, question: str, scope, result: dict, query_vec=None):
+        """put() with an already computed `query_vec`, so nothing blocks on embed_fn."""
+        self._store(question, scope, result, self._unit(query_vec))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+            self._row_keys = []
+            self._rows = {}
+            self._free_rows = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "exact_hits": self.hits["exact"],
+                "semantic_hits": self.hits["semantic"],
+                "misses": self.misses,
+            }
+
+    # -----------------------------------
+    # INTERNALS
+    # -----------------------------------
+    def _lookup(self, question: str, scope, query_vec_fn):
+        key = (normalize_question(question), scope)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry):
+                self._entries.move_to_end(key)
+                self.hits["exact"] += 1
+                return entry.result, "exact", 1.0
+
+        query_vec = query_vec_fn()
+        if query_vec is not None:
+            with self._lock:
+                match = self._nearest(query_vec, scope)
+                if match is not None:
+                    entry, similarity = match
+                    self._entries.move_to_end(entry.key)
+                    self.hits["semantic"] += 1
+                    return entry.result, "semantic", similarity
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, question: str, scope, result: dict, embedding):
+        key = (normalize_question(question), scope)
+
+        nbytes = len(json.dumps(result, default=str).encode("utf-8"))
+        if embedding is not None:
+            nbytes += embedding.nbytes
+
+        if nbytes > self.max_bytes:
+            return
+
+        entry = CacheEntry(
+            key=key,
+            result=result,
+            embedding=embedding,
+            created_at=time.monotonic(),
+            nbytes=nbytes,
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._bytes += nbytes
+            self._add_row(entry)
+            self._evict()
+
+    def _expired(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl_seconds
+
+    def _embed(self, question: str):
+        if self.embed_fn is None:
+            return None
+
+        try:
+            return self._unit(self.embed_fn(question))
+        except Exception as e:
+            logger.warning(f"Answer cache embedding failed, exact tier only: {e}")
+            return None
+
+    @staticmethod
+    def _unit(vec):
+        if vec is None:
+            return None
+        vec = np.asarray(vec, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+
+    def _add_row(self, entry: CacheEntry):
+        embedding = entry.embedding
+        if embedding is None:
+            return
+
+        if self._matrix is None:
+            # a put holds one row over max_entries until it evicts
+            capacity = min(self.max_entries + 1, 64)
+            self._matrix = np.zeros((capacity, embedding.shape[0]), dtype=np.float32)
+            self._row_scope = np.full(capacity, -1, dtype=np.int64)
+            self._row_created = np.zeros(capacity, dtype=np.float64)
+        elif embedding.shape[0] != self._matrix.shape[1]:
+            logger.warning(f"Answer cache embedding has dim {embedding.shape[0]}, expected {self._matrix.shape[1]}; exact tier only")
+            return
+
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self._row_keys[row] = entry.key
+        else:
+            row = len(self._row_keys)
+            if row == len(self._matrix):
+                self._grow()
+            self._row_keys.append(entry.key)
+
+        self._matrix[row] = embedding
+        self._row_scope[row] = self._scope_ids.setdefault(entry.key[1], len(self._scope_ids))
+        self._row_created[row] = entry.created_at
+        self._rows[entry.key] = row
+
+    def _grow(self):
+        capacity = 2 * len(self._matrix)
+        self._matrix = np.resize(self._matrix, (capacity, self._matrix.shape[1]))
+        self._row_scope = np.concatenate([self._row_scope, np.full(capacity - len(self._row_scope), -1, dtype=np.int64)])
+        self._row_created = np.resize(self._row_created, capacity)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._row_scope[row] = -1
+            self._row_keys[row] = None
+            self._free_rows.append(row)
+
+    def _nearest(self, query_vec: np.ndarray, scope):
+        scope = self._scope_ids.get(scope)
+        if scope is None or not self._rows:
+            return None
+
+        used = len(self._row_keys)
+        live = (self._row_scope[:used] == scope) & (self._row_created[:used] >= time.monotonic() - self.ttl_seconds)
+        if not live.any():
+            return None
+
+        similarities = np.where(live, self._matrix[:used] @ query_vec, -np.inf)
+        best = int(np.argmax(similarities))
+
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        return self._entries[self._row_keys[best]], float(similarities[best])
+
+    def _evict(self):
+        now = time.monotonic()
+
+        for key in [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]:
+            self._remove(key)
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def _version_due(self) -> bool:
+        return (
+            self.version_fn is not None
+            and time.monotonic() - self._version_checked_at >= self.version_check_seconds
+        )
+
+    def _check_version(self):
+        if not self._version_due():
+            return
+        self._version_checked_at = time.monotonic()
+
+        try:
+            version = self.version_fn()
+        except Exception as e:
+            logger.warning(f"Answer cache version check failed: {e}")
+            return
+
+        if self._version is not None and version != self._version:
+            logger.info("Vector store changed, invalidating answer cache")
+            self.clear()
+
+        self._version = version
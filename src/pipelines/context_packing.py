@@ -0,0 +1,148 @@
+from dataclasses import dataclass, field
+
+from configs import rag_config
+from src.utils.tokens import count_tokens
+
+
+# the splitter overlaps neighbours by CHUNK_OVERLAP chars; separators can
+# shift the boundary a little, so search a wider window
+_MAX_OVERLAP_CHARS = 400
+_MIN_OVERLAP_CHARS = 20
+
+
+@dataclass
+class Passage:
+    source: str
+    page: object
+    text: str
+    chunks: int = 1
+
+
+@dataclass
+class PackedContext:
+    text: str
+    sources: list
+    previews: list
+    tokens: int
+    token_budget: int
+    passages: int
+    input_docs: int
+    truncated: bool = False
+    dropped: list = field(default_factory=list)
+
+
+def _format_passage(passage: Passage) -> str:
+    return f"\n\n[Page {passage.page}] {passage.text}"
+
+
+def _merge_overlapping(first: str, second: str):
+    """Joins `second` onto `first` if first's tail repeats second's head."""
+    longest = min(_MAX_OVERLAP_CHARS, len(first), len(second))
+
+    for size in range(longest, _MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+
+    return None
+
+
+def _absorb(passage: Passage, text: str) -> bool:
+    if text in passage.text:
+        return True
+
+    if passage.text in text:
+        passage.text = text
+        return True
+
+    merged = _merge_overlapping(passage.text, text) or _merge_overlapping(text, passage.text)
+    if merged is not None:
+        passage.text = merged
+        return True
+
+    return False
+
+
+def _collect_passages(docs) -> list:
+    """
+    Dedupes and merges chunks in relevance order: a chunk contained in, or
+    overlapping with, a passage from the same page is folded into it, so
+    the passage keeps the rank of its best chunk.
+    """
+    passages = []
+
+    for doc in docs:
+        text = doc.page_content.strip()
+        if not text:
+            continue
+
+        source = doc.metadata.get("source", "unknown")
+        page = doc.metadata.get("page", "unknown")
+
+        for passage in passages:
+            if passage.source == source and passage.page == page and _absorb(passage, text):
+                passage.chunks += 1
+                break
+        else:
+            passages.append(Passage(source=source, page=page, text=text))
+
+    return passages
+
+
+def _truncate_to_tokens(passage: Passage, max_tokens: int) -> Passage:
+    text = passage.text
+    tokens = count_tokens(_format_passage(passage))
+
+    while text and tokens > max_tokens:
+        cut = max(1, int(len(text) * max_tokens / tokens * 0.95))
+        text = text[:cut].rsplit(" ", 1)[0] if " " in text[:cut] else text[:cut]
+        tokens = count_tokens(_format_passage(Passage(passage.source, passage.page, text)))
+
+    return Passage(passage.source, passage.page, text, passage.chunks)
+
+
+def pack_context(docs, token_budget: int = None, min_passage_tokens: int = None) -> PackedContext:
+    """
+    Packs retrieved docs (best first) into at most `token_budget` model
+    tokens: overlapping chunks are deduped and merged, passages are added
+    by relevance, and the first passage that does not fit is truncated
+    when enough room is left for it to be useful.
+    """
+    docs = list(docs)
+    token_budget = token_budget or rag_config.CONTEXT_TOKEN_BUDGET
+    if min_passage_tokens is None:
+        min_passage_tokens = rag_config.MIN_PASSAGE_TOKENS
+
+    packed = []
+    dropped = []
+    used = 0
+    truncated = False
+
+    for passage in _collect_passages(docs):
+        remaining = token_budget - used
+        tokens = count_tokens(_format_passage(passage))
+
+        if tokens <= remaining:
+            packed.append(passage)
+            used += tokens
+            continue
+
+        if not truncated and remaining >= min_passage_tokens:
+            passage = _truncate_to_tokens(passage, remaining)
+            packed.append(passage)
+            used += count_tokens(_format_passage(passage))
+            truncated = True
+            continue
+
+        dropped.append({"source": passage.source, "page": passage.page})
+
+    return PackedContext(
+        text="".join(_format_passage(passage) for passage in packed),
+        sources=[{"source": passage.source, "page": passage.page} for passage in packed],
+        previews=[passage.text[:250] for passage in packed],
+        tokens=used,
+        token_budget=token_budget,
+        passages=len(packed),
+        input_docs=len(docs),
+        truncated=truncated,
+        dropped=dropped,
+    )
@@ -0,0 +1,409 @@
+import asyncio
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+from configs import embedding_config
+from src.utils.lazy import LazyImport
+from src.utils.logger import logger
+
+OllamaEmbeddings = LazyImport("langchain_ollama", "OllamaEmbeddings")
+
+
+def _text_key(model: str, text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class DiskEmbeddingCache:
+    """
+    Persistent embedding tier backed by SQLite.
+    Once max_entries is exceeded the least recently used rows are dropped.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: list) -> dict:
+        if not keys:
+            return {}
+
+        found = {}
+        with self._lock:
+            # stay below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+        return found
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in items.items()]
+            )
+
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+            self._conn.commit()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text requests into one `batch_fn(texts)`
+    call. Worker threads pull from a shared queue. A request that arrives
+    while every worker is idle is sent alone, so nothing waits at low load.
+    Under load, requests queue up while a batch is in flight. The next
+    worker takes all of them, waiting up to `window_ms` for stragglers,
+    and sends at most `max_batch` texts in one call.
+    """
+
+    def __init__(self, batch_fn, window_ms: float, max_batch: int, workers: int = 1, name: str = "micro-batcher"):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def __call__(self, text: str):
+        return self.submit(text).result()
+
+    async def acall(self, text: str):
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self, first) -> list:
+        batch = [first]
+
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # only linger when there is evidence of concurrent traffic
+        if len(batch) > 1 and self.window > 0:
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = self._collect(first)
+            if None in batch:
+                # shutdown sentinel swept up with real work; put it back for after this batch
+                batch.remove(None)
+                self._queue.put(None)
+
+            # identical texts in one batch are embedded once
+            unique = list(dict.fromkeys(text for text, _ in batch))
+
+            try:
+                results = dict(zip(unique, self.batch_fn(unique)))
+                for text, future in batch:
+                    future.set_result(results[text])
+
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            }
+
+    def close(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-process LRU and an optional disk tier,
+    keyed by (model, sha256(text)).
+
+    Query embeddings are kept in the LRU. Document embeddings are only
+    written to the disk tier so a vector build does not flush hot queries.
+    With a `batcher`, query misses from concurrent requests are embedded
+    together in one call.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        model: str,
+        max_entries: int,
+        disk_cache: DiskEmbeddingCache = None,
+        batcher: MicroBatcher = None,
+    ):
+        self.inner = inner
+        self.model = model
+        self.max_entries = max_entries
+        self.disk_cache = disk_cache
+        self.batcher = batcher
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def embed_query(self, text: str) -> list[float]:
+        key = _text_key(self.model, text)
+
+        vector = self._lookup(key)
+        if vector is not None:
+            return list(vector)
+
+        self._count(misses=1)
+        result = self.batcher(text) if self.batcher is not None else self.inner.embed_query(text)
+        self._remember(key, result)
+        return result
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [_text_key(self.model, text) for text in texts]
+        vectors = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    vectors[key] = self._memory[key]
+            self.hits += len(vectors)
+
+        if self.disk_cache is not None:
+            found = self.disk_cache.get_many([key for key in keys if key not in vectors])
+            vectors.update(found)
+            self._count(disk_hits=len(found))
+
+        # embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            self._count(misses=len(missing))
+            embedded = self.inner.embed_documents(list(missing.values()))
+
+            fresh = {key: array("f", vec) for key, vec in zip(missing.keys(), embedded)}
+            vectors.update(fresh)
+
+            if self.disk_cache is not None:
+                self.disk_cache.put_many(fresh)
+
+        return [list(vectors[key]) for key in keys]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = _text_key(self.model, text)
+
+        # the disk tier is blocking SQLite, so it runs off the event loop
+        vector = self._memory_get(key)
+        if vector is None and self.disk_cache is not None:
+            vector = await asyncio.to_thread(self._disk_lookup, key)
+        if vector is not None:
+            return list(vector)
+
+        self._count(misses=1)
+        if self.batcher is not None:
+            result = await self.batcher.acall(text)
+        else:
+            result = await self.inner.aembed_query(text)
+
+        vector = array("f", result)
+        self._memory_put(key, vector)
+        if self.disk_cache is not None:
+            await asyncio.to_thread(self.disk_cache.put_many, {key: vector})
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                "model": self.model,
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+        if self.batcher is not None:
+            stats["batching"] = self.batcher.stats()
+        return stats
+
+    def _lookup(self, key: str):
+        vector = self._memory_get(key)
+        if vector is not None or self.disk_cache is None:
+            return vector
+        return self._disk_lookup(key)
+
+    def _disk_lookup(self, key: str):
+        vector = self.disk_cache.get_many([key]).get(key)
+        if vector is not None:
+            self._count(disk_hits=1)
+            self._memory_put(key, vector)
+        return vector
+
+    def _remember(self, key: str, result: list[float]):
+        vector = array("f", result)
+        self._memory_put(key, vector)
+        if self.disk_cache is not None:
+            self.disk_cache.put_many({key: vector})
+
+    def _memory_get(self, key: str):
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def _memory_put(self, key: str, vector: array):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, disk_hits: int = 0, misses: int = 0):
+        with self._lock:
+            self.disk_hits += disk_hits
+            self.misses += misses
+
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings():
+    """
+    Shared embedding provider used by the retriever, the vector build
+    pipeline and the evaluator.
+    """
+    global _embeddings
+
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                logger.info(f"Initializing embedding provider {embedding_config.EMBEDDING_MODEL} (one-time)...")
+
+                disk_cache = None
+                if embedding_config.EMBED_CACHE_DISK_ENABLED:
+                    disk_cache = DiskEmbeddingCache(
+                        path=embedding_config.EMBED_CACHE_DISK_PATH,
+                        max_entries=embedding_config.EMBED_CACHE_DISK_MAX_ENTRIES,
+                    )
+                    logger.info(f"Persistent embedding cache at {embedding_config.EMBED_CACHE_DISK_PATH}")
+
+                inner = OllamaEmbeddings(
+                    model=embedding_config.EMBEDDING_MODEL,
+                    keep_alive=embedding_config.EMBED_KEEP_ALIVE,
+                )
+
+                batcher = None
+                if embedding_config.EMBED_QUERY_BATCHING:
+                    # OllamaEmbeddings.embed_query is embed_documents([text])[0], so batching is exact
+                    batcher = MicroBatcher(
+                        inner.embed_documents,
+                        window_ms=embedding_config.EMBED_QUERY_BATCH_WINDOW_MS,
+                        max_batch=embedding_config.EMBED_QUERY_BATCH_MAX_SIZE,
+                        workers=embedding_config.EMBED_QUERY_BATCH_WORKERS,
+                        name="query-embed-batcher",
+                    )
+
+                _embeddings = CachedEmbeddings(
+                    inner=inner,
+                    model=embedding_config.EMBEDDING_MODEL,
+                    max_entries=embedding_config.EMBED_CACHE_MAX_ENTRIES,
+                    disk_cache=disk_cache,
+                    batcher=batcher,
+                )
+
+                logger.info("Embedding provider initialized and cached")
+
+    return _embeddings
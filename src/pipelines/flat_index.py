@@ -0,0 +1,317 @@
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.pipelines.hybrid_retriever import matches_filter
+from src.utils.logger import logger
+
+
+_VECTORS_FILE = "vectors.npy"
+_SCALES_FILE = "scales.npy"
+_DOCS_FILE = "documents.json"
+_META_FILE = "meta.json"
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+# int8 rows are dequantized and scored in cache-sized blocks
+_BLOCK_ROWS = 512
+
+# filters come from requests, so only the most recently used masks are kept
+_FILTER_MASK_CACHE_SIZE = 32
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _quantize(vectors: np.ndarray, dtype: str):
+    """Returns (stored matrix, per-row scales or None)."""
+    if dtype == "float32":
+        return vectors.astype(np.float32), None
+
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+
+    if dtype == "int8":
+        # symmetric per-row quantization: row ~= q * scale
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    raise ValueError(f"Unsupported flat index dtype: {dtype} (expected one of {SUPPORTED_DTYPES})")
+
+
+def write_flat_index(path: str, ids: list, texts: list, metadatas: list, vectors, dtype: str = "float32"):
+    """
+    Writes L2-normalised vectors (optionally quantized) as one contiguous
+    .npy array plus a JSON sidecar of ids, texts and metadata.
+    """
+    matrix = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+    stored, scales = _quantize(matrix, dtype)
+
+    # write into a fresh directory and swap it in, so processes that have
+    # the old vectors memory-mapped never see a truncated file
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, _VECTORS_FILE), stored)
+    if scales is not None:
+        np.save(os.path.join(tmp_path, _SCALES_FILE), scales)
+
+    with open(os.path.join(tmp_path, _DOCS_FILE), "w", encoding="utf-8") as f:
+        json.dump({"ids": list(ids), "texts": list(texts), "metadatas": list(metadatas)}, f)
+    with open(os.path.join(tmp_path, _META_FILE), "w") as f:
+        json.dump({"count": len(ids), "dim": int(matrix.shape[1]) if len(ids) else 0, "dtype": dtype}, f)
+
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    logger.info(f"Flat index written to {path}: {len(ids)} vectors, dtype={dtype}")
+
+
+def export_chroma_to_flat_index(vector_db, path: str, dtype: str = "float32", batch_size: int = 5000):
+    """Exports every embedding, text and metadata row stored in Chroma."""
+    collection = vector_db._collection
+    total = collection.count()
+
+    ids, texts, metadatas, vectors = [], [], [], []
+    for offset in range(0, total, batch_size):
+        data = collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=batch_size,
+            offset=offset,
+        )
+        ids.extend(data["ids"])
+        texts.extend(data["documents"])
+        metadatas.extend(data["metadatas"])
+        vectors.append(np.asarray(data["embeddings"], dtype=np.float32))
+
+    matrix = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    write_flat_index(path, ids, texts, metadatas, matrix, dtype)
+
+
+class FlatVectorStore(VectorStore):
+    """
+    Exact (brute-force) vector search over one contiguous matrix.
+
+    For a corpus of a few thousand chunks a single matrix-vector product
+    plus argpartition is cheaper than an ANN index behind a client. Rows
+    are unit length, so scores are cosine similarities. Reported
+    distances are squared L2 (2 - 2cos), the same scale as Chroma's
+    default l2 space for normalised embeddings.
+    """
+
+    def __init__(self, embedding: Embeddings, ids: list, texts: list, metadatas: list, vectors, scales=None, path: str = None):
+        if vectors.dtype == np.float16:
+            # NumPy has no fast float16 matmul and converting per query costs
+            # more than the scan, so float16 only halves the on-disk size
+            vectors = np.asarray(vectors, dtype=np.float32)
+
+        self._embedding = embedding
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.metadatas = [metadata or {} for metadata in metadatas]
+        self.vectors = vectors
+        self.scales = scales
+        self.path = path
+        # disk_fingerprint() of the files this store was loaded from
+        self.loaded_from = None
+
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._filter_masks = OrderedDict()
+        self._filter_masks_lock = threading.Lock()
+
+    # -----------------------------------
+    # CONSTRUCTION
+    # -----------------------------------
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, _META_FILE))
+
+    @staticmethod
+    def stored_dtype(path: str):
+        """dtype of the index at `path`, or None if there is none."""
+        if not FlatVectorStore.exists(path):
+            return None
+        with open(os.path.join(path, _META_FILE), "r") as f:
+            return json.load(f)["dtype"]
+
+    @staticmethod
+    def disk_fingerprint(path: str):
+        """Identifies the index files at `path`; a rebuild swaps in a new directory, so it changes."""
+        try:
+            stat = os.stat(os.path.join(path, _META_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    @classmethod
+    def load(cls, path: str, embedding: Embeddings, mmap: bool = True) -> "FlatVectorStore":
+        mmap_mode = "r" if mmap else None
+        # taken before reading, so a rebuild that lands mid-load is seen as stale
+        loaded_from = cls.disk_fingerprint(path)
+
+        vectors = np.load(os.path.join(path, _VECTORS_FILE), mmap_mode=mmap_mode)
+        scales_path = os.path.join(path, _SCALES_FILE)
+        scales = np.load(scales_path) if os.path.exists(scales_path) else None
+
+        with open(os.path.join(path, _DOCS_FILE), "r", encoding="utf-8") as f:
+            docs = json.load(f)
+
+        store = cls(embedding, docs["ids"], docs["texts"], docs["metadatas"], vectors, scales, path=path)
+        store.loaded_from = loaded_from
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        dtype: str = "float32",
+        **kwargs: Any,
+    ) -> "FlatVectorStore":
+        """In-memory store (no files), mainly for tests and benchmarks."""
+        texts = list(texts)
+        vectors = _normalize(np.asarray(embedding.embed_documents(texts), dtype=np.float32))
+        stored, scales = _quantize(vectors, dtype)
+
+        return cls(
+            embedding,
+            ids or [str(i) for i in range(len(texts))],
+            texts,
+            metadatas or [{} for _ in texts],
+            stored,
+            scales,
+        )
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def fingerprint(self):
+        """Identifies the vectors this store serves (not what is on disk now)."""
+        return (len(self.ids), self.loaded_from)
+
+    def is_stale(self) -> bool:
+        """True once the index at `path` was rebuilt after this store loaded it."""
+        if self.path is None:
+            return False
+        on_disk = self.disk_fingerprint(self.path)
+        return on_disk is not None and on_disk != self.loaded_from
+
+    # -----------------------------------
+    # SEARCH
+    # -----------------------------------
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ query
+
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _BLOCK_ROWS):
+            block = self.vectors[start:start + _BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+
+        return scores * self.scales
+
+    def _filter_mask(self, filter: dict):
+        key = json.dumps(filter, sort_keys=True)
+        with self._filter_masks_lock:
+            mask = self._filter_masks.get(key)
+            if mask is not None:
+                self._filter_masks.move_to_end(key)
+                return mask
+
+        mask = np.fromiter(
+            (matches_filter(metadata, filter) for metadata in self.metadatas),
+            dtype=bool,
+            count=len(self.metadatas),
+        )
+
+        with self._filter_masks_lock:
+            self._filter_masks[key] = mask
+            while len(self._filter_masks) > _FILTER_MASK_CACHE_SIZE:
+                self._filter_masks.popitem(last=False)
+        return mask
+
+    def _top_k(self, embedding: list[float], k: int, filter: dict = None) -> list:
+        """Returns [(position, cosine)] best first."""
+        if not self.ids:
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        scores = self._scores(query)
+
+        if filter:
+            scores = np.where(self._filter_mask(filter), scores, -np.inf)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(int(i), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def _document(self, position: int) -> Document:
+        return Document(
+            id=self.ids[position],
+            page_content=self.texts[position],
+            metadata=self.metadatas[position],
+        )
+
+    def similarity_search_with_score_by_vector(self, embedding: list[float], k: int = 4, filter: dict = None) -> list:
+        return [
+            (self._document(position), 2.0 - 2.0 * score)
+            for position, score in self._top_k(embedding, k, filter)
+        ]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, filter: dict = None, **kwargs: Any) -> list:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict = None, **kwargs: Any) -> list:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs: Any) -> list[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k, filter)
+
+    async def asimilarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs: Any) -> list[Document]:
+        # the scan itself is sub-millisecond, so only the embedding call is awaited
+        return self.similarity_search_by_vector(await self._embedding.aembed_query(query), k, filter)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, filter: dict = None, **kwargs: Any) -> list:
+        return self.similarity_search_with_score_by_vector(await self._embedding.aembed_query(query), k, filter)
+
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+
+    def get_by_ids(self, ids, /) -> list[Document]:
+        return [self._document(self._positions[doc_id]) for doc_id in ids if doc_id in self._positions]
+
+    async def aget_by_ids(self, ids, /) -> list[Document]:
+        return self.get_by_ids(ids)
+
+    def get_vectors(self, ids: list) -> np.ndarray:
+        """Stored (unit, dequantized) vectors for `ids`; unknown ids raise KeyError."""
+        positions = [self._positions[doc_id] for doc_id in ids]
+        vectors = np.asarray(self.vectors[positions], dtype=np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[positions, None]
+        return vectors
+
+    def add_texts(self, texts: Iterable[str], metadatas: list[dict] | None = None, **kwargs: Any) -> list[str]:
+        raise NotImplementedError("FlatVectorStore is read-only; rebuild it with export_chroma_to_flat_index")
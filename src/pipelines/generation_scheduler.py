@@ -0,0 +1,273 @@
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from configs import scheduler_config
+from src.utils.exceptions import AdmissionError
+from src.utils.logger import logger
+from src.utils.metrics import REGISTRY
+
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "llm_queue_depth",
+    "Generations waiting for an LLM slot",
+    ("priority",),
+)
+ACTIVE_GENERATIONS = REGISTRY.gauge(
+    "llm_active_generations",
+    "Generations holding an LLM slot",
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_queue_wait_seconds",
+    "Time a generation waited for an LLM slot",
+    ("priority",),
+)
+REJECTIONS = REGISTRY.counter(
+    "llm_admission_rejections_total",
+    "Generations rejected by the scheduler",
+    ("priority", "reason"),
+)
+
+
+class _Waiter:
+    __slots__ = ("priority", "wake", "granted", "abandoned")
+
+    def __init__(self, priority: str, wake):
+        self.priority = priority
+        self.wake = wake
+        self.granted = False
+        self.abandoned = False
+
+
+class GenerationScheduler:
+    """
+    Admission control in front of the LLM: at most `max_concurrency`
+    generations run at once, up to `max_queue` more wait in priority
+    order, and a waiter whose deadline passes fails instead of queueing
+    forever. Freed slots are handed straight to the next waiter.
+
+    Works from the event loop (`aslot`) and from worker threads (`slot`),
+    which share the same slots.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        max_queue: int = None,
+        deadlines: dict = None,
+        priorities: dict = None,
+        clock=time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency or scheduler_config.LLM_MAX_CONCURRENCY
+        self.max_queue = scheduler_config.LLM_MAX_QUEUE if max_queue is None else max_queue
+        self.deadlines = deadlines or scheduler_config.QUEUE_DEADLINE_SECONDS
+        self.priorities = priorities or scheduler_config.PRIORITIES
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._heap = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._waiting = {priority: 0 for priority in self.priorities}
+        # start time of each running generation, by slot token
+        self._started = {}
+
+        # moving average of how long a generation holds its slot
+        self._service_time = None
+
+    # -----------------------------------
+    # STATE
+    # -----------------------------------
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(self._waiting.values())
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "waiting": dict(self._waiting),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "avg_generation_seconds": round(self._service_time, 3) if self._service_time else None,
+        }
+
+    def _expected_wait(self, ahead: int):
+        """
+        Seconds until a waiter with `ahead` waiters in front of it gets a
+        slot: the remaining time of the slot it will inherit, plus one
+        whole generation per full round of slots before that. None until
+        a generation has finished. Call with the lock held.
+        """
+        service_time = self._service_time
+        if service_time is None:
+            return None
+
+        now = self.clock()
+        residuals = [max(0.0, service_time - (now - started)) for started in self._started.values()]
+        # granted but not yet started: a full generation still to go
+        residuals += [service_time] * max(0, self._active - len(residuals))
+        residuals.sort()
+
+        rounds, index = divmod(ahead, self.max_concurrency)
+        residual = residuals[index] if index < len(residuals) else 0.0
+        return residual + rounds * service_time
+
+    @staticmethod
+    def _retry_seconds(expected_wait) -> int:
+        return max(1, math.ceil(expected_wait if expected_wait is not None else 1.0))
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get a slot, for the Retry-After header."""
+        with self._lock:
+            return self._retry_seconds(self._expected_wait(self.waiting))
+
+    def _set_waiting(self, priority: str, delta: int):
+        self._waiting[priority] += delta
+        QUEUE_DEPTH.set(self._waiting[priority], priority)
+
+    # -----------------------------------
+    # ADMISSION
+    # -----------------------------------
+    def _reject(self, priority: str, reason: str, status_code: int, expected_wait: float = None):
+        REJECTIONS.inc(priority, reason)
+        # the Retry-After comes from the same estimate that drove the decision
+        retry_after = self._retry_seconds(expected_wait)
+        logger.warning(
+            f"[SCHEDULER] Rejected {priority} generation ({reason}); "
+            f"active={self._active}, waiting={self.waiting}, retry_after={retry_after}s"
+        )
+        raise AdmissionError(f"LLM is saturated ({reason})", status_code, retry_after)
+
+    def _enqueue(self, priority: str, wake):
+        """Takes a free slot (returns None) or queues a waiter (returns it)."""
+        if priority not in self.priorities:
+            raise ValueError(f"Unknown priority: {priority} (expected one of {tuple(self.priorities)})")
+
+        with self._lock:
+            if self._active < self.max_concurrency and not self.waiting:
+                self._active += 1
+                ACTIVE_GENERATIONS.set(self._active)
+                return None
+
+            if self.waiting >= self.max_queue:
+                self._reject(priority, "queue_full", 429, self._expected_wait(self.waiting))
+
+            # fail fast when the expected wait already exceeds the deadline; the
+            # head of the line is always queued, since its wait is bounded by the
+            # real deadline below and the EWMA alone is too coarse to refuse on
+            rank = self.priorities[priority]
+            ahead = sum(count for name, count in self._waiting.items() if self.priorities[name] <= rank)
+            deadline = self.deadlines.get(priority)
+            expected_wait = self._expected_wait(ahead)
+            if ahead and deadline is not None and expected_wait is not None and expected_wait > deadline:
+                self._reject(priority, "deadline", 503, expected_wait)
+
+            waiter = _Waiter(priority, wake)
+            heapq.heappush(self._heap, (rank, next(self._seq), waiter))
+            self._set_waiting(priority, 1)
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Gives up waiting; returns True if the slot was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.abandoned = True
+            self._set_waiting(waiter.priority, -1)
+            return False
+
+    def _track(self) -> int:
+        """Records the start of a granted generation; returns its slot token."""
+        with self._lock:
+            token = next(self._seq)
+            self._started[token] = self.clock()
+            return token
+
+    def _release(self, token: int = None, held_for: float = None):
+        with self._lock:
+            self._started.pop(token, None)
+            if held_for is not None:
+                self._service_time = held_for if self._service_time is None else 0.8 * self._service_time + 0.2 * held_for
+
+            while self._heap:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.abandoned:
+                    continue
+
+                # hand the slot over without freeing it
+                waiter.granted = True
+                self._set_waiting(waiter.priority, -1)
+                waiter.wake()
+                return
+
+            self._active -= 1
+            ACTIVE_GENERATIONS.set(self._active)
+
+    def _timed_out(self, priority: str, queued_at: float):
+        QUEUE_WAIT_SECONDS.observe(self.clock() - queued_at, priority)
+        with self._lock:
+            expected_wait = self._expected_wait(self.waiting)
+        self._reject(priority, "deadline", 503, expected_wait)
+
+    # -----------------------------------
+    # SLOTS
+    # -----------------------------------
+    @asynccontextmanager
+    async def aslot(self, priority: str = "standard"):
+        """Holds one generation slot for the block; raises AdmissionError if none comes in time."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        queued_at = self.clock()
+        waiter = self._enqueue(priority, wake)
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), self.deadlines.get(priority))
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    self._timed_out(priority, queued_at)
+            except asyncio.CancelledError:
+                # client went away while queued
+                if self._abandon(waiter):
+                    self._release()
+                raise
+
+        QUEUE_WAIT_SECONDS.observe(self.clock() - queued_at, priority)
+        token = self._track()
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self._release(token, self.clock() - started)
+
+    @contextmanager
+    def slot(self, priority: str = "standard"):
+        """Blocking variant of aslot() for synchronous callers."""
+        granted = threading.Event()
+
+        queued_at = self.clock()
+        waiter = self._enqueue(priority, granted.set)
+
+        if waiter is not None and not granted.wait(self.deadlines.get(priority)):
+            if not self._abandon(waiter):
+                self._timed_out(priority, queued_at)
+
+        QUEUE_WAIT_SECONDS.observe(self.clock() - queued_at, priority)
+        token = self._track()
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self._release(token, self.clock() - started)
@@ -0,0 +1,82 @@
+import asyncio
+
+from configs import rag_config
+from src.utils.logger import logger
+from src.utils.tokens import count_tokens
+
+
+def format_history(history: list, summary: str = "", token_budget: int = None) -> str:
+    """
+    Renders the rolling summary plus the most recent turns, newest kept
+    first, within `token_budget` tokens, so the prompt size does not
+    depend on how long the conversation has run.
+    """
+    token_budget = token_budget or rag_config.HISTORY_TOKEN_BUDGET
+
+    summary_text = f"\nSUMMARY OF EARLIER CONVERSATION: {summary}" if summary else ""
+    remaining = token_budget - count_tokens(summary_text)
+
+    lines = []
+    for turn in reversed(history):
+        line = f"\n{turn['role'].upper()}: {turn['message']}"
+        tokens = count_tokens(line)
+        if tokens > remaining:
+            break
+
+        lines.append(line)
+        remaining -= tokens
+
+    return summary_text + "".join(reversed(lines))
+
+
+def window_messages() -> int:
+    return rag_config.HISTORY_WINDOW_TURNS * 2
+
+
+class HistoryCompactor:
+    """
+    Folds turns that fell out of the window into the session's rolling
+    summary. Runs as background tasks on the event loop so the LLM
+    summarisation call is never on the request path; at most one job per
+    session is in flight and `max_concurrency` jobs overall.
+    """
+
+    def __init__(self, summarize_fn, keep_last: int = None, compact_every: int = None, max_concurrency: int = 1):
+        self.summarize_fn = summarize_fn
+        self.keep_last = keep_last or window_messages()
+        self.compact_every = compact_every or rag_config.HISTORY_COMPACT_EVERY_TURNS * 2
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks = {}
+
+    def maybe_compact(self, store, session_id: str, history_length: int):
+        if history_length < self.keep_last + self.compact_every:
+            return
+
+        if session_id in self._tasks:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._compact(store, session_id))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    async def _compact(self, store, session_id: str):
+        try:
+            async with self._semaphore:
+                history = await store.get_history(session_id)
+                overflow = history[:-self.keep_last]
+                if not overflow:
+                    return
+
+                summary = await self.summarize_fn(await store.get_summary(session_id), overflow)
+                folded = await store.apply_compaction(session_id, summary, overflow)
+
+            logger.info(f"[HISTORY] Session {session_id}: folded {folded} messages into summary")
+
+        except Exception as e:
+            logger.error(f"[HISTORY] Compaction failed for session {session_id}: {e}")
+
+    async def aclose(self):
+        """Waits for in-flight compactions."""
+        await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
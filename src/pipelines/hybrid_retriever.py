@@ -0,0 +1,173 @@
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+
+def relevance_search(vectorstore, query: str, k: int = 4, **kwargs) -> list:
+    """
+    [(doc, relevance)] like similarity_search_with_relevance_scores, minus
+    its per-call warning for scores outside [0, 1]. On unit vectors the
+    relevance is 1 - (2 - 2*cos) / sqrt(2), so it spans [1 - 2*sqrt(2), 1]
+    and a weak match is legitimately negative; the refusal gate in
+    rag_chain compares against that unclamped range.
+    """
+    return vectorstore._similarity_search_with_relevance_scores(query, k=k, **kwargs)
+
+
+async def arelevance_search(vectorstore, query: str, k: int = 4, **kwargs) -> list:
+    return await vectorstore._asimilarity_search_with_relevance_scores(query, k=k, **kwargs)
+
+
+def reciprocal_rank_fusion(rankings: list, rrf_k: int = 60) -> list:
+    """
+    Fuses several best-first lists of IDs: each list contributes
+    1 / (rrf_k + rank) to an ID's score. Returns [(id, score)] best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+_COMPARISONS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+
+def matches_filter(metadata: dict, filter: dict) -> bool:
+    """
+    Evaluates a Chroma `where` filter against one document's metadata:
+    field equality, the operators in _COMPARISONS and $and / $or, so
+    documents that never went through Chroma's own filtering (BM25 hits,
+    the flat index) are held to the same filter. Raises ValueError for
+    an operator Chroma would accept but this does not know.
+    """
+    for key, value in filter.items():
+        if key == "$and":
+            matched = all(matches_filter(metadata, clause) for clause in value)
+        elif key == "$or":
+            matched = any(matches_filter(metadata, clause) for clause in value)
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported metadata filter operator: {key}")
+        elif isinstance(value, dict):
+            matched = all(_compare(metadata.get(key), op, operand) for op, operand in value.items())
+        else:
+            matched = metadata.get(key) == value
+
+        if not matched:
+            return False
+
+    return True
+
+
+def _compare(value, op: str, operand) -> bool:
+    comparison = _COMPARISONS.get(op)
+    if comparison is None:
+        raise ValueError(f"Unsupported metadata filter operator: {op}")
+
+    try:
+        return comparison(value, operand)
+    except TypeError:
+        # e.g. a string field compared with $gt to a number
+        return False
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 + vector retrieval fused with reciprocal rank fusion.
+
+    Both sides return fetch_k candidates; lexical hits the vector side did
+    not return are fetched from the vector store by ID.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: Any
+    lexical_index: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    filter: dict | None = None
+
+    def _fuse(self, vector_docs: list, lexical_hits: list) -> list:
+        vector_ids = [doc.id for doc in vector_docs]
+        lexical_ids = [doc_id for doc_id, _ in lexical_hits]
+
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids], self.rrf_k)
+        return [doc_id for doc_id, _ in fused]
+
+    def _select(self, ranked_ids: list, docs_by_id: dict) -> list:
+        selected = []
+        for doc_id in ranked_ids:
+            doc = docs_by_id.get(doc_id)
+            if doc is None:
+                continue
+            if self.filter and not matches_filter(doc.metadata, self.filter):
+                continue
+
+            selected.append(doc)
+            if len(selected) == self.k:
+                break
+
+        return selected
+
+    def _missing_ids(self, ranked_ids: list, vector_hits: list) -> list:
+        vector_ids = {doc.id for doc, _ in vector_hits}
+        return [doc_id for doc_id in ranked_ids[:self.fetch_k] if doc_id not in vector_ids]
+
+    def _scored_selection(self, ranked_ids: list, vector_hits: list, fetched: list) -> list:
+        docs_by_id = {doc.id: doc for doc, _ in vector_hits}
+        docs_by_id.update({doc.id: doc for doc in fetched})
+
+        scores = {doc.id: score for doc, score in vector_hits}
+        return [(doc, scores.get(doc.id)) for doc in self._select(ranked_ids, docs_by_id)]
+
+    def scored_documents(self, query: str) -> list:
+        """
+        [(doc, relevance)] in fused order. Relevance is the vector side's
+        unclamped score from relevance_search, in [1 - 2*sqrt(2), 1] (about
+        -1.83 to 1); BM25-only hits have none (None).
+        """
+        vector_hits = relevance_search(self.vectorstore, query, k=self.fetch_k, filter=self.filter)
+        lexical_hits = self.lexical_index.search(query, self.fetch_k)
+
+        ranked_ids = self._fuse([doc for doc, _ in vector_hits], lexical_hits)
+        missing = self._missing_ids(ranked_ids, vector_hits)
+        fetched = self.vectorstore.get_by_ids(missing) if missing else []
+
+        return self._scored_selection(ranked_ids, vector_hits, fetched)
+
+    async def ascored_documents(self, query: str) -> list:
+        vector_hits = await arelevance_search(self.vectorstore, query, k=self.fetch_k, filter=self.filter)
+        lexical_hits = self.lexical_index.search(query, self.fetch_k)
+
+        ranked_ids = self._fuse([doc for doc, _ in vector_hits], lexical_hits)
+        missing = self._missing_ids(ranked_ids, vector_hits)
+        fetched = await self.vectorstore.aget_by_ids(missing) if missing else []
+
+        return self._scored_selection(ranked_ids, vector_hits, fetched)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return [doc for doc, _ in self.scored_documents(query)]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return [doc for doc, _ in await self.ascored_documents(query)]
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+
+from src.utils.logger import logger
+
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """
+    Record of what is already indexed in Chroma.
+
+    Layout on disk:
+        {
+            "version": 1,
+            "settings": {...},          # chunking + embedding settings
+            "sources": {
+                "<pdf path>": {"file_hash": "...", "chunk_ids": [...]}
+            }
+        }
+
+    A source whose file hash is unchanged is skipped entirely; a changed
+    source is re-chunked and only the chunk IDs it does not already have
+    are embedded.
+    """
+
+    def __init__(self, path: str, settings: dict, sources: dict = None):
+        self.path = path
+        self.settings = settings
+        self.sources = sources or {}
+
+    @classmethod
+    def load(cls, path: str, settings: dict):
+        if not os.path.exists(path):
+            return cls(path, settings)
+
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Index manifest unreadable, starting fresh: {e}")
+            return cls(path, settings)
+
+        if data.get("version") != MANIFEST_VERSION:
+            logger.warning("Index manifest version changed, starting fresh")
+            return cls(path, settings)
+
+        return cls(path, data.get("settings", {}), data.get("sources", {}))
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def is_unchanged(self, source: str, file_hash: str) -> bool:
+        entry = self.sources.get(source)
+        return entry is not None and entry["file_hash"] == file_hash
+
+    def chunk_ids(self, source: str) -> set:
+        entry = self.sources.get(source)
+        return set(entry["chunk_ids"]) if entry else set()
+
+    def all_chunk_ids(self) -> list:
+        return [chunk_id for entry in self.sources.values() for chunk_id in entry["chunk_ids"]]
+
+    def record(self, source: str, file_hash: str, chunk_ids: list):
+        self.sources[source] = {"file_hash": file_hash, "chunk_ids": list(chunk_ids)}
+
+    def forget(self, source: str):
+        self.sources.pop(source, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        # write-then-rename so a crash never leaves a half-written manifest
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "settings": self.settings, "sources": self.sources},
+                f
+            )
+        os.replace(tmp_path, self.path)
@@ -1,20 +1,138 @@
-from langchain_community.document_loaders import PyPDFLoader
+import glob
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
 
 from src.utils.logger import logger
 from src.utils.exceptions import PDFIngestionError
 from configs import ingestion_config
 
 
-def load_pdf_documents():
+def make_chunk_id(source: str, page, content: str, occurrence: int = 0) -> str:
+    """
+    Deterministic chunk ID from (source, page, content hash), so re-running
+    ingestion over the same PDF yields the same IDs. `occurrence` separates
+    identical chunks repeated on one page.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    key = f"{source}|{page}|{content_hash}|{occurrence}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def discover_pdf_paths(spec: str = None) -> list:
+    """
+    Resolves PDF_SOURCES (a directory, a glob or a single file) to a sorted
+    list of PDF paths.
+    """
+    spec = spec or ingestion_config.PDF_SOURCES
+
+    if os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, "**", "*.pdf"), recursive=True)
+    elif os.path.isfile(spec):
+        paths = [spec]
+    else:
+        paths = glob.glob(spec, recursive=True)
+
+    return sorted(path for path in paths if path.lower().endswith(".pdf"))
+
+
+# -----------------------------------
+# PAGE PARSING (runs in worker processes)
+# -----------------------------------
+# (path, PdfReader) of the file this worker parsed last; only one is kept,
+# since pypdf holds the whole file in memory
+_worker_reader = None
+
+
+def _get_reader(path: str) -> PdfReader:
+    # reused across consecutive page ranges of the same file
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != path:
+        _worker_reader = (path, PdfReader(path))
+    return _worker_reader[1]
+
+
+def _parse_page_range(path: str, start: int, stop: int) -> list:
+    """
+    Extracts pages [start, stop) with the same text and page metadata
+    PyPDFLoader produces, so chunk IDs stay stable across loaders.
+    """
+    reader = _get_reader(path)
+    total_pages = len(reader.pages)
+    page_labels = reader.page_labels
+
+    pages = []
+    for page_number in range(start, stop):
+        text = reader.pages[page_number].extract_text(extraction_mode="plain").strip()
+        pages.append((text, {
+            "source": path,
+            "total_pages": total_pages,
+            "page": page_number,
+            "page_label": page_labels[page_number],
+        }))
+
+    return pages
+
+
+def _page_tasks(paths: list, pages_per_task: int):
+    for path in paths:
+        total_pages = len(PdfReader(path).pages)
+        logger.info(f"Queued {path} ({total_pages} pages)")
+
+        for start in range(0, total_pages, pages_per_task):
+            yield path, start, min(start + pages_per_task, total_pages)
+
+
+def load_pdf_documents(
+    pdf_paths=None,
+    max_workers: int = ingestion_config.PARSE_MAX_WORKERS,
+    pages_per_task: int = ingestion_config.PARSE_PAGES_PER_TASK,
+):
+    """
+    Yields one Document per PDF page, in order, parsing page ranges in a
+    process pool. Only a bounded window of page ranges is in flight, so
+    memory does not grow with corpus size.
+    """
+    if pdf_paths is None:
+        pdf_paths = discover_pdf_paths()
+    elif isinstance(pdf_paths, str):
+        pdf_paths = [pdf_paths]
+
     try:
-        logger.info("Starting PDF loading process...")
+        logger.info(f"Starting PDF loading process: {len(pdf_paths)} file(s), {max_workers} worker(s)")
+
+        total_pages = 0
+        tasks = _page_tasks(pdf_paths, pages_per_task)
+
+        if max_workers <= 1:
+            for task in tasks:
+                for text, metadata in _parse_page_range(*task):
+                    total_pages += 1
+                    yield Document(page_content=text, metadata=metadata)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                window = deque()
+
+                for task in tasks:
+                    window.append(pool.submit(_parse_page_range, *task))
+
+                    # results are consumed in submission order to keep pages ordered
+                    if len(window) >= max_workers * 2:
+                        for text, metadata in window.popleft().result():
+                            total_pages += 1
+                            yield Document(page_content=text, metadata=metadata)
 
-        loader = PyPDFLoader(ingestion_config.PDF_PATH)
-        documents = loader.load()
+                while window:
+                    for text, metadata in window.popleft().result():
+                        total_pages += 1
+                        yield Document(page_content=text, metadata=metadata)
 
-        logger.info(f"Successfully loaded PDF. Total pages: {len(documents)}")
-        return documents
+        logger.info(f"Successfully loaded PDFs. Total pages: {total_pages}")
 
     except Exception as e:
         logger.error(f"PDF loading failed: {str(e)}")
@@ -22,6 +140,10 @@ def load_pdf_documents():
 
 
 def split_documents(documents):
+    """
+    Splits pages into chunks as they arrive and yields them with enriched
+    metadata; `documents` may be any iterable, including a generator.
+    """
     try:
         logger.info("Starting document chunking...")
 
@@ -30,26 +152,48 @@ def split_documents(documents):
             chunk_overlap=ingestion_config.CHUNK_OVERLAP
         )
 
-        chunks = splitter.split_documents(documents)
+        total_chunks = 0
+
+        for document in documents:
+            chunks = splitter.split_documents([document])
+
+            # enrich metadata
+            seen = {}
+            for chunk in chunks:
+                source = chunk.metadata.get("source", ingestion_config.PDF_PATH)
+                page = chunk.metadata.get("page", "unknown")
+
+                base_id = make_chunk_id(source, page, chunk.page_content)
+                occurrence = seen.get(base_id, 0)
+                seen[base_id] = occurrence + 1
+
+                chunk.metadata["source"] = source
+                chunk.metadata["chunk_id"] = (
+                    base_id if occurrence == 0
+                    else make_chunk_id(source, page, chunk.page_content, occurrence)
+                )
+
+                total_chunks += 1
+                yield chunk
 
-        # enrich metadata
-        for idx, chunk in enumerate(chunks):
-            chunk.metadata["chunk_id"] = idx
-            chunk.metadata["source"] = ingestion_config.PDF_PATH
+        logger.info(f"Document chunking complete. Total chunks created: {total_chunks}")
 
-        logger.info(f"Document chunking complete. Total chunks created: {len(chunks)}")
-        return chunks
+    except PDFIngestionError:
+        raise
 
     except Exception as e:
         logger.error(f"Document chunking failed: {str(e)}")
         raise PDFIngestionError("Failed to split PDF into chunks")
 
 
-def run_ingestion_pipeline():
+def run_ingestion_pipeline(pdf_paths=None):
+    """
+    Lazily chains page parsing and chunking; nothing runs until the
+    returned generator is consumed.
+    """
     logger.info("PHASE-2 INGESTION PIPELINE STARTED")
 
-    docs = load_pdf_documents()
-    chunks = split_documents(docs)
+    docs = load_pdf_documents(pdf_paths)
+    yield from split_documents(docs)
 
     logger.info("PHASE-2 INGESTION PIPELINE COMPLETED SUCCESSFULLY")
-    return chunks
@@ -0,0 +1,167 @@
+import json
+import math
+import os
+import re
+import shutil
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from src.utils.logger import logger
+
+
+# lowercase alphanumeric runs; keeps drug names, abbreviations and codes like "hba1c" / "e11"
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were what which with how does do can".split()
+)
+
+_DOCS_FILE = "postings_docs.npy"
+_WEIGHTS_FILE = "postings_weights.npy"
+_VOCAB_FILE = "vocab.json"
+_IDS_FILE = "doc_ids.json"
+_META_FILE = "meta.json"
+
+
+def tokenize(text: str) -> list:
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def build_lexical_index(ids: list, texts: list, path: str, k1: float = 1.5, b: float = 0.75):
+    """
+    Builds a BM25 inverted index and writes it to `path`.
+
+    Each posting stores its final BM25 weight (idf * saturated tf with
+    length normalisation), which does not depend on the query, so a query
+    is just a sum of posting weights over its terms.
+    """
+    logger.info(f"Building BM25 index over {len(ids)} chunks...")
+
+    doc_lengths = np.zeros(len(ids), dtype=np.float32)
+    postings = defaultdict(list)
+
+    for doc_idx, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        doc_lengths[doc_idx] = sum(counts.values())
+        for term, tf in counts.items():
+            postings[term].append((doc_idx, tf))
+
+    n_docs = len(ids)
+    avgdl = float(doc_lengths.mean()) if n_docs else 0.0
+
+    vocab = {}
+    all_docs = []
+    all_weights = []
+    offset = 0
+
+    for term in sorted(postings):
+        entries = postings[term]
+        df = len(entries)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+        docs = np.fromiter((doc_idx for doc_idx, _ in entries), dtype=np.int32, count=df)
+        tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=df)
+        norm = k1 * (1 - b + b * doc_lengths[docs] / max(avgdl, 1e-6))
+        weights = idf * tfs * (k1 + 1) / (tfs + norm)
+
+        vocab[term] = [offset, df]
+        all_docs.append(docs)
+        all_weights.append(weights.astype(np.float32))
+        offset += df
+
+    # write into a fresh directory and swap it in, so processes that have
+    # the old postings memory-mapped never see a truncated file
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, _DOCS_FILE), np.concatenate(all_docs) if all_docs else np.zeros(0, np.int32))
+    np.save(os.path.join(tmp_path, _WEIGHTS_FILE), np.concatenate(all_weights) if all_weights else np.zeros(0, np.float32))
+
+    with open(os.path.join(tmp_path, _VOCAB_FILE), "w") as f:
+        json.dump(vocab, f)
+    with open(os.path.join(tmp_path, _IDS_FILE), "w") as f:
+        json.dump(list(ids), f)
+    with open(os.path.join(tmp_path, _META_FILE), "w") as f:
+        json.dump({"n_docs": n_docs, "avgdl": avgdl, "k1": k1, "b": b, "terms": len(vocab), "postings": offset}, f)
+
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    logger.info(f"BM25 index written to {path}: {len(vocab)} terms, {offset} postings")
+
+
+class LexicalIndex:
+    """
+    Read side of the BM25 index. Posting arrays are memory-mapped, so
+    loading is cheap and only pages touched by query terms are read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # taken before reading, so a rebuild that lands mid-load is seen as stale
+        self.loaded_from = self.disk_fingerprint(path)
+
+        self.doc_postings = np.load(os.path.join(path, _DOCS_FILE), mmap_mode="r")
+        self.weight_postings = np.load(os.path.join(path, _WEIGHTS_FILE), mmap_mode="r")
+
+        with open(os.path.join(path, _VOCAB_FILE), "r") as f:
+            self.vocab = json.load(f)
+        with open(os.path.join(path, _IDS_FILE), "r") as f:
+            self.doc_ids = json.load(f)
+        with open(os.path.join(path, _META_FILE), "r") as f:
+            self.meta = json.load(f)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, _META_FILE))
+
+    @staticmethod
+    def disk_fingerprint(path: str):
+        """Identifies the index files at `path`; a rebuild swaps in a new directory, so it changes."""
+        try:
+            stat = os.stat(os.path.join(path, _META_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def is_stale(self) -> bool:
+        """True once the index at `path` was rebuilt after this one was loaded."""
+        on_disk = self.disk_fingerprint(self.path)
+        return on_disk is not None and on_disk != self.loaded_from
+
+    def search(self, query: str, k: int) -> list:
+        """Returns up to k (chunk_id, bm25_score) pairs, best first."""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        matched = False
+
+        for term in set(tokenize(query)):
+            entry = self.vocab.get(term)
+            if entry is None:
+                continue
+
+            offset, length = entry
+            docs = self.doc_postings[offset:offset + length]
+            weights = self.weight_postings[offset:offset + length]
+
+            # each doc appears once per term, so fancy-index add is safe
+            scores[docs] += weights
+            matched = True
+
+        if not matched:
+            return []
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(self.doc_ids[i], float(scores[i])) for i in top]
@@ -1,10 +1,41 @@
+import re
 import time
-from langchain_ollama import ChatOllama
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+
 from langchain_core.prompts import ChatPromptTemplate
 
-from src.pipelines.retrieval import get_retriever
+from configs import cache_config, rag_config, scheduler_config
+from src.pipelines.answer_cache import AnswerCache, normalize_question
+from src.pipelines.generation_scheduler import GenerationScheduler
+from src.pipelines.context_packing import pack_context
+from src.pipelines.history import format_history, window_messages
+from src.pipelines.single_flight import AsyncSingleFlight, AsyncStreamFlight, SingleFlight, StreamFlight
+from src.pipelines.embeddings import get_embeddings
+from src.pipelines.retrieval import (
+    rerank_settings,
+    retrieve_reranked,
+    aretrieve_reranked,
+    embed_question,
+    get_collection_fingerprint,
+)
+from src.utils import stream_protocol
+from src.utils.lazy import LazyImport
 from src.utils.logger import logger
-from src.utils.exceptions import RAGError
+from src.utils.metrics import REGISTRY, StreamTimer, observe_stage, span
+from src.utils.exceptions import AdmissionError, RAGError
+
+# the Ollama client is imported by get_llm(), not at import time
+ChatOllama = LazyImport("langchain_ollama", "ChatOllama")
+
+GATED_REFUSALS = REGISTRY.counter(
+    "rag_gated_refusals_total",
+    "Questions answered with the standard refusal without calling the LLM",
+    ("mode",),
+)
+
+# the refusal both prompts ask the model to give
+REFUSAL_ANSWER = "I cannot answer this based on the provided medical reference."
 
 
 RAG_PROMPT = """
@@ -42,8 +73,9 @@ def get_llm():
         logger.info("Initializing Ollama LLM (one-time)...")
 
         _llm = ChatOllama(
-            model="mistral",
-            temperature=0.1
+            model=rag_config.LLM_MODEL,
+            temperature=rag_config.LLM_TEMPERATURE,
+            keep_alive=rag_config.LLM_KEEP_ALIVE,
         )
 
         logger.info("Ollama LLM initialized and cached")
@@ -51,111 +83,664 @@ def get_llm():
     return _llm
 
 
-def build_rag_answer(question: str, k: int = 4):
-    try:
-        retriever = get_retriever(k=k)
+def preload_llm():
+    """
+    Loads the model into Ollama memory with a one-token generation, so the
+    first real request skips the model load. Ollama keeps it resident for
+    LLM_KEEP_ALIVE. Bypasses the scheduler: it runs before any traffic.
+    """
+    get_llm().invoke("Hi", options={"num_predict": 1})
 
-        t1 = time.time()
-        docs = retriever.invoke(question)
-        retrieval_time = round(time.time() - t1, 3)
 
-        logger.info(f"Retrieved {len(docs)} docs in {retrieval_time}s")
+_answer_cache = None
 
-        # ---- CONTEXT CONTROL CONFIG ----
-        MAX_CONTEXT_CHARS = 4000        # hard upper bound sent to LLM
-        MAX_CHARS_PER_DOC = 1000        # cap per document
 
-        context_text = ""
-        sources = []
-        previews = []
+def get_answer_cache():
+    global _answer_cache
 
-        for doc in docs:
-            # Stop if context is already large enough
-            if len(context_text) >= MAX_CONTEXT_CHARS:
-                break
+    if _answer_cache is None and cache_config.ANSWER_CACHE_ENABLED:
+        logger.info("Initializing answer cache (one-time)...")
 
-            page = doc.metadata.get("page", "unknown")
-            src = doc.metadata.get("source", "unknown")
+        _answer_cache = AnswerCache(
+            max_entries=cache_config.ANSWER_CACHE_MAX_ENTRIES,
+            max_bytes=cache_config.ANSWER_CACHE_MAX_BYTES,
+            ttl_seconds=cache_config.ANSWER_CACHE_TTL_SECONDS,
+            similarity_threshold=cache_config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            embed_fn=embed_question,
+            version_fn=get_collection_fingerprint,
+            version_check_seconds=cache_config.ANSWER_CACHE_VERSION_CHECK_SECONDS,
+        )
 
-            sources.append({"source": src, "page": page})
-            previews.append(doc.page_content[:250])
+    return _answer_cache
 
-            # Truncate document content safely
-            truncated_content = doc.page_content[:MAX_CHARS_PER_DOC]
 
-            context_text += f"\n\n[Page {page}] {truncated_content}"
+_scheduler = None
 
-        prompt = ChatPromptTemplate.from_template(RAG_PROMPT)
-        llm = get_llm()
 
-        chain = prompt | llm
+def get_scheduler():
+    """Shared admission control for every LLM call; None when disabled."""
+    global _scheduler
 
-        t2 = time.time()
-        answer = chain.invoke(
-            {
-                "question": question,
-                "context": context_text
-            }
+    if _scheduler is None and scheduler_config.LLM_SCHEDULER_ENABLED:
+        logger.info(
+            f"Initializing LLM scheduler (one-time): {scheduler_config.LLM_MAX_CONCURRENCY} slots, "
+            f"queue of {scheduler_config.LLM_MAX_QUEUE}"
         )
-        generation_time = round(time.time() - t2, 3)
+        _scheduler = GenerationScheduler()
 
-        total_time = retrieval_time + generation_time
+    return _scheduler
 
-        return {
-            "answer": answer.content,
+
+@contextmanager
+def _generation_slot(priority: str):
+    scheduler = get_scheduler()
+    if scheduler is None:
+        yield
+        return
+
+    with scheduler.slot(priority):
+        yield
+
+
+@asynccontextmanager
+async def _ageneration_slot(priority: str):
+    scheduler = get_scheduler()
+    if scheduler is None:
+        yield
+        return
+
+    async with scheduler.aslot(priority):
+        yield
+
+
+def _lookup_cached_answer(question: str, scope):
+    cache = get_answer_cache()
+    if cache is None:
+        return None
+
+    try:
+        t1 = time.perf_counter()
+        hit = cache.get(question, scope)
+        lookup_time = time.perf_counter() - t1
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        return None
+
+    return _cached_result(hit, lookup_time)
+
+
+async def _aquery_vector(question: str):
+    """
+    The question's embedding for the answer cache, embedded natively async
+    (and shared with retrieval through the embedding LRU); None when the
+    cache is off or embedding fails, leaving the exact tier only.
+    """
+    if get_answer_cache() is None:
+        return None
+
+    try:
+        return await get_embeddings().aembed_query(question)
+    except Exception as e:
+        logger.warning(f"Answer cache embedding failed: {e}")
+        return None
+
+
+async def _alookup_cached_answer(question: str, scope, query_vec):
+    cache = get_answer_cache()
+    if cache is None:
+        return None
+
+    try:
+        t1 = time.perf_counter()
+        hit = await cache.aget(question, scope, query_vec)
+        lookup_time = time.perf_counter() - t1
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        return None
+
+    return _cached_result(hit, lookup_time)
+
+
+def _cached_result(hit, lookup_time: float):
+    observe_stage("answer_cache", lookup_time)
+    lookup_time = round(lookup_time, 3)
+
+    if hit is None:
+        return None
+
+    result, tier, similarity = hit
+    logger.info(f"Answer cache {tier} hit (similarity={similarity:.3f}) in {lookup_time}s")
+
+    return {
+        **result,
+        "cache_hit": tier,
+        "timing": {
+            "retrieval_time": 0.0,
+            "generation_time": 0.0,
+            "total_time": lookup_time
+        }
+    }
+
+
+def _cache_scope(k: int, token_budget: int = None, rerank: str = None, fetch_k: int = None):
+    # answers depend on which chunks were picked and how many of them fit the
+    # context, so reranked answers and other budgets are cached apart
+    mode, fetch_k = rerank_settings(k, rerank, fetch_k)
+    token_budget = token_budget or rag_config.CONTEXT_TOKEN_BUDGET
+    return (k, token_budget) if mode == "none" else (k, token_budget, mode, fetch_k)
+
+
+def _store_answer(question: str, scope, answer: str, sources: list, previews: list):
+    cache = get_answer_cache()
+    if cache is None:
+        return
+
+    try:
+        cache.put(question, scope, {
+            "answer": answer,
             "sources": sources,
             "retrieval_preview": previews,
-            "timing": {
-                "retrieval_time": retrieval_time,
-                "generation_time": generation_time,
-                "total_time": round(total_time, 3)
-            }
+        })
+    except Exception as e:
+        logger.warning(f"Answer cache store failed: {e}")
+
+
+async def _astore_answer(question: str, scope, query_vec, answer: str, sources: list, previews: list):
+    cache = get_answer_cache()
+    if cache is None:
+        return
+
+    try:
+        await cache.aput(question, scope, {
+            "answer": answer,
+            "sources": sources,
+            "retrieval_preview": previews,
+        }, query_vec)
+    except Exception as e:
+        logger.warning(f"Answer cache store failed: {e}")
+
+
+def _replay_answer(answer: str):
+    # re-chunk a cached answer word by word so clients see the same stream shape
+    for match in re.finditer(r"\S+\s*|\s+", answer):
+        yield match.group(0)
+
+
+def _pack_context(docs, token_budget: int = None, tag: str = ""):
+    with span("pack"):
+        context = pack_context(docs, token_budget=token_budget)
+
+    logger.info(
+        f"{tag}Packed {context.input_docs} docs into {context.passages} passages, "
+        f"{context.tokens}/{context.token_budget} tokens"
+    )
+    return context
+
+
+@lru_cache(maxsize=None)
+def _prompt_template(template: str) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_template(template)
+
+
+def _render_prompt(template: str, **inputs) -> list:
+    # formatted here rather than inside a prompt | llm chain so prompt
+    # build time is measured apart from the model call
+    with span("prompt"):
+        return _prompt_template(template).format_messages(**inputs)
+
+
+def _format_history(history: list, summary: str = "") -> str:
+    # only the last window of turns is ever sent; older turns live in the summary
+    return format_history(history[-window_messages():], summary)
+
+
+def _stream_footer(
+    sources: list,
+    retrieval_time: float,
+    generation_time: float,
+    total: float = None,
+    cache_hit=None,
+    rerank: dict = None,
+    ttft: float = None,
+    gated: bool = False,
+):
+    yield stream_protocol.sources_event(sources)
+    yield stream_protocol.timing_event(retrieval_time, generation_time, total, ttft)
+
+    fields = {"cache_hit": cache_hit, "rerank": rerank}
+    if gated:
+        fields["gated"] = True
+    yield stream_protocol.done_event(**fields)
+
+
+def _rag_result(answer: str, context, retrieval_time: float, generation_time: float, reranked=None):
+    total_time = retrieval_time + generation_time
+
+    return {
+        "answer": answer,
+        "sources": context.sources,
+        "retrieval_preview": context.previews,
+        "context_tokens": context.tokens,
+        "rerank": reranked.stats() if reranked is not None else None,
+        "cache_hit": None,
+        "timing": {
+            "retrieval_time": retrieval_time,
+            "generation_time": generation_time,
+            "total_time": round(total_time, 3)
         }
+    }
+
+
+# -----------------------------------
+# REFUSAL GATE
+# -----------------------------------
+def gate_refuses(top_score) -> bool:
+    """True when the best retrieval score is too weak to answer from; never without a score."""
+    return top_score is not None and top_score < rag_config.REFUSAL_GATE_MIN_SCORE
+
+
+def _gated(reranked, mode: str, enabled: bool = None) -> bool:
+    if enabled is None:
+        enabled = rag_config.REFUSAL_GATE_ENABLED and (mode != "chat" or rag_config.REFUSAL_GATE_CHAT)
+
+    if not enabled or not gate_refuses(reranked.top_score):
+        return False
+
+    GATED_REFUSALS.inc(mode)
+    logger.info(
+        f"[GATE] Best retrieval score {reranked.top_score:.3f} < {rag_config.REFUSAL_GATE_MIN_SCORE}, "
+        f"refusing without the LLM"
+    )
+    return True
+
+
+def _gated_result(reranked, retrieval_time: float) -> dict:
+    return {
+        "answer": REFUSAL_ANSWER,
+        "sources": [],
+        "retrieval_preview": [],
+        "context_tokens": 0,
+        "rerank": reranked.stats(),
+        "cache_hit": None,
+        "gated": True,
+        "timing": {
+            "retrieval_time": retrieval_time,
+            "generation_time": 0.0,
+            "total_time": retrieval_time
+        }
+    }
+
+
+def _gated_events(reranked, retrieval_time: float):
+    for piece in _replay_answer(REFUSAL_ANSWER):
+        yield stream_protocol.token_event(piece)
+    yield from _stream_footer([], retrieval_time, 0.0, rerank=reranked.stats(), gated=True)
+
+
+# -----------------------------------
+# IN-FLIGHT COALESCING
+# -----------------------------------
+_answer_flight = SingleFlight("answer")
+_aanswer_flight = AsyncSingleFlight("answer")
+_stream_flight = StreamFlight("stream")
+_astream_flight = AsyncStreamFlight("stream")
+
+
+def _flight_key(question: str, k: int, token_budget: int, rerank: str, fetch_k: int):
+    # same normalisation as the answer cache, so a coalesced answer is the
+    # one the cache would have returned a moment later
+    return normalize_question(question), _cache_scope(k, token_budget, rerank, fetch_k)
+
+
+def _coalesce(use_cache: bool) -> bool:
+    # callers that bypass the cache asked for a fresh generation
+    return use_cache and cache_config.SINGLE_FLIGHT_ENABLED
+
+
+def _mark_joined(event: dict) -> dict:
+    if event["type"] == stream_protocol.DONE:
+        return {**event, "coalesced": True}
+    return event
+
+
+def _build_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+    include_docs: bool = False,
+    refusal_gate: bool = None,
+):
+    try:
+        cache_scope = _cache_scope(k, token_budget, rerank, fetch_k)
+
+        if use_cache and not include_docs:
+            cached = _lookup_cached_answer(question, cache_scope)
+            if cached is not None:
+                return cached
+
+        t1 = time.perf_counter()
+        reranked = retrieve_reranked(question, k=k, rerank_mode=rerank, fetch_k=fetch_k)
+        docs = reranked.docs
+        retrieval_time = round(time.perf_counter() - t1, 3)
+
+        logger.info(f"Retrieved {len(docs)} docs in {retrieval_time}s")
+
+        if _gated(reranked, "rag", refusal_gate):
+            result = _gated_result(reranked, retrieval_time)
+            if include_docs:
+                result["documents"] = docs
+            return result
+
+        context = _pack_context(docs, token_budget)
+
+        messages = _render_prompt(RAG_PROMPT, question=question, context=context.text)
+        llm = get_llm()
+
+        with _generation_slot(priority), span("generate"):
+            t2 = time.perf_counter()
+            answer = llm.invoke(messages)
+            generation_time = round(time.perf_counter() - t2, 3)
+
+        if use_cache:
+            _store_answer(question, cache_scope, answer.content, context.sources, context.previews)
+
+        result = _rag_result(answer.content, context, retrieval_time, generation_time, reranked)
+        if include_docs:
+            result["documents"] = docs
+        return result
+
+    except AdmissionError:
+        raise
 
     except Exception as e:
         logger.error(f"RAG failure: {str(e)}")
         raise RAGError("RAG execution failed")
 
-    
-def stream_rag_answer(question: str, k: int = 4):
+
+async def _abuild_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+):
     try:
-        retriever = get_retriever(k=k)
+        cache_scope = _cache_scope(k, token_budget, rerank, fetch_k)
 
-        t1 = time.time()
-        docs = retriever.invoke(question)
-        retrieval_time = round(time.time() - t1, 3)
+        query_vec = await _aquery_vector(question) if use_cache else None
+        if use_cache:
+            cached = await _alookup_cached_answer(question, cache_scope, query_vec)
+            if cached is not None:
+                return cached
 
-        logger.info(f"[STREAM] Retrieved {len(docs)} docs in {retrieval_time}s")
+        t1 = time.perf_counter()
+        reranked = await aretrieve_reranked(question, k=k, rerank_mode=rerank, fetch_k=fetch_k)
+        docs = reranked.docs
+        retrieval_time = round(time.perf_counter() - t1, 3)
 
-        context_text = ""
-        sources = []
+        logger.info(f"Retrieved {len(docs)} docs in {retrieval_time}s")
 
-        for doc in docs:
-            page = doc.metadata.get("page", "unknown")
-            src = doc.metadata.get("source", "unknown")
+        if _gated(reranked, "rag"):
+            return _gated_result(reranked, retrieval_time)
 
-            sources.append({"source": src, "page": page})
-            context_text += f"\n\n[Page {page}] {doc.page_content}"
+        context = _pack_context(docs, token_budget)
 
-        prompt = ChatPromptTemplate.from_template(RAG_PROMPT)
+        messages = _render_prompt(RAG_PROMPT, question=question, context=context.text)
         llm = get_llm()
 
-        chain = prompt | llm
+        async with _ageneration_slot(priority):
+            with span("generate"):
+                t2 = time.perf_counter()
+                answer = await llm.ainvoke(messages)
+                generation_time = round(time.perf_counter() - t2, 3)
 
-        # Streaming begins
-        t2 = time.time()
-        for chunk in chain.stream({"question": question, "context": context_text}):
-            yield chunk.content
+        if use_cache:
+            await _astore_answer(question, cache_scope, query_vec, answer.content, context.sources, context.previews)
 
-        generation_time = round(time.time() - t2, 3)
-        total = retrieval_time + generation_time
+        return _rag_result(answer.content, context, retrieval_time, generation_time, reranked)
 
-        yield f"\n\n[SOURCES]: {sources}"
-        yield f"\n[TIMING]: retrieval={retrieval_time}s, llm={generation_time}s, total={total}s"
+    except AdmissionError:
+        raise
+
+    except Exception as e:
+        logger.error(f"Async RAG failure: {str(e)}")
+        raise RAGError("RAG execution failed")
+
+
+def _stream_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+):
+    try:
+        cache_scope = _cache_scope(k, token_budget, rerank, fetch_k)
+
+        if use_cache:
+            cached = _lookup_cached_answer(question, cache_scope)
+            if cached is not None:
+                for piece in _replay_answer(cached["answer"]):
+                    yield stream_protocol.token_event(piece)
+
+                timing = cached["timing"]
+                yield from _stream_footer(
+                    cached["sources"], timing["retrieval_time"], timing["generation_time"], timing["total_time"],
+                    cache_hit=cached["cache_hit"],
+                )
+                return
+
+        t1 = time.perf_counter()
+        reranked = retrieve_reranked(question, k=k, rerank_mode=rerank, fetch_k=fetch_k)
+        docs = reranked.docs
+        retrieval_time = round(time.perf_counter() - t1, 3)
+
+        logger.info(f"[STREAM] Retrieved {len(docs)} docs in {retrieval_time}s")
+
+        if _gated(reranked, "rag"):
+            yield from _gated_events(reranked, retrieval_time)
+            return
+
+        context = _pack_context(docs, token_budget, "[STREAM] ")
+
+        messages = _render_prompt(RAG_PROMPT, question=question, context=context.text)
+        llm = get_llm()
+
+        with _generation_slot(priority):
+            timer = StreamTimer()
+            answer_parts = []
+            for chunk in llm.stream(messages):
+                timer.tick()
+                answer_parts.append(chunk.content)
+                yield stream_protocol.token_event(chunk.content)
+            generation_time = round(timer.finish(), 3)
+
+        if use_cache:
+            _store_answer(question, cache_scope, "".join(answer_parts), context.sources, context.previews)
+
+        yield from _stream_footer(
+            context.sources, retrieval_time, generation_time, rerank=reranked.stats(), ttft=timer.ttft,
+        )
+
+    except AdmissionError:
+        raise
 
     except Exception as e:
         logger.error(f"Streaming RAG failed: {str(e)}")
-        yield "Streaming failed due to an internal error."
+        yield stream_protocol.error_event("Streaming failed due to an internal error.")
+
+
+async def _astream_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+):
+    try:
+        cache_scope = _cache_scope(k, token_budget, rerank, fetch_k)
+
+        query_vec = await _aquery_vector(question) if use_cache else None
+        if use_cache:
+            cached = await _alookup_cached_answer(question, cache_scope, query_vec)
+            if cached is not None:
+                for piece in _replay_answer(cached["answer"]):
+                    yield stream_protocol.token_event(piece)
+
+                timing = cached["timing"]
+                for event in _stream_footer(
+                    cached["sources"], timing["retrieval_time"], timing["generation_time"], timing["total_time"],
+                    cache_hit=cached["cache_hit"],
+                ):
+                    yield event
+                return
+
+        t1 = time.perf_counter()
+        reranked = await aretrieve_reranked(question, k=k, rerank_mode=rerank, fetch_k=fetch_k)
+        docs = reranked.docs
+        retrieval_time = round(time.perf_counter() - t1, 3)
+
+        logger.info(f"[STREAM] Retrieved {len(docs)} docs in {retrieval_time}s")
+
+        if _gated(reranked, "rag"):
+            for event in _gated_events(reranked, retrieval_time):
+                yield event
+            return
+
+        context = _pack_context(docs, token_budget, "[STREAM] ")
+
+        messages = _render_prompt(RAG_PROMPT, question=question, context=context.text)
+        llm = get_llm()
+
+        async with _ageneration_slot(priority):
+            timer = StreamTimer()
+            answer_parts = []
+            async for chunk in llm.astream(messages):
+                timer.tick()
+                answer_parts.append(chunk.content)
+                yield stream_protocol.token_event(chunk.content)
+            generation_time = round(timer.finish(), 3)
+
+        if use_cache:
+            await _astore_answer(question, cache_scope, query_vec, "".join(answer_parts), context.sources, context.previews)
+
+        for event in _stream_footer(
+            context.sources, retrieval_time, generation_time, rerank=reranked.stats(), ttft=timer.ttft,
+        ):
+            yield event
+
+    except AdmissionError:
+        raise
+
+    except Exception as e:
+        logger.error(f"Async streaming RAG failed: {str(e)}")
+        yield stream_protocol.error_event("Streaming failed due to an internal error.")
+
+
+def build_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+    include_docs: bool = False,
+    refusal_gate: bool = None,
+):
+    """
+    Concurrent calls for the same question share one retrieval and
+    generation. `include_docs` adds the retrieved Documents under
+    "documents" (not JSON-serialisable; for in-process callers such as the
+    evaluator); cached answers carry no documents, so it also skips the
+    cache lookup and coalescing. `refusal_gate` overrides
+    REFUSAL_GATE_ENABLED (the evaluator turns it off to compare the gate
+    with the LLM's own refusals).
+    """
+    def run():
+        return _build_rag_answer(
+            question, k, use_cache, token_budget, rerank, fetch_k, priority, include_docs, refusal_gate
+        )
+
+    if include_docs or refusal_gate is not None or not _coalesce(use_cache):
+        return run()
+
+    result, shared = _answer_flight.do(_flight_key(question, k, token_budget, rerank, fetch_k), run)
+    return {**result, "coalesced": True} if shared else result
+
+
+async def abuild_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+):
+    def run():
+        return _abuild_rag_answer(question, k, use_cache, token_budget, rerank, fetch_k, priority)
+
+    if not _coalesce(use_cache):
+        return await run()
+
+    result, shared = await _aanswer_flight.do(_flight_key(question, k, token_budget, rerank, fetch_k), run)
+    return {**result, "coalesced": True} if shared else result
+
+
+def stream_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+):
+    """
+    Concurrent streams for the same question share one generation; a late
+    joiner first receives the tokens already produced, then the live rest.
+    """
+    def run():
+        return _stream_rag_answer(question, k, use_cache, token_budget, rerank, fetch_k, priority)
+
+    if not _coalesce(use_cache):
+        yield from run()
+        return
+
+    yield from _stream_flight.stream(_flight_key(question, k, token_budget, rerank, fetch_k), run, _mark_joined)
+
+
+async def astream_rag_answer(
+    question: str,
+    k: int = 4,
+    use_cache: bool = True,
+    token_budget: int = None,
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "standard",
+):
+    def run():
+        return _astream_rag_answer(question, k, use_cache, token_budget, rerank, fetch_k, priority)
+
+    if not _coalesce(use_cache):
+        events = run()
+    else:
+        events = _astream_flight.stream(_flight_key(question, k, token_budget, rerank, fetch_k), run, _mark_joined)
+
+    async for event in events:
+        yield event
+
 
 CHAT_PROMPT = """
 You are a highly reliable and cautious Medical AI Assistant.
@@ -184,51 +769,95 @@ Medical Context:
 Answer:
 """
 
-def build_chat_answer(question: str, history: list, k: int = 4):
-    try:
-        retriever = get_retriever(k=k)
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and a
+Medical AI Assistant.
 
-        t1 = time.time()
-        docs = retriever.invoke(question)
-        retrieval_time = round(time.time() - t1, 3)
+Update the summary with the new messages below. Keep the medical topics,
+facts the user shared about themselves, and any open questions. Drop
+greetings and repetition. Use at most {max_words} words.
 
-        logger.info(f"[CHAT] Retrieved {len(docs)} docs in {retrieval_time}s")
+Current Summary:
+{summary}
 
-        context_text = ""
-        sources = []
-        previews = []
+New Messages:
+{messages}
 
-        for doc in docs:
-            page = doc.metadata.get("page", "unknown")
-            src = doc.metadata.get("source", "unknown")
+Updated Summary:
+"""
 
-            sources.append({"source": src, "page": page})
-            previews.append(doc.page_content[:250])
-            context_text += f"\n\n[Page {page}] {doc.page_content}"
 
-        history_text = ""
-        for turn in history:
-            history_text += f"\n{turn['role'].upper()}: {turn['message']}"
+def _summary_inputs(previous_summary: str, turns: list) -> dict:
+    return {
+        "summary": previous_summary or "(none)",
+        "messages": "".join(f"\n{turn['role'].upper()}: {turn['message']}" for turn in turns),
+        "max_words": rag_config.HISTORY_SUMMARY_MAX_WORDS,
+    }
 
-        prompt = ChatPromptTemplate.from_template(CHAT_PROMPT)
-        llm = get_llm()
 
-        chain = prompt | llm
+def _cap_summary(text: str) -> str:
+    # hard cap, with slack, in case the model ignores the word limit
+    words = text.strip().split()
+    return " ".join(words[:rag_config.HISTORY_SUMMARY_MAX_WORDS * 2])
 
-        t2 = time.time()
-        response = chain.invoke({
-            "history": history_text,
-            "question": question,
-            "context": context_text
-        })
 
-        generation_time = round(time.time() - t2, 3)
+def summarize_history(previous_summary: str, turns: list) -> str:
+    """Folds `turns` into the rolling conversation summary (LLM call)."""
+    chain = _prompt_template(SUMMARY_PROMPT) | get_llm()
+
+    with _generation_slot("batch"), span("summarize"):
+        response = chain.invoke(_summary_inputs(previous_summary, turns))
+    return _cap_summary(response.content)
+
+
+async def asummarize_history(previous_summary: str, turns: list) -> str:
+    chain = _prompt_template(SUMMARY_PROMPT) | get_llm()
+
+    async with _ageneration_slot("batch"):
+        with span("summarize"):
+            response = await chain.ainvoke(_summary_inputs(previous_summary, turns))
+    return _cap_summary(response.content)
+
+
+def build_chat_answer(
+    question: str,
+    history: list,
+    k: int = 4,
+    token_budget: int = None,
+    summary: str = "",
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "interactive",
+):
+    try:
+        t1 = time.perf_counter()
+        reranked = retrieve_reranked(question, k=k, rerank_mode=rerank, fetch_k=fetch_k)
+        docs = reranked.docs
+        retrieval_time = round(time.perf_counter() - t1, 3)
+
+        logger.info(f"[CHAT] Retrieved {len(docs)} docs in {retrieval_time}s")
+
+        if _gated(reranked, "chat"):
+            return _gated_result(reranked, retrieval_time)
+
+        context = _pack_context(docs, token_budget, "[CHAT] ")
+        history_text = _format_history(history, summary)
+
+        messages = _render_prompt(CHAT_PROMPT, history=history_text, question=question, context=context.text)
+        llm = get_llm()
+
+        with _generation_slot(priority), span("generate"):
+            t2 = time.perf_counter()
+            response = llm.invoke(messages)
+            generation_time = round(time.perf_counter() - t2, 3)
         total = retrieval_time + generation_time
 
         return {
             "answer": response.content,
-            "sources": sources,
-            "retrieval_preview": previews,
+            "sources": context.sources,
+            "retrieval_preview": context.previews,
+            "context_tokens": context.tokens,
+            "rerank": reranked.stats(),
             "timing": {
                 "retrieval_time": retrieval_time,
                 "generation_time": generation_time,
@@ -236,73 +865,121 @@ def build_chat_answer(question: str, history: list, k: int = 4):
             }
         }
 
+    except AdmissionError:
+        raise
+
     except Exception as e:
         logger.error(f"Chat RAG failed: {str(e)}")
         raise RAGError("Chat mode RAG failed")
     
-def stream_chat_answer(question: str, history: list, k: int = 4):
+def stream_chat_answer(
+    question: str,
+    history: list,
+    k: int = 4,
+    token_budget: int = None,
+    summary: str = "",
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "interactive",
+):
     """
     Streaming conversational RAG.
-    Yields ONLY plain text + tagged metadata.
-    NEVER returns dict or JSON.
+    Yields stream_protocol events: token*, then sources, timing and done,
+    or a single error event.
     """
 
     try:
-        retriever = get_retriever(k=k)
+        t1 = time.perf_counter()
+        reranked = retrieve_reranked(question, k=k, rerank_mode=rerank, fetch_k=fetch_k)
+        docs = reranked.docs
+        retrieval_time = round(time.perf_counter() - t1, 3)
 
-        t1 = time.time()
-        docs = retriever.invoke(question)
-        retrieval_time = round(time.time() - t1, 3)
+        if _gated(reranked, "chat"):
+            yield from _gated_events(reranked, retrieval_time)
+            return
 
-        context_text = ""
-        sources = []
+        context = _pack_context(docs, token_budget, "[CHAT] ")
+        history_text = _format_history(history, summary)
 
-        for doc in docs:
-            page = doc.metadata.get("page", "unknown")
-            src = doc.metadata.get("source", "unknown")
+        messages = _render_prompt(CHAT_PROMPT, history=history_text, question=question, context=context.text)
+        llm = get_llm()
+
+        with _generation_slot(priority):
+            timer = StreamTimer()
+            for chunk in llm.stream(messages):
+                timer.tick()
+                yield stream_protocol.token_event(chunk.content)
+            generation_time = round(timer.finish(), 3)
 
-            sources.append({"source": src, "page": page})
-            context_text += f"\n\n[Page {page}] {doc.page_content}"
+        yield from _stream_footer(
+            context.sources, retrieval_time, generation_time, rerank=reranked.stats(), ttft=timer.ttft,
+        )
 
-        prompt = ChatPromptTemplate.from_template(RAG_PROMPT)
+    except AdmissionError:
+        raise
+
+    except Exception as e:
+        logger.error(f"stream_chat_answer failed: {e}")
+        yield stream_protocol.error_event("Chat streaming failed.")
+
+
+async def astream_chat_answer(
+    question: str,
+    history: list,
+    k: int = 4,
+    token_budget: int = None,
+    summary: str = "",
+    rerank: str = None,
+    fetch_k: int = None,
+    priority: str = "interactive",
+    on_answer=None,
+):
+    """
+    Async streaming conversational RAG.
+    Same output contract as stream_chat_answer. `on_answer` receives the
+    full answer text (without the footer) once generation succeeds.
+    """
+
+    try:
+        t1 = time.perf_counter()
+        reranked = await aretrieve_reranked(question, k=k, rerank_mode=rerank, fetch_k=fetch_k)
+        docs = reranked.docs
+        retrieval_time = round(time.perf_counter() - t1, 3)
+
+        if _gated(reranked, "chat"):
+            # stored like any other turn, as if the LLM had refused
+            if on_answer is not None:
+                on_answer(REFUSAL_ANSWER)
+            for event in _gated_events(reranked, retrieval_time):
+                yield event
+            return
+
+        context = _pack_context(docs, token_budget, "[CHAT] ")
+        history_text = _format_history(history, summary)
+
+        messages = _render_prompt(CHAT_PROMPT, history=history_text, question=question, context=context.text)
         llm = get_llm()
 
-        chain = prompt | llm
+        async with _ageneration_slot(priority):
+            timer = StreamTimer()
+            answer_parts = []
+            async for chunk in llm.astream(messages):
+                timer.tick()
+                answer_parts.append(chunk.content)
+                yield stream_protocol.token_event(chunk.content)
+            generation_time = round(timer.finish(), 3)
 
-        t2 = time.time()
-        for chunk in chain.stream(
-            {
-                "question": question,
-                "context": context_text,
-                "history": history,
-            }
+        if on_answer is not None:
+            on_answer("".join(answer_parts))
+
+        for event in _stream_footer(
+            context.sources, retrieval_time, generation_time, rerank=reranked.stats(), ttft=timer.ttft,
         ):
-            yield chunk.content
-
-        generation_time = round(time.time() - t2, 3)
-        total_time = retrieval_time + generation_time
-
-        # -----------------------------
-        # SOURCES (HUMAN READABLE)
-        # -----------------------------
-        yield "\n\n[SOURCES]\n"
-        seen = set()
-        for src in sources:
-            filename = src["source"].split("/")[-1]
-            page = src["page"]
-            key = (filename, page)
-            if key not in seen:
-                seen.add(key)
-                yield f"{filename}, Page {page}\n"
-
-        # -----------------------------
-        # TIMING (HUMAN READABLE)
-        # -----------------------------
-        yield "\n[TIMING]\n"
-        yield f"Retriever time: {round(retrieval_time, 2)} seconds\n"
-        yield f"LLM generation time: {round(generation_time, 2)} seconds\n"
-        yield f"Total response time: {round(total_time, 2)} seconds\n"
+            yield event
+
+    except AdmissionError:
+        raise
 
     except Exception as e:
-        logger.error(f"stream_chat_answer failed: {e}")
-        yield "\n\n[ERROR] Chat streaming failed."
\ No newline at end of file
+        logger.error(f"astream_chat_answer failed: {e}")
+        yield stream_protocol.error_event("Chat streaming failed.")
@@ -0,0 +1,135 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from configs import retrieval_config
+from src.utils.logger import logger
+
+
+RERANK_MODES = ("none", "mmr", "cross_encoder")
+
+
+@dataclass
+class RerankResult:
+    docs: list
+    mode: str
+    candidates: int
+    rerank_time: float = 0.0
+    # best relevance score among the candidates (None when the search gave no scores)
+    top_score: float = None
+
+    def stats(self) -> dict:
+        stats = {
+            "mode": self.mode,
+            "candidates": self.candidates,
+            "selected": len(self.docs),
+            "rerank_time": self.rerank_time,
+        }
+        if self.top_score is not None:
+            stats["top_score"] = round(self.top_score, 3)
+        return stats
+
+
+def mmr_select(query_vector, doc_vectors, k: int, lambda_mult: float = None) -> list:
+    """
+    Maximal marginal relevance over unit vectors: each pick maximises
+    lambda * sim(query, doc) - (1 - lambda) * max sim(doc, already picked).
+    Returns the picked row indices in pick order.
+    """
+    if lambda_mult is None:
+        lambda_mult = retrieval_config.MMR_LAMBDA
+
+    docs = np.asarray(doc_vectors, dtype=np.float32)
+    if len(docs) == 0:
+        return []
+
+    docs = docs / np.maximum(np.linalg.norm(docs, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = docs @ query
+    pairwise = docs @ docs.T
+
+    selected = [int(np.argmax(relevance))]
+    max_redundancy = pairwise[selected[0]].copy()
+
+    while len(selected) < min(k, len(docs)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_redundancy
+        scores[selected] = -np.inf
+
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        np.maximum(max_redundancy, pairwise[pick], out=max_redundancy)
+
+    return selected
+
+
+# -----------------------------------
+# OPTIONAL CROSS-ENCODER
+# -----------------------------------
+_cross_encoder = None
+_cross_encoder_failed = False
+_cross_encoder_lock = threading.Lock()
+
+
+def get_cross_encoder():
+    """Loads CROSS_ENCODER_MODEL once; returns None if sentence-transformers is unavailable."""
+    global _cross_encoder, _cross_encoder_failed
+
+    if _cross_encoder is None and not _cross_encoder_failed:
+        with _cross_encoder_lock:
+            if _cross_encoder is None and not _cross_encoder_failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"Loading cross-encoder {retrieval_config.CROSS_ENCODER_MODEL} (one-time)...")
+                    _cross_encoder = CrossEncoder(retrieval_config.CROSS_ENCODER_MODEL)
+                    logger.info("Cross-encoder loaded and cached")
+
+                except Exception as e:
+                    _cross_encoder_failed = True
+                    logger.warning(f"Cross-encoder unavailable, reranking with MMR instead: {e}")
+
+    return _cross_encoder
+
+
+def cross_encoder_select(question: str, docs: list, k: int, model) -> list:
+    scores = model.predict([(question, doc.page_content) for doc in docs])
+    return [int(i) for i in np.argsort(-np.asarray(scores))[:k]]
+
+
+# -----------------------------------
+# STAGE
+# -----------------------------------
+def rerank(question: str, candidates: list, k: int, mode: str, query_vector_fn, doc_vectors_fn) -> RerankResult:
+    """
+    Picks k of the over-fetched `candidates`. Vectors are only requested
+    for MMR: `query_vector_fn()` and `doc_vectors_fn(candidates)`.
+    """
+    if mode not in RERANK_MODES:
+        raise ValueError(f"Unknown rerank mode: {mode} (expected one of {RERANK_MODES})")
+
+    if mode == "none" or len(candidates) <= 1:
+        return RerankResult(docs=candidates[:k], mode=mode, candidates=len(candidates))
+
+    t1 = time.perf_counter()
+
+    order = None
+    if mode == "cross_encoder":
+        model = get_cross_encoder()
+        if model is not None:
+            order = cross_encoder_select(question, candidates, k, model)
+        else:
+            mode = "mmr"
+
+    if order is None:
+        order = mmr_select(query_vector_fn(), doc_vectors_fn(candidates), k)
+
+    return RerankResult(
+        docs=[candidates[i] for i in order],
+        mode=mode,
+        candidates=len(candidates),
+        rerank_time=round(time.perf_counter() - t1, 4),
+    )
@@ -1,20 +1,134 @@
-from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
+import asyncio
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+
+from configs import retrieval_config
+from src.pipelines.embeddings import get_embeddings
+from src.pipelines.flat_index import FlatVectorStore
+from src.pipelines.hybrid_retriever import HybridRetriever, arelevance_search, relevance_search
+from src.pipelines.lexical_index import LexicalIndex
+from src.pipelines.reranking import rerank
+from src.utils.lazy import LazyImport
 from src.utils.logger import logger
+from src.utils.metrics import span
 
-CHROMA_PATH = "data/chroma_db"
+# chromadb is only imported when the Chroma backend is actually opened
+Chroma = LazyImport("langchain_chroma", "Chroma")
+
+CHROMA_PATH = retrieval_config.CHROMA_PATH
 
 _vectorstore = None
-_retriever = None
+_lexical_index = None
+
+# One retriever per (k, search_type, filter), all sharing _vectorstore
+_retrievers = {}
+_retrievers_lock = threading.Lock()
+_vectorstore_lock = threading.Lock()
+_reload_checked_at = 0.0
+
+
+def _reload_due() -> bool:
+    return (
+        (isinstance(_vectorstore, FlatVectorStore) or _lexical_index is not None)
+        and time.monotonic() - _reload_checked_at >= retrieval_config.FLAT_INDEX_RELOAD_CHECK_SECONDS
+    )
+
+
+def _reload_vectorstore(vectorstore) -> bool:
+    global _vectorstore
+
+    with _vectorstore_lock:
+        if _vectorstore is not vectorstore:
+            return False
+
+        try:
+            _vectorstore = FlatVectorStore.load(vectorstore.path, get_embeddings())
+        except Exception as e:
+            logger.error(f"Flat vector index changed on disk but could not be reloaded: {e}")
+            return False
+
+    logger.info(f"Flat vector index rebuilt on disk, reloaded: {len(_vectorstore.ids)} vectors")
+    return True
+
+
+def _reload_lexical_index(lexical_index) -> bool:
+    global _lexical_index
+
+    try:
+        _lexical_index = LexicalIndex(lexical_index.path)
+    except Exception as e:
+        logger.error(f"BM25 index changed on disk but could not be reloaded: {e}")
+        return False
+
+    logger.info(f"BM25 index rebuilt on disk, reloaded: {_lexical_index.meta['terms']} terms")
+    return True
+
+
+def _reload_if_rebuilt():
+    """
+    Swaps in a flat index or BM25 index rebuilt on disk since it was
+    loaded (a vector rebuild replaces both) and drops the retrievers
+    bound to the old ones, so hybrid search never fuses two corpora; the
+    new fingerprint then invalidates the answer cache. Checked at most
+    every FLAT_INDEX_RELOAD_CHECK_SECONDS. Blocking file IO: async callers
+    go through _areload_if_rebuilt.
+    """
+    global _reload_checked_at
+
+    if not _reload_due():
+        return
+    _reload_checked_at = time.monotonic()
+
+    reloaded = False
+
+    vectorstore = _vectorstore
+    if isinstance(vectorstore, FlatVectorStore) and vectorstore.is_stale():
+        reloaded |= _reload_vectorstore(vectorstore)
+
+    lexical_index = _lexical_index
+    if lexical_index is not None and lexical_index.is_stale():
+        reloaded |= _reload_lexical_index(lexical_index)
+
+    if reloaded:
+        with _retrievers_lock:
+            _retrievers.clear()
+
+
+async def _areload_if_rebuilt():
+    # the stats and a reload (npy files + JSON sidecars) stay off the event
+    # loop; requests keep using the old store until the swap
+    if _reload_due():
+        await asyncio.to_thread(_reload_if_rebuilt)
 
 
 def _load_vectorstore():
     global _vectorstore
 
-    if _vectorstore is None:
-        logger.info("Loading Chroma vector store (one-time)...")
+    if _vectorstore is not None:
+        return _vectorstore
+
+    # the evaluator and reranking threads may race to the first load
+    with _vectorstore_lock:
+        if _vectorstore is not None:
+            return _vectorstore
 
-        embeddings = OllamaEmbeddings(model="mxbai-embed-large")
+        embeddings = get_embeddings()
+
+        if retrieval_config.VECTOR_BACKEND == "flat":
+            if FlatVectorStore.exists(retrieval_config.FLAT_INDEX_PATH):
+                logger.info("Loading flat vector index (one-time)...")
+                _vectorstore = FlatVectorStore.load(retrieval_config.FLAT_INDEX_PATH, embeddings)
+                logger.info(f"Flat vector index loaded: {len(_vectorstore.ids)} vectors")
+                return _vectorstore
+
+            logger.warning("No flat vector index found, falling back to Chroma")
+
+        logger.info("Loading Chroma vector store (one-time)...")
 
         _vectorstore = Chroma(
             persist_directory=CHROMA_PATH,
@@ -26,15 +140,249 @@ def _load_vectorstore():
     return _vectorstore
 
 
-def get_retriever(k: int = 4):
-    global _retriever
+def _load_lexical_index():
+    global _lexical_index
+
+    if _lexical_index is None:
+        if not LexicalIndex.exists(retrieval_config.LEXICAL_INDEX_PATH):
+            return None
+
+        logger.info("Loading BM25 lexical index (one-time)...")
+        _lexical_index = LexicalIndex(retrieval_config.LEXICAL_INDEX_PATH)
+        logger.info(f"BM25 index loaded: {_lexical_index.meta['terms']} terms")
+
+    return _lexical_index
+
+
+def load_indexes():
+    """Opens the vector store and, if one was built, the BM25 index."""
+    _load_vectorstore()
+    _load_lexical_index()
+
+
+def _build_retriever(k, search_type, filter):
+    vectorstore = _load_vectorstore()
+
+    if search_type == "hybrid":
+        lexical_index = _load_lexical_index()
+
+        if lexical_index is not None:
+            return HybridRetriever(
+                vectorstore=vectorstore,
+                lexical_index=lexical_index,
+                k=k,
+                fetch_k=max(retrieval_config.HYBRID_FETCH_K, k),
+                rrf_k=retrieval_config.RRF_K,
+                filter=filter,
+            )
+
+        logger.warning("No BM25 index found, hybrid retrieval falls back to similarity search")
+        search_type = "similarity"
+
+    search_kwargs = {"k": k}
+    if filter:
+        search_kwargs["filter"] = filter
+
+    return vectorstore.as_retriever(
+        search_type=search_type,
+        search_kwargs=search_kwargs
+    )
+
+
+def _retriever_key(k, search_type, filter):
+    # filter dicts are not hashable, so key on their canonical JSON form
+    filter_key = json.dumps(filter, sort_keys=True) if filter else None
+    return (k, search_type, filter_key)
+
+
+def get_retriever(k: int = 4, search_type: str = None, filter: dict = None):
+    search_type = search_type or retrieval_config.DEFAULT_SEARCH_TYPE
+    key = _retriever_key(k, search_type, filter)
+
+    retriever = _retrievers.get(key)
+    if retriever is not None:
+        return retriever
+
+    with _retrievers_lock:
+        retriever = _retrievers.get(key)
+
+        if retriever is None:
+            logger.info(f"Initializing retriever k={k}, search_type={search_type}, filter={filter}")
+
+            retriever = _build_retriever(k, search_type, filter)
+            _retrievers[key] = retriever
+
+            logger.info(f"Retriever cached ({len(_retrievers)} in registry)")
+
+    return retriever
+
+
+def retrieve(question: str, k: int = 4, search_type: str = None, filter: dict = None):
+    """
+    Per-request retrieval: picks (or lazily builds) the retriever for this k
+    so callers can vary depth without touching the shared vector store.
+    """
+    return [doc for doc, _ in retrieve_with_scores(question, k=k, search_type=search_type, filter=filter)]
+
+
+def retrieve_with_scores(question: str, k: int = 4, search_type: str = None, filter: dict = None):
+    """
+    retrieve() with each doc's relevance score (the store's relevance
+    function: higher is closer, 1 is identical). Docs the vector search did
+    not score (BM25-only hybrid hits, "mmr" search) get None.
+    """
+    _reload_if_rebuilt()
+    retriever = get_retriever(k=k, search_type=search_type, filter=filter)
+
+    # embed first so the search below hits the embedding cache and the
+    # two stages are timed separately
+    with span("embed"):
+        embed_question(question)
+    with span("vector_search"):
+        if isinstance(retriever, HybridRetriever):
+            return retriever.scored_documents(question)
+        if retriever.search_type == "similarity":
+            return relevance_search(retriever.vectorstore, question, **retriever.search_kwargs)
+        return [(doc, None) for doc in retriever.invoke(question)]
+
+
+def embed_question(question: str):
+    return get_embeddings().embed_query(question)
+
+
+def get_collection_fingerprint():
+    """
+    Cheap identifier of the indexed collection state; changes whenever
+    chunks are added, removed or the store is rebuilt on disk.
+    """
+    _reload_if_rebuilt()
+    vectorstore = _load_vectorstore()
+    if isinstance(vectorstore, FlatVectorStore):
+        return vectorstore.fingerprint()
+
+    sqlite_path = os.path.join(CHROMA_PATH, "chroma.sqlite3")
+    mtime = os.path.getmtime(sqlite_path) if os.path.exists(sqlite_path) else None
+
+    return (vectorstore._collection.count(), mtime)
+
+
+async def aretrieve(question: str, k: int = 4, search_type: str = None, filter: dict = None):
+    """
+    Async variant of retrieve(). The question is embedded natively async
+    first so the vector search below finds it in the embedding cache
+    instead of blocking on Ollama inside Chroma's executor thread.
+    """
+    return [doc for doc, _ in await aretrieve_with_scores(question, k=k, search_type=search_type, filter=filter)]
+
+
+async def aretrieve_with_scores(question: str, k: int = 4, search_type: str = None, filter: dict = None):
+    with span("embed"):
+        await get_embeddings().aembed_query(question)
+
+    await _areload_if_rebuilt()
+    retriever = get_retriever(k=k, search_type=search_type, filter=filter)
+    with span("vector_search"):
+        if isinstance(retriever, HybridRetriever):
+            return await retriever.ascored_documents(question)
+        if retriever.search_type == "similarity":
+            return await arelevance_search(retriever.vectorstore, question, **retriever.search_kwargs)
+        return [(doc, None) for doc in await retriever.ainvoke(question)]
+
+
+# -----------------------------------
+# RERANKING
+# -----------------------------------
+def stored_vectors(docs: list):
+    """
+    Candidate vectors as stored in the index, so MMR needs no extra
+    embedding calls. Docs without an ID are re-embedded (through the cache).
+    """
+    vectorstore = _load_vectorstore()
+    ids = [doc.id for doc in docs]
+
+    if all(ids):
+        if isinstance(vectorstore, FlatVectorStore):
+            return vectorstore.get_vectors(ids)
+
+        data = vectorstore._collection.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(data["ids"], data["embeddings"]))
+        if all(doc_id in by_id for doc_id in ids):
+            return np.asarray([by_id[doc_id] for doc_id in ids], dtype=np.float32)
+
+    return np.asarray(get_embeddings().embed_documents([doc.page_content for doc in docs]), dtype=np.float32)
+
+
+def rerank_settings(k: int, rerank_mode: str = None, fetch_k: int = None):
+    """Resolves (rerank mode, candidates to fetch) for one request."""
+    mode = rerank_mode or retrieval_config.RERANK_MODE
+    if mode == "none":
+        return mode, k
+    return mode, max(fetch_k or retrieval_config.RERANK_FETCH_K, k)
+
+
+def _top_score(scored: list):
+    # reranking reorders but adds nothing, so the best candidate score is the
+    # best evidence the index has for this question
+    scores = [score for _, score in scored if score is not None]
+    return max(scores) if scores else None
+
+
+def _rerank(question: str, candidates: list, k: int, mode: str):
+    with span("rerank"):
+        result = rerank(
+            question,
+            candidates,
+            k,
+            mode,
+            query_vector_fn=lambda: embed_question(question),
+            doc_vectors_fn=stored_vectors,
+        )
+
+    if result.mode != "none":
+        logger.info(
+            f"Reranked {result.candidates} candidates to {len(result.docs)} "
+            f"with {result.mode} in {result.rerank_time}s"
+        )
+    return result
+
+
+def retrieve_reranked(
+    question: str,
+    k: int = 4,
+    rerank_mode: str = None,
+    fetch_k: int = None,
+    search_type: str = None,
+    filter: dict = None,
+):
+    """
+    Over-fetches fetch_k candidates and reranks them down to k
+    (RERANK_MODE unless `rerank_mode` is given). Returns a RerankResult.
+    """
+    mode, fetch_k = rerank_settings(k, rerank_mode, fetch_k)
+    scored = retrieve_with_scores(question, k=fetch_k, search_type=search_type, filter=filter)
+
+    result = _rerank(question, [doc for doc, _ in scored], k, mode)
+    result.top_score = _top_score(scored)
+    return result
 
-    if _retriever is None:
-        logger.info("Initializing retriever (one-time)...")
 
-        vectorstore = _load_vectorstore()
-        _retriever = vectorstore.as_retriever(search_kwargs={"k": k})
+async def aretrieve_reranked(
+    question: str,
+    k: int = 4,
+    rerank_mode: str = None,
+    fetch_k: int = None,
+    search_type: str = None,
+    filter: dict = None,
+):
+    mode, fetch_k = rerank_settings(k, rerank_mode, fetch_k)
+    scored = await aretrieve_with_scores(question, k=fetch_k, search_type=search_type, filter=filter)
+    candidates = [doc for doc, _ in scored]
 
-        logger.info("Retriever initialized and cached")
+    if mode == "none":
+        result = _rerank(question, candidates, k, mode)
+    else:
+        # vector lookups hit Chroma's SQLite and a cross-encoder is CPU-bound
+        result = await asyncio.to_thread(_rerank, question, candidates, k, mode)
 
-    return _retriever
+    result.top_score = _top_score(scored)
+    return result
@@ -0,0 +1,278 @@
+import asyncio
+import threading
+
+from src.utils.metrics import REGISTRY
+
+
+COALESCED = REGISTRY.counter(
+    "rag_coalesced_requests_total",
+    "Requests that joined an identical in-flight computation instead of starting one",
+    ("kind",),
+)
+
+
+# -----------------------------------
+# ONE RESULT PER KEY
+# -----------------------------------
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs `fn` once per key at a time: threads asking for a key that is
+    already being computed wait for that computation and share its result
+    (or its exception).
+    """
+
+    def __init__(self, name: str = "call"):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Returns (result, shared); `shared` is True for callers that joined."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            COALESCED.inc(self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    Event-loop variant of SingleFlight. The computation runs as its own
+    task, so it survives the caller that started it being cancelled.
+    """
+
+    def __init__(self, name: str = "call"):
+        self.name = name
+        self._tasks = {}
+
+    async def do(self, key, coro_fn):
+        task = self._tasks.get(key)
+        shared = task is not None
+
+        if shared:
+            COALESCED.inc(self.name)
+        else:
+            task = self._tasks[key] = asyncio.get_running_loop().create_task(coro_fn())
+            task.add_done_callback(lambda done: self._tasks.get(key) is done and self._tasks.pop(key))
+
+        return await asyncio.shield(task), shared
+
+
+# -----------------------------------
+# ONE STREAM PER KEY (BROADCAST)
+# -----------------------------------
+class _Broadcast:
+    """Append-only event log; subscribers replay it from the start, then follow it live."""
+
+    def __init__(self):
+        self.events = []
+        self.finished = False
+        self.error = None
+        self.subscribers = 0
+        self.abandoned = False
+        self._cond = threading.Condition()
+
+    def publish(self, event):
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def close(self, error: BaseException = None):
+        with self._cond:
+            self.finished = True
+            self.error = error
+            self._cond.notify_all()
+
+    def subscribe(self):
+        position = 0
+        while True:
+            with self._cond:
+                while position == len(self.events) and not self.finished:
+                    self._cond.wait()
+                pending = self.events[position:]
+                finished, error = self.finished, self.error
+
+            for event in pending:
+                yield event
+            position += len(pending)
+
+            if finished and position == len(self.events):
+                if error is not None:
+                    raise error
+                return
+
+
+class _AsyncBroadcast:
+    def __init__(self):
+        self.events = []
+        self.finished = False
+        self.error = None
+        self.subscribers = 0
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, event):
+        self.events.append(event)
+        self._notify()
+
+    def close(self, error: BaseException = None):
+        self.finished = True
+        self.error = error
+        self._notify()
+
+    async def subscribe(self):
+        position = 0
+        while True:
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+            await self._changed.wait()
+
+
+class StreamFlight:
+    """
+    Shares one generator per key between threads. The first caller starts
+    a producer thread; every caller, including late joiners, first gets
+    the events produced so far and then follows the live stream. When the
+    last subscriber leaves, the producer closes the generator at its next
+    event, so an abandoned generation gives its LLM slot back (its answer
+    is then not cached).
+    """
+
+    def __init__(self, name: str = "stream"):
+        self.name = name
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _produce(self, key, broadcast: _Broadcast, gen_fn):
+        error = None
+        gen = gen_fn()
+        try:
+            for event in gen:
+                broadcast.publish(event)
+                if broadcast.abandoned:
+                    # runs the generator's cleanup, which releases its slot
+                    gen.close()
+                    break
+        except BaseException as e:
+            error = e
+        finally:
+            self._forget(key, broadcast)
+            broadcast.close(error)
+
+    def _forget(self, key, broadcast: _Broadcast):
+        with self._lock:
+            if self._flights.get(key) is broadcast:
+                del self._flights[key]
+
+    def stream(self, key, gen_fn, on_join=None):
+        """Yields the shared events; `on_join(event)` may rewrite events for joiners."""
+        with self._lock:
+            broadcast = self._flights.get(key)
+            joined = broadcast is not None
+            if not joined:
+                broadcast = self._flights[key] = _Broadcast()
+                threading.Thread(
+                    target=self._produce, args=(key, broadcast, gen_fn), name=f"{self.name}-flight", daemon=True
+                ).start()
+            broadcast.subscribers += 1
+
+        if joined:
+            COALESCED.inc(self.name)
+
+        try:
+            for event in broadcast.subscribe():
+                yield on_join(event) if joined and on_join is not None else event
+        finally:
+            with self._lock:
+                broadcast.subscribers -= 1
+                if broadcast.subscribers == 0 and not broadcast.finished:
+                    broadcast.abandoned = True
+                    # later callers start a fresh generation
+                    if self._flights.get(key) is broadcast:
+                        del self._flights[key]
+
+
+class AsyncStreamFlight:
+    """
+    Event-loop variant of StreamFlight; the producer is a task, not a
+    thread, and is cancelled as soon as its last subscriber leaves.
+    """
+
+    def __init__(self, name: str = "stream"):
+        self.name = name
+        self._flights = {}
+
+    def _forget(self, key, broadcast: _AsyncBroadcast):
+        if self._flights.get(key) is broadcast:
+            del self._flights[key]
+
+    async def _produce(self, key, broadcast: _AsyncBroadcast, agen_fn):
+        error = None
+        try:
+            async for event in agen_fn():
+                broadcast.publish(event)
+        except BaseException as e:
+            error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self._forget(key, broadcast)
+            broadcast.close(error)
+
+    async def stream(self, key, agen_fn, on_join=None):
+        broadcast = self._flights.get(key)
+        joined = broadcast is not None
+
+        if joined:
+            COALESCED.inc(self.name)
+        else:
+            broadcast = self._flights[key] = _AsyncBroadcast()
+            broadcast.task = asyncio.get_running_loop().create_task(self._produce(key, broadcast, agen_fn))
+
+        broadcast.subscribers += 1
+        try:
+            async for event in broadcast.subscribe():
+                yield on_join(event) if joined and on_join is not None else event
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.task.done():
+                # nobody is reading: stop generating and give the LLM slot
+                # back; later callers start a fresh generation
+                self._forget(key, broadcast)
+                broadcast.task.cancel()
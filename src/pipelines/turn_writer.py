@@ -0,0 +1,102 @@
+import asyncio
+
+from configs import session_config
+from src.utils.logger import logger
+from src.utils.metrics import span
+
+
+class TurnWriter:
+    """
+    Persists chat turns off the request path. Turns are queued after the
+    response has been sent; one worker task drains the queue, writes up to
+    `max_batch` turns per store round trip, retries failed batches with
+    exponential backoff and then schedules history compaction.
+
+    A single worker keeps each session's turns in arrival order, including
+    across retries.
+    """
+
+    def __init__(
+        self,
+        store,
+        compactor=None,
+        max_batch: int = None,
+        max_retries: int = None,
+        retry_backoff: float = None,
+        queue_size: int = None,
+    ):
+        self.store = store
+        self.compactor = compactor
+        self.max_batch = max_batch or session_config.TURN_WRITER_MAX_BATCH
+        self.max_retries = session_config.TURN_WRITER_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = session_config.TURN_WRITER_RETRY_BACKOFF_SECONDS if retry_backoff is None else retry_backoff
+
+        self._queue = asyncio.Queue(maxsize=queue_size or session_config.TURN_WRITER_QUEUE_SIZE)
+        self._worker = None
+
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, session_id: str, user_message: str, assistant_message: str) -> bool:
+        """Queues a turn without waiting; returns False if the queue is full."""
+        try:
+            self._queue.put_nowait((session_id, user_message, assistant_message))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"[TURN WRITER] Queue full, dropping turn for session {session_id}")
+            return False
+
+    def _next_batch(self, first) -> list:
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _write(self, batch: list):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with span("session_save"):
+                    lengths = await self.store.save_turns(batch)
+                self.written += len(batch)
+                break
+
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.dropped += len(batch)
+                    logger.error(f"[TURN WRITER] Giving up on {len(batch)} turn(s) after {attempt + 1} attempts: {e}")
+                    return
+
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"[TURN WRITER] Write of {len(batch)} turn(s) failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        if self.compactor is not None:
+            for session_id, length in lengths.items():
+                self.compactor.maybe_compact(self.store, session_id, length)
+
+    async def _run(self):
+        while True:
+            batch = self._next_batch(await self._queue.get())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def aclose(self):
+        """Flushes queued turns, then stops the worker."""
+        if self._worker is None:
+            return
+
+        await self._queue.join()
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
@@ -1,21 +1,32 @@
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
 
-from src.pipelines.ingestion import run_ingestion_pipeline
+from configs import embedding_config, ingestion_config, retrieval_config
+from src.pipelines.embeddings import get_embeddings
+from src.pipelines.flat_index import FlatVectorStore, export_chroma_to_flat_index
+from src.pipelines.index_manifest import IndexManifest, hash_file
+from src.pipelines.ingestion import discover_pdf_paths, run_ingestion_pipeline
+from src.pipelines.lexical_index import LexicalIndex, build_lexical_index
 from src.utils.logger import logger
 from src.utils.exceptions import EmbeddingError
+from src.utils.tokens import estimate_tokens
 
 
 CHROMA_DB_PATH = "data/chroma_db"
+MANIFEST_FILENAME = "index_manifest.json"
+
+DELETE_BATCH_SIZE = 1000
 
 
 def get_ollama_embedding():
     try:
         logger.info("Initializing Ollama Embedding Model...")
 
-        embedding_model = OllamaEmbeddings(
-            model="mxbai-embed-large"
-        )
+        embedding_model = get_embeddings()
 
         logger.info("Ollama Embedding Model initialized successfully")
         return embedding_model
@@ -25,20 +36,101 @@ def get_ollama_embedding():
         raise EmbeddingError("Failed to initialize Ollama Embeddings")
 
 
-def create_chroma_database(chunks):
-    try:
-        logger.info("Creating Chroma Vector Store...")
+def _iter_batches(chunks, batch_size: int):
+    iterator = iter(chunks)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _embed_batch(embeddings, batch):
+    vectors = embeddings.embed_documents([chunk.page_content for chunk in batch])
+    return batch, vectors
+
 
-        embeddings = get_ollama_embedding()
+def _upsert_batch(vector_db, batch, vectors):
+    vector_db._collection.upsert(
+        ids=[chunk.metadata["chunk_id"] for chunk in batch],
+        embeddings=vectors,
+        documents=[chunk.page_content for chunk in batch],
+        metadatas=[chunk.metadata for chunk in batch],
+    )
 
-        vector_db = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            persist_directory=CHROMA_DB_PATH
+
+def open_chroma_database():
+    return Chroma(
+        persist_directory=CHROMA_DB_PATH,
+        embedding_function=get_ollama_embedding()
+    )
+
+
+def create_chroma_database(
+    chunks,
+    vector_db=None,
+    batch_size: int = ingestion_config.EMBED_BATCH_SIZE,
+    max_concurrency: int = ingestion_config.EMBED_MAX_CONCURRENCY,
+):
+    """
+    Streams chunks into Chroma: batches are embedded by a bounded pool of
+    concurrent requests and upserted as soon as each one completes, so at
+    most max_concurrency batches are held in memory at any time.
+    `chunks` may be any iterable, including a generator; each chunk must
+    carry a deterministic `chunk_id` in its metadata.
+    """
+    try:
+        logger.info(
+            f"Creating Chroma Vector Store (batch_size={batch_size}, "
+            f"max_concurrency={max_concurrency})..."
         )
 
+        if vector_db is None:
+            vector_db = open_chroma_database()
+        embeddings = vector_db.embeddings
+
+        total_chunks = 0
+        total_tokens = 0
+        started = time.time()
+
+        def _flush(done):
+            nonlocal total_chunks, total_tokens
+
+            for future in done:
+                batch, vectors = future.result()
+                _upsert_batch(vector_db, batch, vectors)
+
+                total_chunks += len(batch)
+                total_tokens += sum(estimate_tokens(chunk.page_content) for chunk in batch)
+
+            elapsed = max(time.time() - started, 1e-6)
+            logger.info(
+                f"Embedded {total_chunks} chunks | "
+                f"{total_chunks / elapsed:.1f} chunks/s | "
+                f"{total_tokens / elapsed:.0f} tokens/s"
+            )
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            pending = set()
+
+            for batch in _iter_batches(chunks, batch_size):
+                pending.add(pool.submit(_embed_batch, embeddings, batch))
+
+                # keep at most max_concurrency batches in flight
+                if len(pending) >= max_concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _flush(done)
+
+            if pending:
+                _flush(pending)
+
+        elapsed = round(time.time() - started, 2)
+
         # ❌ DO NOT CALL persist() — auto persistence happens
-        logger.info("Chroma Vector Store created and persisted successfully")
+        logger.info(
+            f"Chroma Vector Store created and persisted successfully: "
+            f"{total_chunks} chunks, ~{total_tokens} tokens in {elapsed}s"
+        )
 
         return vector_db
 
@@ -47,11 +139,128 @@ def create_chroma_database(chunks):
         raise EmbeddingError("Failed to create Chroma Vector Store")
 
 
+def delete_chunks(vector_db, chunk_ids):
+    chunk_ids = list(chunk_ids)
+    for i in range(0, len(chunk_ids), DELETE_BATCH_SIZE):
+        vector_db.delete(ids=chunk_ids[i:i + DELETE_BATCH_SIZE])
+
+    if chunk_ids:
+        logger.info(f"Deleted {len(chunk_ids)} stale chunks")
+
+
+def _index_settings():
+    return {
+        "chunk_size": ingestion_config.CHUNK_SIZE,
+        "chunk_overlap": ingestion_config.CHUNK_OVERLAP,
+        "embedding_model": embedding_config.EMBEDDING_MODEL,
+    }
+
+
+def _reindex_sources(vector_db, manifest, changed: dict):
+    """
+    Re-chunks every changed source in one streaming pass and embeds only
+    the chunk IDs each source did not already have.
+    """
+    indexed_ids = {source: manifest.chunk_ids(source) for source in changed}
+    current_ids = {source: [] for source in changed}
+
+    def _new_chunks():
+        for chunk in run_ingestion_pipeline(list(changed)):
+            source = chunk.metadata["source"]
+            chunk_id = chunk.metadata["chunk_id"]
+
+            current_ids[source].append(chunk_id)
+            if chunk_id not in indexed_ids[source]:
+                yield chunk
+
+    create_chroma_database(_new_chunks(), vector_db=vector_db)
+
+    for source, file_hash in changed.items():
+        removed_ids = indexed_ids[source] - set(current_ids[source])
+
+        logger.info(
+            f"{source}: {len(current_ids[source])} chunks, "
+            f"{len(set(current_ids[source]) - indexed_ids[source])} new/changed, "
+            f"{len(removed_ids)} removed"
+        )
+
+        delete_chunks(vector_db, removed_ids)
+        manifest.record(source, file_hash, current_ids[source])
+
+    manifest.save()
+
+
+def build_lexical_index_from_store(vector_db):
+    """Rebuilds the BM25 index from exactly what is stored in Chroma."""
+    data = vector_db._collection.get(include=["documents"])
+
+    build_lexical_index(
+        ids=data["ids"],
+        texts=data["documents"],
+        path=retrieval_config.LEXICAL_INDEX_PATH,
+        k1=retrieval_config.BM25_K1,
+        b=retrieval_config.BM25_B,
+    )
+
+
+def build_flat_index_from_store(vector_db):
+    """Exports Chroma's vectors for the flat (NumPy) retrieval backend."""
+    export_chroma_to_flat_index(
+        vector_db,
+        path=retrieval_config.FLAT_INDEX_PATH,
+        dtype=retrieval_config.FLAT_INDEX_DTYPE,
+    )
+
+
 def run_vector_pipeline():
+    """
+    Incremental re-index: only sources whose file hash changed are
+    re-chunked, only chunk IDs not already indexed are embedded, and
+    chunks that disappeared are deleted.
+    """
     logger.info("PHASE-2 VECTOR STORE PIPELINE STARTED")
 
-    chunks = run_ingestion_pipeline()
-    vector_db = create_chroma_database(chunks)
+    vector_db = open_chroma_database()
+    settings = _index_settings()
+    manifest_path = os.path.join(CHROMA_DB_PATH, MANIFEST_FILENAME)
+    manifest = IndexManifest.load(manifest_path, settings)
+
+    if manifest.settings != settings or (not manifest.exists() and vector_db._collection.count() > 0):
+        # different chunking/model, or a store built before the manifest existed
+        logger.warning("Index settings changed or no manifest found, rebuilding collection from scratch")
+        vector_db.reset_collection()
+        manifest = IndexManifest(manifest_path, settings)
+
+    sources = discover_pdf_paths()
+    logger.info(f"Corpus: {len(sources)} PDF(s) under {ingestion_config.PDF_SOURCES}")
+
+    changed = {}
+    for source in sources:
+        file_hash = hash_file(source)
+
+        if manifest.is_unchanged(source, file_hash):
+            logger.info(f"{source}: unchanged, skipping")
+            continue
+
+        changed[source] = file_hash
+
+    if changed:
+        _reindex_sources(vector_db, manifest, changed)
+
+    removed = [source for source in manifest.sources if source not in sources]
+    for source in removed:
+        logger.info(f"{source}: no longer in corpus, removing")
+        delete_chunks(vector_db, manifest.chunk_ids(source))
+        manifest.forget(source)
+
+    manifest.save()
+
+    if changed or removed or not LexicalIndex.exists(retrieval_config.LEXICAL_INDEX_PATH):
+        build_lexical_index_from_store(vector_db)
+
+    flat_dtype = FlatVectorStore.stored_dtype(retrieval_config.FLAT_INDEX_PATH)
+    if changed or removed or flat_dtype != retrieval_config.FLAT_INDEX_DTYPE:
+        build_flat_index_from_store(vector_db)
 
     logger.info("PHASE-2 VECTOR STORE PIPELINE COMPLETED SUCCESSFULLY")
-    return vector_db
\ No newline at end of file
+    return vector_db
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from configs import startup_config
+from src.pipelines.rag_chain import preload_llm
+from src.pipelines.retrieval import embed_question, load_indexes, retrieve_reranked
+from src.utils.logger import logger
+from src.utils.metrics import REGISTRY
+
+
+READY = REGISTRY.gauge(
+    "service_ready",
+    "1 once startup warm-up has finished, else 0",
+)
+WARMUP_STEP_SECONDS = REGISTRY.gauge(
+    "warmup_step_seconds",
+    "Duration of each startup warm-up step",
+    ("step",),
+)
+
+
+def default_steps() -> list:
+    """(name, fn) pairs run in order at startup; each pays one cold start."""
+    question = startup_config.WARMUP_QUESTION
+
+    steps = [
+        ("vectorstore", load_indexes),
+        ("embed", lambda: embed_question(question)),
+        # the embedding is cached by now, so this times the search (and reranker load)
+        ("search", lambda: retrieve_reranked(question, k=1)),
+    ]
+
+    if startup_config.WARMUP_LLM:
+        steps.append(("llm", preload_llm))
+
+    return steps
+
+
+class WarmUp:
+    """
+    Startup warm-up behind /ready. Steps run in order in a worker thread;
+    a failing step (e.g. Ollama still starting) is retried every
+    `retry_seconds` until it succeeds, and the service only reports ready
+    once every step has passed.
+    """
+
+    def __init__(self, steps: list = None, retry_seconds: float = None):
+        self.steps = default_steps() if steps is None else steps
+        self.retry_seconds = startup_config.WARMUP_RETRY_SECONDS if retry_seconds is None else retry_seconds
+
+        self.completed = {}
+        self.error = None
+        self._ready = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self):
+        self._ready.set()
+        READY.set(1)
+
+    async def wait(self):
+        await self._ready.wait()
+
+    async def run(self):
+        READY.set(0)
+        started = time.perf_counter()
+
+        for name, fn in self.steps:
+            while True:
+                step_started = time.perf_counter()
+                try:
+                    await asyncio.to_thread(fn)
+                except Exception as e:
+                    self.error = f"{name}: {e}"
+                    logger.error(f"[WARMUP] Step '{name}' failed, retrying in {self.retry_seconds}s: {e}")
+                    await asyncio.sleep(self.retry_seconds)
+                    continue
+
+                seconds = time.perf_counter() - step_started
+                self.completed[name] = round(seconds, 3)
+                self.error = None
+                WARMUP_STEP_SECONDS.set(seconds, name)
+                logger.info(f"[WARMUP] {name} ready in {seconds:.3f}s")
+                break
+
+        self.mark_ready()
+        logger.info(f"[WARMUP] Service ready after {time.perf_counter() - started:.3f}s")
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "steps": {name: self.completed.get(name) for name, _ in self.steps},
+            "error": self.error,
+        }
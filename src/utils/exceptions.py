@@ -19,4 +19,12 @@ class RetrievalError(RAGBaseException):
 
 class RAGError(Exception):
     """Raised when the RAG chain fails."""
-    pass
\ No newline at end of file
+    pass
+
+class AdmissionError(RAGBaseException):
+    """Raised when the LLM scheduler rejects or times out a queued generation"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
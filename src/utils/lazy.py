@@ -0,0 +1,34 @@
+import importlib
+import threading
+
+
+class LazyImport:
+    """
+    Placeholder for a class or function from a heavy dependency (chromadb,
+    the Ollama client) that imports its module on first call or attribute
+    access, so importing our modules stays cheap. Assigned as a module
+    global, it can still be monkeypatched like the real import.
+    """
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+        self._target = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = getattr(importlib.import_module(self._module), self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<LazyImport {self._module}.{self._name} ({state})>"
@@ -3,17 +3,28 @@ import os
 from datetime import datetime
 
 LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
 
 LOG_FILE = os.path.join(LOG_DIR, f"app_{datetime.now().strftime('%Y_%m_%d')}.log")
 
+
+class LazyFileHandler(logging.FileHandler):
+    """File handler that creates the log directory and opens the file on the first record, not at import."""
+
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler(LOG_FILE)
+        LazyFileHandler(LOG_FILE)
     ]
 )
 
-logger = logging.getLogger("medical_rag_chatbot")
\ No newline at end of file
+logger = logging.getLogger("medical_rag_chatbot")
@@ -0,0 +1,283 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from configs import metrics_config
+from src.utils.logger import logger
+
+
+# -----------------------------------
+# METRIC TYPES (Prometheus text format)
+# -----------------------------------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200)
+
+
+def _label_text(labelnames: tuple, labelvalues: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [
+                f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}"
+                for labels, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(labelvalues)
+        return series[2] if series else 0
+
+    def samples(self) -> list:
+        lines = []
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = _label_text(self.labelnames, labels, f'le="{_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+
+                label_text = _label_text(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+                lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_seconds",
+    "Latency of one pipeline stage (embed, vector_search, rerank, pack, prompt, ttft, decode, ...)",
+    ("stage",),
+)
+DECODE_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "rag_decode_tokens_per_second",
+    "Streamed LLM chunks per second after the first token",
+    buckets=RATE_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time from request start to the last response byte",
+    ("method", "route", "status"),
+)
+HTTP_FIRST_BYTE_SECONDS = REGISTRY.histogram(
+    "http_time_to_first_byte_seconds",
+    "Time from request start to the first response body byte",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight",
+    "Requests currently being served",
+)
+
+
+# -----------------------------------
+# SPANS
+# -----------------------------------
+# per-request {stage: seconds}; set by MetricsMiddleware, None outside requests
+_trace = ContextVar("rag_trace", default=None)
+
+
+def current_trace():
+    return _trace.get()
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage)
+
+    trace = _trace.get()
+    if trace is not None:
+        trace[stage] = trace.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str):
+    """Times the block with a monotonic clock and records it as `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+class StreamTimer:
+    """
+    Splits one streamed LLM call into time to first token (prefill) and
+    decode, and records both plus the decode rate.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.chunks = 0
+
+    def tick(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            observe_stage("ttft", self.first_token_at - self.started)
+        self.chunks += 1
+
+    @property
+    def ttft(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    def finish(self) -> float:
+        """Records decode time and rate; returns total generation seconds."""
+        finished = time.perf_counter()
+
+        if self.first_token_at is not None:
+            decode = finished - self.first_token_at
+            observe_stage("decode", decode)
+            if self.chunks > 1 and decode > 0:
+                DECODE_TOKENS_PER_SECOND.observe((self.chunks - 1) / decode)
+
+        return finished - self.started
+
+
+# -----------------------------------
+# ASGI MIDDLEWARE
+# -----------------------------------
+class MetricsMiddleware:
+    """
+    Records request latency and time to first byte per route, and logs the
+    per-stage breakdown of requests slower than METRICS_SLOW_REQUEST_SECONDS.
+    Pure ASGI, so streamed bodies pass through untouched.
+    """
+
+    def __init__(self, app, slow_request_seconds: float = None):
+        self.app = app
+        self.slow_request_seconds = (
+            metrics_config.METRICS_SLOW_REQUEST_SECONDS if slow_request_seconds is None else slow_request_seconds
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "first_byte": None}
+        trace = {}
+        token = _trace.set(trace)
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body" and state["first_byte"] is None:
+                state["first_byte"] = time.perf_counter() - started
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _trace.reset(token)
+
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(elapsed, scope["method"], route, str(state["status"]))
+            if state["first_byte"] is not None:
+                HTTP_FIRST_BYTE_SECONDS.observe(state["first_byte"], scope["method"], route)
+
+            if elapsed >= self.slow_request_seconds:
+                stages = ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in trace.items())
+                logger.warning(f"[SLOW] {scope['method']} {route} {state['status']} in {elapsed:.3f}s ({stages})")
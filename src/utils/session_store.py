@@ -1,57 +1,454 @@
+import asyncio
 import json
-import os
+import time
+from collections import OrderedDict
+
 import redis
+import redis.asyncio as aioredis
+
+from configs import session_config
 from src.utils.logger import logger
 
 
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
-REDIS_DB = int(os.getenv("REDIS_DB", 0))
-SESSION_TTL = int(os.getenv("SESSION_TTL_SECONDS", 86400))  # 24 hours
+KEY_PREFIX = "medical_chat"
 
+# errors that mean "Redis is unavailable", as opposed to a bug in our code
+REDIS_UNAVAILABLE_ERRORS = (redis.RedisError, OSError, asyncio.TimeoutError)
 
-class SessionStore:
-    def __init__(self):
-        try:
-            self.client = redis.Redis(
-                host=os.getenv("REDIS_HOST", "localhost"),
-                port=int(os.getenv("REDIS_PORT", 6379)),
-                password=os.getenv("REDIS_PASSWORD", None),
-
-                # CRITICAL PART
-                socket_connect_timeout=3,   # if Redis not reachable → fail fast
-                socket_timeout=3,
-                retry_on_timeout=False,
-                ssl=os.getenv("REDIS_SSL", "false").lower() == "true"
+
+def _turns_key(session_id):
+    return f"{KEY_PREFIX}:{session_id}:turns"
+
+
+def _summary_key(session_id):
+    return f"{KEY_PREFIX}:{session_id}:summary"
+
+
+def _legacy_key(session_id):
+    return f"{KEY_PREFIX}:{session_id}"
+
+
+def _turn_messages(user_message, assistant_message):
+    return [
+        {"role": "user", "message": user_message},
+        {"role": "assistant", "message": assistant_message},
+    ]
+
+
+def _decode_messages(raw):
+    return [json.loads(item) for item in raw]
+
+
+def _decode_summary(data):
+    if not data:
+        return ""
+    return data.decode("utf-8") if isinstance(data, bytes) else data
+
+
+def _capped_length(length):
+    cap = session_config.SESSION_MAX_MESSAGES
+    return min(length, cap) if cap else length
+
+
+def _covered_prefix(head, compacted):
+    """
+    How many of the oldest stored messages are still ones in `compacted`
+    (the messages a summary was built from). The message cap may have
+    trimmed some of them off the head since they were read.
+    """
+    for dropped in range(len(compacted) + 1):
+        remaining = compacted[dropped:]
+        if head[:len(remaining)] == remaining:
+            return len(remaining)
+    return 0
+
+
+# -----------------------------------
+# REDIS
+# -----------------------------------
+_pool = None
+
+
+def get_redis_pool():
+    """Process-wide asyncio connection pool shared by every Redis store."""
+    global _pool
+
+    if _pool is None:
+        options = dict(
+            host=session_config.REDIS_HOST,
+            port=session_config.REDIS_PORT,
+            password=session_config.REDIS_PASSWORD,
+            db=session_config.REDIS_DB,
+            max_connections=session_config.REDIS_POOL_MAX_CONNECTIONS,
+            health_check_interval=session_config.REDIS_HEALTH_CHECK_INTERVAL,
+
+            # fail fast so an outage degrades to the fallback store instead of stalling chat
+            socket_connect_timeout=session_config.REDIS_SOCKET_CONNECT_TIMEOUT,
+            socket_timeout=session_config.REDIS_SOCKET_TIMEOUT,
+            retry_on_timeout=False,
+        )
+        if session_config.REDIS_SSL:
+            options["connection_class"] = aioredis.SSLConnection
+
+        _pool = aioredis.ConnectionPool(**options)
+
+    return _pool
+
+
+# WATCH retries before a compaction gives up until the next trigger
+_COMPACTION_ATTEMPTS = 3
+
+
+class RedisSessionStore:
+    """
+    Each session is a Redis list of JSON messages at
+    `medical_chat:{id}:turns` plus a rolling summary string at
+    `medical_chat:{id}:summary`. Writes append in one MULTI round trip, and
+    reads fetch only the tail they need.
+    """
+
+    name = "redis"
+
+    def __init__(self, client=None):
+        self.client = client if client is not None else aioredis.Redis(connection_pool=get_redis_pool())
+
+    async def ping(self):
+        return await self.client.ping()
+
+    async def get_history(self, session_id, last_n=None):
+        start = -last_n if last_n else 0
+        return _decode_messages(await self.client.lrange(_turns_key(session_id), start, -1))
+
+    async def get_summary(self, session_id):
+        return _decode_summary(await self.client.get(_summary_key(session_id)))
+
+    async def load_session(self, session_id, last_n=None):
+        """Returns (last_n messages, summary) in a single round trip."""
+        start = -last_n if last_n else 0
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.lrange(_turns_key(session_id), start, -1)
+        pipe.get(_summary_key(session_id))
+        raw_history, summary = await pipe.execute()
+
+        return _decode_messages(raw_history), _decode_summary(summary)
+
+    async def save_turn(self, session_id, user_message, assistant_message):
+        """
+        Appends one user/assistant pair and refreshes the TTLs atomically.
+        Returns the number of stored messages for the session.
+        """
+        lengths = await self.save_turns([(session_id, user_message, assistant_message)])
+        return lengths[session_id]
+
+    async def save_turns(self, turns):
+        """
+        Writes [(session_id, user_message, assistant_message)] in one MULTI
+        round trip, one RPUSH per session in arrival order. Returns
+        {session_id: stored message count}.
+        """
+        ttl = session_config.SESSION_TTL
+        cap = session_config.SESSION_MAX_MESSAGES
+
+        by_session = {}
+        for session_id, user_message, assistant_message in turns:
+            by_session.setdefault(session_id, []).extend(
+                json.dumps(message) for message in _turn_messages(user_message, assistant_message)
             )
 
-            self.client.ping()
-            logger.info("Connected to Redis successfully")
+        pipe = self.client.pipeline(transaction=True)
+        for session_id, messages in by_session.items():
+            key = _turns_key(session_id)
+            pipe.rpush(key, *messages)
+            if cap:
+                pipe.ltrim(key, -cap, -1)
+            pipe.expire(key, ttl)
+            pipe.expire(_summary_key(session_id), ttl)
+        results = await pipe.execute()
+
+        per_session = 4 if cap else 3
+        return {
+            session_id: _capped_length(results[i * per_session])
+            for i, session_id in enumerate(by_session)
+        }
+
+    async def apply_compaction(self, session_id, summary, compacted):
+        """
+        Stores the new rolling summary and drops the `compacted` messages it
+        now covers from the head of the list. The head is read and trimmed
+        in one WATCH/MULTI transaction, so a save_turns that lands in
+        between (and may cap-trim the head) makes it retry against the new
+        list instead of trimming turns the summary never saw. Returns the
+        number of messages dropped.
+        """
+        key = _turns_key(session_id)
+        ttl = session_config.SESSION_TTL
+
+        for attempt in range(1, _COMPACTION_ATTEMPTS + 1):
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(key)
+                    head = _decode_messages(await pipe.lrange(key, 0, len(compacted) - 1)) if compacted else []
+                    covered = _covered_prefix(head, compacted)
+
+                    pipe.multi()
+                    pipe.ltrim(key, covered, -1)
+                    pipe.set(_summary_key(session_id), summary, ex=ttl)
+                    pipe.expire(key, ttl)
+                    await pipe.execute()
+                    return covered
+
+                except redis.WatchError:
+                    if attempt == _COMPACTION_ATTEMPTS:
+                        raise
+                    logger.info(f"Session {session_id} changed during compaction, retrying")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    # -----------------------------------
+    # MIGRATION FROM THE JSON-STRING LAYOUT
+    # -----------------------------------
+    async def migrate_legacy_session(self, session_id):
+        """
+        Moves a pre-list `medical_chat:{id}` JSON string into the list
+        layout, keeping its remaining TTL. Returns the number of messages
+        moved.
+        """
+        legacy_key = _legacy_key(session_id)
+        key = _turns_key(session_id)
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            # WATCH so a concurrent migration of the same key is not applied twice
+            await pipe.watch(legacy_key)
+            data = await pipe.get(legacy_key)
+            ttl = await pipe.ttl(legacy_key)
+            if not data:
+                await pipe.unwatch()
+                return 0
 
-        except Exception as e:
-            logger.error(f"Redis connection failed: {e}")
-            raise
+            history = json.loads(data)
 
-    def _key(self, session_id):
-        return f"medical_chat:{session_id}"
+            pipe.multi()
+            if history:
+                # legacy messages are older than anything written since the deploy
+                pipe.lpush(key, *[json.dumps(message) for message in reversed(history)])
+            pipe.expire(key, ttl if ttl and ttl > 0 else session_config.SESSION_TTL)
+            pipe.delete(legacy_key)
+            await pipe.execute()
 
-    def get_history(self, session_id):
-        key = self._key(session_id)
+        return len(history)
 
-        data = self.client.get(key)
-        if not data:
+    async def migrate_legacy_keys(self, batch_size=500):
+        """Migrates every legacy session key; safe to re-run."""
+        sessions = 0
+        messages = 0
+
+        async for raw_key in self.client.scan_iter(match=f"{KEY_PREFIX}:*", count=batch_size, _type="string"):
+            key = raw_key.decode("utf-8") if isinstance(raw_key, bytes) else raw_key
+            if key.endswith(":summary"):
+                continue
+
+            session_id = key[len(KEY_PREFIX) + 1:]
+            try:
+                messages += await self.migrate_legacy_session(session_id)
+                sessions += 1
+
+            except redis.WatchError:
+                logger.warning(f"Session {session_id} changed during migration, skipping")
+
+        logger.info(f"Migrated {sessions} legacy session(s), {messages} message(s)")
+        return sessions
+
+
+# -----------------------------------
+# IN-PROCESS
+# -----------------------------------
+class _MemorySession:
+    __slots__ = ("messages", "summary", "expires_at")
+
+    def __init__(self):
+        self.messages = []
+        self.summary = ""
+        self.expires_at = 0.0
+
+
+class InMemorySessionStore:
+    """
+    Bounded in-process store with the same interface and TTL semantics as
+    RedisSessionStore; the least recently used session is evicted once
+    `max_sessions` is reached. Sessions are per process and lost on restart.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_sessions=None, ttl=None, clock=time.monotonic):
+        self.max_sessions = max_sessions or session_config.MEMORY_SESSION_MAX_SESSIONS
+        self.ttl = ttl or session_config.SESSION_TTL
+        self._clock = clock
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _get(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+
+        if session.expires_at <= self._clock():
+            del self._sessions[session_id]
+            return None
+
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _get_or_create(self, session_id):
+        session = self._get(session_id)
+        if session is None:
+            session = _MemorySession()
+            self._sessions[session_id] = session
+
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+        session.expires_at = self._clock() + self.ttl
+        return session
+
+    async def ping(self):
+        return True
+
+    async def get_history(self, session_id, last_n=None):
+        session = self._get(session_id)
+        if session is None:
             return []
+        return list(session.messages[-last_n:] if last_n else session.messages)
+
+    async def get_summary(self, session_id):
+        session = self._get(session_id)
+        return session.summary if session else ""
+
+    async def load_session(self, session_id, last_n=None):
+        return await self.get_history(session_id, last_n), await self.get_summary(session_id)
+
+    async def save_turn(self, session_id, user_message, assistant_message):
+        session = self._get_or_create(session_id)
+        session.messages.extend(_turn_messages(user_message, assistant_message))
+
+        cap = session_config.SESSION_MAX_MESSAGES
+        if cap and len(session.messages) > cap:
+            del session.messages[:-cap]
+
+        return len(session.messages)
+
+    async def save_turns(self, turns):
+        lengths = {}
+        for session_id, user_message, assistant_message in turns:
+            lengths[session_id] = await self.save_turn(session_id, user_message, assistant_message)
+        return lengths
+
+    async def apply_compaction(self, session_id, summary, compacted):
+        session = self._get_or_create(session_id)
+        covered = _covered_prefix(session.messages[:len(compacted)], compacted)
+        del session.messages[:covered]
+        session.summary = summary
+        return covered
+
+    async def aclose(self):
+        self._sessions.clear()
+
+
+# -----------------------------------
+# DEGRADED MODE
+# -----------------------------------
+class FallbackSessionStore:
+    """
+    Serves from `primary` and switches to `fallback` when the primary is
+    unreachable. After a failure the primary is skipped for
+    `retry_after` seconds, so an outage costs one timeout rather than one
+    per request. Turns written during an outage stay in the fallback.
+    """
+
+    def __init__(self, primary, fallback, retry_after=None, clock=time.monotonic):
+        self.primary = primary
+        self.fallback = fallback
+        self.retry_after = session_config.REDIS_RETRY_AFTER_SECONDS if retry_after is None else retry_after
+        self._clock = clock
+        self._down_until = 0.0
+
+    @property
+    def name(self):
+        return f"{self.primary.name}+{self.fallback.name}"
+
+    @property
+    def degraded(self):
+        return self._clock() < self._down_until
+
+    def mark_down(self, error):
+        if not self.degraded:
+            logger.warning(
+                f"Session store {self.primary.name} unavailable ({error}); "
+                f"using {self.fallback.name} for {self.retry_after}s"
+            )
+        self._down_until = self._clock() + self.retry_after
+
+    async def _call(self, method, *args):
+        if not self.degraded:
+            try:
+                return await getattr(self.primary, method)(*args)
+            except REDIS_UNAVAILABLE_ERRORS as e:
+                self.mark_down(e)
+
+        return await getattr(self.fallback, method)(*args)
+
+    async def ping(self):
+        return await self._call("ping")
+
+    async def get_history(self, session_id, last_n=None):
+        return await self._call("get_history", session_id, last_n)
+
+    async def get_summary(self, session_id):
+        return await self._call("get_summary", session_id)
+
+    async def load_session(self, session_id, last_n=None):
+        return await self._call("load_session", session_id, last_n)
+
+    async def save_turn(self, session_id, user_message, assistant_message):
+        return await self._call("save_turn", session_id, user_message, assistant_message)
+
+    async def save_turns(self, turns):
+        return await self._call("save_turns", turns)
+
+    async def apply_compaction(self, session_id, summary, compacted):
+        return await self._call("apply_compaction", session_id, summary, compacted)
+
+    async def aclose(self):
+        await self.primary.aclose()
+        await self.fallback.aclose()
+
+
+async def create_session_store(backend=None):
+    """Builds the store selected by SESSION_BACKEND and checks Redis once."""
+    backend = backend or session_config.SESSION_BACKEND
+
+    if backend == "memory":
+        logger.info("Using in-process session store")
+        return InMemorySessionStore()
 
-        return json.loads(data)
+    if backend == "redis":
+        store = RedisSessionStore()
+        await store.ping()
+        logger.info("Connected to Redis successfully")
+        return store
 
-    def save_turn(self, session_id, user_message, assistant_message):
-        key = self._key(session_id)
+    if backend != "auto":
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
 
-        history = self.get_history(session_id)
-        history.append({"role": "user", "message": user_message})
-        history.append({"role": "assistant", "message": assistant_message})
+    store = FallbackSessionStore(RedisSessionStore(), InMemorySessionStore())
+    try:
+        await store.primary.ping()
+        logger.info("Connected to Redis successfully")
+    except REDIS_UNAVAILABLE_ERRORS as e:
+        store.mark_down(e)
 
-        self.client.set(key, json.dumps(history))
-        self.client.expire(key, SESSION_TTL)
-        return history
\ No newline at end of file
+    return store
@@ -0,0 +1,67 @@
+import json
+
+
+# -----------------------------------
+# EVENT TYPES
+# -----------------------------------
+# every stream is: token* (sources timing done | error)
+TOKEN = "token"
+SOURCES = "sources"
+TIMING = "timing"
+ERROR = "error"
+DONE = "done"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def token_event(text: str) -> dict:
+    return {"type": TOKEN, "text": text}
+
+
+def sources_event(sources: list) -> dict:
+    return {"type": SOURCES, "sources": sources}
+
+
+def timing_event(retrieval_time: float, generation_time: float, total_time: float = None, ttft: float = None) -> dict:
+    if total_time is None:
+        total_time = retrieval_time + generation_time
+
+    event = {
+        "type": TIMING,
+        "retrieval": round(retrieval_time, 3),
+        "llm": round(generation_time, 3),
+        "total": round(total_time, 3),
+    }
+    if ttft is not None:
+        # LLM time to first token, part of "llm"
+        event["ttft"] = round(ttft, 3)
+    return event
+
+
+def error_event(message: str) -> dict:
+    return {"type": ERROR, "message": message}
+
+
+def done_event(**fields) -> dict:
+    return {"type": DONE, **fields}
+
+
+# -----------------------------------
+# WIRE FORMATS
+# -----------------------------------
+def encode_ndjson(event: dict) -> str:
+    """One JSON object per line; JSON escapes newlines inside strings."""
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def encode_sse(event: dict) -> str:
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+def negotiate(accept: str = None):
+    """Picks (encoder, media_type) from an Accept header; NDJSON unless SSE is asked for."""
+    if accept and SSE_MEDIA_TYPE in accept:
+        return encode_sse, SSE_MEDIA_TYPE
+    return encode_ndjson, NDJSON_MEDIA_TYPE
@@ -0,0 +1,50 @@
+import re
+
+from configs import rag_config
+from src.utils.logger import logger
+
+# word pieces + punctuation, roughly how SentencePiece vocabularies split prose
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# medical prose carries many long Latin/Greek terms that split into several pieces
+_PIECES_PER_WORD = 1.3
+
+_tokenizer = None
+_tokenizer_loaded = False
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate model token count without loading a tokenizer."""
+    if not text:
+        return 0
+    return max(1, round(len(_TOKEN_PATTERN.findall(text)) * _PIECES_PER_WORD))
+
+
+def _get_tokenizer():
+    global _tokenizer, _tokenizer_loaded
+
+    if not _tokenizer_loaded:
+        _tokenizer_loaded = True
+
+        if rag_config.TOKENIZER_PATH:
+            try:
+                from tokenizers import Tokenizer
+
+                _tokenizer = Tokenizer.from_file(rag_config.TOKENIZER_PATH)
+                logger.info(f"Loaded tokenizer from {rag_config.TOKENIZER_PATH}")
+            except Exception as e:
+                logger.warning(f"Tokenizer unavailable, estimating token counts: {e}")
+
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Model token count: exact with TOKENIZER_PATH set, estimated otherwise."""
+    if not text:
+        return 0
+
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return estimate_tokens(text)
+
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
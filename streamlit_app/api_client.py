@@ -0,0 +1,113 @@
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+import requests
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+API_BASE_URL = os.getenv("MEDICAL_RAG_API_URL", "http://127.0.0.1:8000")
+
+
+# -------------------------------------------------
+# EVENTS (mirror src/utils/stream_protocol.py)
+# -------------------------------------------------
+@dataclass
+class TokenEvent:
+    text: str
+
+
+@dataclass
+class SourcesEvent:
+    sources: list = field(default_factory=list)
+
+
+@dataclass
+class TimingEvent:
+    retrieval: float
+    llm: float
+    total: float
+    ttft: float = None
+
+
+@dataclass
+class ErrorEvent:
+    message: str
+
+
+@dataclass
+class DoneEvent:
+    cache_hit: str = None
+    rerank: dict = None
+    coalesced: bool = None
+    gated: bool = None
+
+
+StreamEvent = Union[TokenEvent, SourcesEvent, TimingEvent, ErrorEvent, DoneEvent]
+
+_EVENT_TYPES = {
+    "token": TokenEvent,
+    "sources": SourcesEvent,
+    "timing": TimingEvent,
+    "error": ErrorEvent,
+    "done": DoneEvent,
+}
+
+
+class APIError(Exception):
+    """Raised when the API rejects a request before streaming starts."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def parse_event(line) -> Optional[StreamEvent]:
+    """
+    Parses one NDJSON line into its event dataclass. Unknown fields are
+    ignored and unknown event types give None, so newer servers can add both.
+    """
+    payload = json.loads(line)
+    event_cls = _EVENT_TYPES.get(payload.pop("type", None))
+    if event_cls is None:
+        return None
+
+    known = event_cls.__dataclass_fields__
+    return event_cls(**{key: value for key, value in payload.items() if key in known})
+
+
+def _stream(path: str, body: dict, base_url: str = None, timeout=None) -> Iterator[StreamEvent]:
+    with requests.post(
+        f"{base_url or API_BASE_URL}{path}",
+        json=body,
+        headers={"Accept": "application/x-ndjson"},
+        stream=True,
+        timeout=timeout,
+    ) as response:
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise APIError(response.status_code, detail)
+
+        for line in response.iter_lines():
+            if not line:
+                continue
+
+            event = parse_event(line)
+            if event is not None:
+                yield event
+
+
+def stream_chat(session_id: str, question: str, k: int = 4, base_url: str = None, timeout=None) -> Iterator[StreamEvent]:
+    """Streams /chat as typed events."""
+    return _stream("/chat", {"session_id": session_id, "question": question, "k": k}, base_url, timeout)
+
+
+def stream_ask(question: str, k: int = 4, base_url: str = None, timeout=None) -> Iterator[StreamEvent]:
+    """Streams /ask-stream as typed events."""
+    return _stream("/ask-stream", {"question": question, "k": k}, base_url, timeout)
@@ -1,12 +1,15 @@
 import streamlit as st
-import requests
 import uuid
-import re
 
-# -------------------------------------------------
-# CONFIG
-# -------------------------------------------------
-FASTAPI_CHAT_URL = "http://127.0.0.1:8000/chat"
+from api_client import (
+    APIError,
+    DoneEvent,
+    ErrorEvent,
+    SourcesEvent,
+    TimingEvent,
+    TokenEvent,
+    stream_chat,
+)
 
 st.set_page_config(
     page_title="Medical RAG Chatbot",
@@ -73,54 +76,31 @@ if user_input:
         timing = None
 
         try:
-            with requests.post(
-                FASTAPI_CHAT_URL,
-                json={
-                    "session_id": st.session_state.session_id,
-                    "question": user_input
-                },
-                stream=True,
-                timeout=None
-            ) as response:
-
-                if response.status_code != 200:
-                    answer_placeholder.error(
-                        "Medical answer generation failed."
-                    )
-                else:
-                    for chunk in response.iter_content(chunk_size=1024):
-                        if not chunk:
-                            continue
-
-                        text = chunk.decode("utf-8")
-
-                        # ---- TIMING BLOCK ----
-                        if text.startswith("[TIMING]"):
-                            match = re.search(
-                                r"retrieval=(\d+\.?\d*)s, llm=(\d+\.?\d*)s, total=(\d+\.?\d*)s",
-                                text
-                            )
-                            if match:
-                                timing = {
-                                    "retrieval": match.group(1),
-                                    "llm": match.group(2),
-                                    "total": match.group(3)
-                                }
-                            continue
-
-                        # ---- SOURCES BLOCK ----
-                        if text.startswith("[SOURCES]"):
-                            try:
-                                sources = eval(
-                                    text.replace("[SOURCES]:", "").strip()
-                                )
-                            except Exception:
-                                sources = []
-                            continue
-
-                        # ---- STREAM ANSWER TEXT ----
-                        full_answer += text
-                        answer_placeholder.markdown(full_answer)
+            for event in stream_chat(st.session_state.session_id, user_input):
+                if isinstance(event, TokenEvent):
+                    full_answer += event.text
+                    answer_placeholder.markdown(full_answer)
+
+                elif isinstance(event, SourcesEvent):
+                    sources = event.sources
+
+                elif isinstance(event, TimingEvent):
+                    timing = {
+                        "retrieval": event.retrieval,
+                        "llm": event.llm,
+                        "total": event.total
+                    }
+
+                elif isinstance(event, ErrorEvent):
+                    answer_placeholder.error(event.message)
+
+                elif isinstance(event, DoneEvent):
+                    break
+
+        except APIError:
+            answer_placeholder.error(
+                "Medical answer generation failed."
+            )
 
         except Exception as e:
             answer_placeholder.error(f"Connection failed: {e}")
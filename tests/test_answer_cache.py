@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+from src.pipelines.answer_cache import AnswerCache, normalize_question
+
+
+_VECTORS = {
+    "what is diabetes?": [1.0, 0.0, 0.0],
+    "what is diabetes mellitus": [0.99, 0.1, 0.0],
+    "what is asthma?": [0.0, 1.0, 0.0],
+}
+
+
+def _embed(text):
+    return _VECTORS[text.lower()]
+
+
+def _cache(**overrides):
+    params = dict(
+        max_entries=10,
+        max_bytes=1024 * 1024,
+        ttl_seconds=60,
+        similarity_threshold=0.95,
+        embed_fn=_embed,
+    )
+    params.update(overrides)
+    return AnswerCache(**params)
+
+
+def test_normalize_question():
+    assert normalize_question("  What   is Diabetes?? ") == "what is diabetes"
+
+
+def test_exact_and_semantic_tiers():
+    cache = _cache()
+    cache.put("What is diabetes?", 4, {"answer": "A metabolic disease."})
+
+    result, tier, _ = cache.get("what is DIABETES?", 4)
+    assert tier == "exact"
+    assert result["answer"] == "A metabolic disease."
+
+    result, tier, similarity = cache.get("What is diabetes mellitus", 4)
+    assert tier == "semantic"
+    assert similarity >= 0.95
+
+    assert cache.get("What is asthma?", 4) is None
+    assert cache.get("What is diabetes mellitus", 8) is None
+
+
+def test_lru_eviction_by_entry_count():
+    cache = _cache(max_entries=1, embed_fn=None)
+    cache.put("q1", 4, {"answer": "a1"})
+    cache.put("q2", 4, {"answer": "a2"})
+
+    assert cache.get("q1", 4) is None
+    assert cache.get("q2", 4)[0]["answer"] == "a2"
+
+
+def test_version_change_invalidates():
+    version = {"value": 1}
+    cache = _cache(embed_fn=None, version_fn=lambda: version["value"], version_check_seconds=0)
+
+    cache.get("q1", 4)
+    cache.put("q1", 4, {"answer": "a1"})
+    assert cache.get("q1", 4) is not None
+
+    version["value"] = 2
+    assert cache.get("q1", 4) is None
+
+
+def test_evicted_rows_leave_the_semantic_tier_and_are_reused():
+    cache = _cache(max_entries=1)
+    cache.put("What is diabetes?", 4, {"answer": "a1"})
+    cache.put("What is asthma?", 4, {"answer": "a2"})
+
+    assert cache.get("What is diabetes mellitus", 4) is None
+    assert len(cache._row_keys) == 2
+
+    cache.put("What is diabetes?", 4, {"answer": "a3"})
+    result, tier, _ = cache.get("What is diabetes mellitus", 4)
+    assert (result["answer"], tier) == ("a3", "semantic")
+    assert len(cache._row_keys) == 2
+
+
+def test_async_api_uses_the_given_vector_and_checks_version_off_loop():
+    threads = []
+
+    def version():
+        threads.append(threading.current_thread())
+        return 1
+
+    def embed(text):
+        raise AssertionError("the async API must not embed")
+
+    cache = _cache(embed_fn=embed, version_fn=version, version_check_seconds=0)
+
+    async def main():
+        await cache.aput("What is diabetes?", 4, {"answer": "a1"}, _VECTORS["what is diabetes?"])
+        hit = await cache.aget("What is diabetes mellitus", 4, _VECTORS["what is diabetes mellitus"])
+        miss = await cache.aget("What is asthma?", 4)
+        return hit, miss, threading.current_thread()
+
+    hit, miss, loop_thread = asyncio.run(main())
+
+    assert hit[:2] == ({"answer": "a1"}, "semantic")
+    assert miss is None
+    assert threads and loop_thread not in threads
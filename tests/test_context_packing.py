@@ -0,0 +1,47 @@
+from langchain_core.documents import Document
+
+from src.pipelines.context_packing import pack_context
+from src.utils.tokens import count_tokens
+
+
+def _doc(text, page=1, source="book.pdf"):
+    return Document(page_content=text, metadata={"page": page, "source": source})
+
+
+_PARAGRAPH = " ".join(f"sentence{i} about insulin resistance." for i in range(60))
+
+
+def test_overlapping_neighbours_are_merged():
+    first, second = _PARAGRAPH[:900], _PARAGRAPH[750:]
+
+    context = pack_context([_doc(second), _doc(first)], token_budget=10_000)
+
+    assert context.passages == 1
+    assert context.input_docs == 2
+    assert _PARAGRAPH in context.text
+
+
+def test_contained_and_duplicate_chunks_are_dropped():
+    context = pack_context(
+        [_doc(_PARAGRAPH), _doc(_PARAGRAPH[100:400]), _doc(_PARAGRAPH)],
+        token_budget=10_000,
+    )
+
+    assert context.passages == 1
+    assert context.sources == [{"source": "book.pdf", "page": 1}]
+
+
+def test_same_text_on_different_pages_is_kept():
+    context = pack_context([_doc("Asthma overview.", page=1), _doc("Asthma overview.", page=2)], token_budget=10_000)
+    assert context.passages == 2
+
+
+def test_budget_is_respected_in_relevance_order():
+    docs = [_doc(_PARAGRAPH, page=page) for page in range(5)]
+
+    context = pack_context(docs, token_budget=300, min_passage_tokens=40)
+
+    assert context.tokens <= 300
+    assert count_tokens(context.text) <= 300 + 5
+    assert context.sources[0]["page"] == 0
+    assert context.dropped
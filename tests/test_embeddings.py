@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+from src.pipelines.embeddings import CachedEmbeddings, DiskEmbeddingCache, MicroBatcher
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_query_lru_counts_hits_and_misses():
+    inner = _CountingEmbeddings()
+    emb = CachedEmbeddings(inner, model="m", max_entries=2)
+
+    assert emb.embed_query("abc") == [3.0, 1.0]
+    assert emb.embed_query("abc") == [3.0, 1.0]
+    assert inner.calls == 1
+
+    emb.embed_query("d")
+    emb.embed_query("ef")  # evicts "abc"
+    emb.embed_query("abc")
+
+    stats = emb.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+
+
+def test_disk_tier_survives_new_process_cache(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+
+    first = CachedEmbeddings(_CountingEmbeddings(), "m", 10, DiskEmbeddingCache(path, 100))
+    first.embed_documents(["one", "three", "one"])
+
+    inner = _CountingEmbeddings()
+    second = CachedEmbeddings(inner, "m", 10, DiskEmbeddingCache(path, 100))
+
+    assert second.embed_documents(["three", "one"]) == [[5.0, 1.0], [3.0, 1.0]]
+    assert inner.calls == 0
+    assert second.stats()["disk_hits"] == 2
+
+
+def test_disk_tier_size_cap(tmp_path):
+    disk = DiskEmbeddingCache(str(tmp_path / "emb.sqlite3"), max_entries=2)
+    emb = CachedEmbeddings(_CountingEmbeddings(), "m", 10, disk)
+
+    emb.embed_documents(["a", "bb", "ccc"])
+
+    count = disk._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    assert count == 2
+
+
+class _SlowBatchFn:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.batches = []
+        self.started = threading.Event()
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.started.set()
+        time.sleep(self.delay)
+        return [[float(len(text))] for text in texts]
+
+
+def test_micro_batcher_coalesces_requests_queued_behind_a_batch():
+    batch_fn = _SlowBatchFn()
+    batcher = MicroBatcher(batch_fn, window_ms=5, max_batch=32, workers=1)
+
+    first = batcher.submit("warm")
+    batch_fn.started.wait()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(batcher, [f"q{i}" for i in range(8)] + ["q0"]))
+    first.result()
+    batcher.close()
+
+    assert results == [[2.0]] * 9
+    assert batch_fn.batches[0] == ["warm"]
+    assert sorted(batch_fn.batches[1]) == sorted(f"q{i}" for i in range(8))
+
+
+def test_micro_batcher_sends_lone_request_without_waiting_for_window():
+    batch_fn = _SlowBatchFn(delay=0)
+    batcher = MicroBatcher(batch_fn, window_ms=500, max_batch=32, workers=1)
+
+    started = time.perf_counter()
+    assert batcher("alone") == [5.0]
+    batcher.close()
+
+    assert time.perf_counter() - started < 0.25
+
+
+def test_micro_batcher_fans_out_errors():
+    def failing(texts):
+        raise RuntimeError("embedding server down")
+
+    batcher = MicroBatcher(failing, window_ms=1, max_batch=4)
+    try:
+        asyncio.run(batcher.acall("q"))
+        raised = False
+    except RuntimeError:
+        raised = True
+    batcher.close()
+
+    assert raised
+
+
+def test_cached_embeddings_route_misses_through_batcher():
+    inner = _CountingEmbeddings()
+    batcher = MicroBatcher(inner.embed_documents, window_ms=1, max_batch=8)
+    emb = CachedEmbeddings(inner, model="m", max_entries=10, batcher=batcher)
+
+    assert asyncio.run(emb.aembed_query("abc")) == [3.0, 1.0]
+    assert emb.embed_query("abc") == [3.0, 1.0]
+    batcher.close()
+
+    assert inner.calls == 1
+    assert emb.stats()["batching"]["batches"] == 1
+
+
+def test_async_query_keeps_the_disk_tier_off_the_event_loop(tmp_path):
+    class _RecordingDiskCache(DiskEmbeddingCache):
+        threads = []
+
+        def get_many(self, keys):
+            self.threads.append(threading.current_thread())
+            return super().get_many(keys)
+
+        def put_many(self, items):
+            self.threads.append(threading.current_thread())
+            return super().put_many(items)
+
+    disk = _RecordingDiskCache(str(tmp_path / "emb.sqlite3"), max_entries=10)
+    emb = CachedEmbeddings(_CountingEmbeddings(), "m", 10, disk)
+
+    async def main():
+        first = await emb.aembed_query("abc")
+        emb._memory.clear()
+        second = await emb.aembed_query("abc")
+        return first, second, threading.current_thread()
+
+    first, second, loop_thread = asyncio.run(main())
+
+    assert first == second == [3.0, 1.0]
+    assert emb.stats()["disk_hits"] == 1
+    assert len(disk.threads) == 3
+    assert loop_thread not in disk.threads
@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.evaluation.scoring import gate_report, is_refusal, score_question, similarity_matrix
+
+
+def test_similarity_matrix_matches_pairwise_cosine():
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=(3, 8)), rng.normal(size=(5, 8))
+
+    expected = [
+        [float(x @ y / (np.linalg.norm(x) * np.linalg.norm(y))) for y in b]
+        for x in a
+    ]
+
+    assert np.allclose(similarity_matrix(a, b), expected, atol=1e-5)
+
+
+def test_score_question_is_mean_relevance_and_max_groundedness():
+    docs = [[1.0, 0.0], [0.0, 1.0]]
+
+    relevance, groundedness = score_question([1.0, 0.0], [0.0, 2.0], docs)
+
+    assert relevance == 0.5
+    assert groundedness == 1.0
+    assert score_question([1.0, 0.0], [1.0, 0.0], []) == (0.0, 0.0)
+
+
+def test_is_refusal():
+    assert is_refusal("I cannot answer this based on the provided medical reference.")
+    assert not is_refusal("Diabetes is a metabolic disease.")
+
+
+def test_gate_report_compares_gate_with_llm_refusals():
+    report = gate_report(gate_flags=[1, 1, 0, 0], refusal_flags=[1, 0, 1, 0])
+
+    assert report == {"gate_fire_rate": 0.5, "gate_precision": 0.5, "gate_recall": 0.5}
+    assert gate_report([0, 0], [0, 0]) == {"gate_fire_rate": 0.0, "gate_precision": None, "gate_recall": None}
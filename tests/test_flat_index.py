@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from src.pipelines.flat_index import FlatVectorStore, export_chroma_to_flat_index
+
+
+class _HashEmbeddings(Embeddings):
+    """Deterministic pseudo-random unit vectors per text."""
+
+    def __init__(self, dim=32):
+        self.dim = dim
+
+    def embed_query(self, text):
+        # hashlib, not hash(): str hashes are salted per process
+        rng = np.random.default_rng(int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16))
+        vector = rng.normal(size=self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+_TEXTS = [f"chunk {i} about condition {i % 7}" for i in range(200)]
+_METAS = [{"page": i // 10, "source": "book.pdf"} for i in range(200)]
+
+
+def test_exact_top_k_matches_brute_force():
+    embeddings = _HashEmbeddings()
+    store = FlatVectorStore.from_texts(_TEXTS, embeddings, _METAS)
+
+    query = embeddings.embed_query("what is condition 3")
+    expected = np.argsort(-(np.asarray(embeddings.embed_documents(_TEXTS)) @ query))[:5]
+
+    docs = store.similarity_search("what is condition 3", k=5)
+    assert [doc.page_content for doc in docs] == [_TEXTS[i] for i in expected]
+
+
+def test_quantized_dtypes_keep_the_ranking():
+    embeddings = _HashEmbeddings()
+    exact = [doc.id for doc in FlatVectorStore.from_texts(_TEXTS, embeddings).similarity_search("q", k=3)]
+
+    for dtype in ("float16", "int8"):
+        store = FlatVectorStore.from_texts(_TEXTS, embeddings, dtype=dtype)
+        assert [doc.id for doc in store.similarity_search("q", k=3)] == exact
+
+
+def test_filter_and_lookup_by_id():
+    store = FlatVectorStore.from_texts(_TEXTS, _HashEmbeddings(), _METAS, ids=[f"id{i}" for i in range(200)])
+
+    docs = asyncio.run(store.asimilarity_search("q", k=20, filter={"page": 4}))
+    assert len(docs) == 10
+    assert all(doc.metadata["page"] == 4 for doc in docs)
+
+    docs = store.similarity_search("q", k=50, filter={"$or": [{"page": {"$in": [1, 2]}}, {"page": {"$gte": 19}}]})
+    assert len(docs) == 30
+    assert {doc.metadata["page"] for doc in docs} == {1, 2, 19}
+
+    assert [doc.page_content for doc in store.get_by_ids(["id7", "missing"])] == [_TEXTS[7]]
+
+    for page in range(40):
+        store.similarity_search("q", k=1, filter={"page": page})
+    assert len(store._filter_masks) == 32
+
+
+def test_export_from_chroma_matches_chroma_results(tmp_path):
+    embeddings = _HashEmbeddings()
+    chroma = Chroma(persist_directory=str(tmp_path / "chroma"), embedding_function=embeddings)
+    chroma.add_texts(_TEXTS, metadatas=_METAS, ids=[f"id{i}" for i in range(200)])
+
+    path = str(tmp_path / "flat")
+    export_chroma_to_flat_index(chroma, path, batch_size=64)
+    flat = FlatVectorStore.load(path, embeddings)
+
+    assert FlatVectorStore.stored_dtype(path) == "float32"
+    assert isinstance(flat.vectors, np.memmap)
+
+    for question in ["condition 1", "chunk 42", "unrelated words"]:
+        expected = [doc.id for doc in chroma.similarity_search(question, k=4)]
+        assert [doc.id for doc in flat.similarity_search(question, k=4)] == expected
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.pipelines import rag_chain
+from src.pipelines.generation_scheduler import GenerationScheduler
+from src.utils.exceptions import AdmissionError
+from scripts.benchmarks.stand_ins import stand_ins
+
+
+DEADLINES = {"interactive": 1.0, "standard": 1.0, "batch": 1.0}
+
+
+def test_freed_slot_goes_to_the_highest_priority_waiter():
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=10, deadlines=DEADLINES)
+    order = []
+
+    async def generate(priority):
+        async with scheduler.aslot(priority):
+            order.append(priority)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        async with scheduler.aslot("standard"):
+            waiters = [asyncio.create_task(generate(p)) for p in ("batch", "standard", "interactive")]
+            await asyncio.sleep(0.01)
+            assert scheduler.waiting == 3
+        await asyncio.gather(*waiters)
+
+    asyncio.run(main())
+
+    assert order == ["interactive", "standard", "batch"]
+    assert scheduler.active == 0
+
+
+def test_full_queue_and_expired_deadline_are_rejected():
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=1, deadlines={**DEADLINES, "batch": 0.05})
+
+    async def main():
+        async with scheduler.aslot("interactive"):
+            queued = asyncio.create_task(scheduler.aslot("batch").__aenter__())
+            await asyncio.sleep(0)
+
+            with pytest.raises(AdmissionError) as full:
+                async with scheduler.aslot("interactive"):
+                    pass
+
+            with pytest.raises(AdmissionError) as late:
+                await queued
+
+        return full.value, late.value
+
+    full, late = asyncio.run(main())
+
+    assert (full.status_code, late.status_code) == (429, 503)
+    assert full.retry_after >= 1
+    assert scheduler.active == 0 and scheduler.waiting == 0
+
+
+def test_threads_share_the_concurrency_limit():
+    scheduler = GenerationScheduler(max_concurrency=2, max_queue=10, deadlines=DEADLINES)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def generate():
+        with scheduler.slot("batch"):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=generate) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+    assert scheduler.active == 0
+
+
+def test_saturated_llm_returns_429_with_retry_after():
+    from app.main import app
+
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=0, deadlines=DEADLINES)
+
+    async def main():
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                async with scheduler.aslot("interactive"):
+                    return await client.post("/ask-stream", json={"question": "What is asthma?"})
+
+    with stand_ins(tokens_per_second=0, first_token_latency=0, answer_tokens=3, embed_latency=0, dim=16, chunks=20):
+        rag_chain._scheduler = scheduler
+        response = asyncio.run(main())
+
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_head_of_line_is_admitted_when_generations_outlast_the_deadline():
+    now = [0.0]
+    scheduler = GenerationScheduler(
+        max_concurrency=1, max_queue=10, deadlines={**DEADLINES, "interactive": 10.0}, clock=lambda: now[0]
+    )
+    # one finished generation took 12 s, longer than the interactive deadline
+    with scheduler.slot("interactive"):
+        now[0] += 12.0
+
+    async def main():
+        async with scheduler.aslot("interactive"):
+            # empty queue: the first waiter queues instead of failing fast
+            first = asyncio.create_task(scheduler.aslot("interactive").__aenter__())
+            await asyncio.sleep(0)
+            assert scheduler.waiting == 1
+
+            # with one ahead, the estimate is ~12 s + 12 s and the Retry-After matches it
+            with pytest.raises(AdmissionError) as late:
+                async with scheduler.aslot("interactive"):
+                    pass
+
+            first.cancel()
+        return late.value
+
+    rejected = asyncio.run(main())
+
+    assert rejected.status_code == 503
+    assert rejected.retry_after == 24
+    assert scheduler.active == 0 and scheduler.waiting == 0
@@ -0,0 +1,94 @@
+import asyncio
+
+from src.pipelines.history import HistoryCompactor, format_history
+
+
+def _turns(n):
+    history = []
+    for i in range(n):
+        history.append({"role": "user", "message": f"question {i}"})
+        history.append({"role": "assistant", "message": f"answer {i}"})
+    return history
+
+
+class _FakeStore:
+    def __init__(self):
+        self.history = []
+        self.summary = ""
+
+    async def save_turn(self, session_id, user_message, assistant_message):
+        self.history.append({"role": "user", "message": user_message})
+        self.history.append({"role": "assistant", "message": assistant_message})
+        return len(self.history)
+
+    async def get_history(self, session_id, last_n=None):
+        return self.history[-last_n:] if last_n else list(self.history)
+
+    async def get_summary(self, session_id):
+        return self.summary
+
+    async def apply_compaction(self, session_id, summary, compacted):
+        self.history = self.history[len(compacted):]
+        self.summary = summary
+        return len(compacted)
+
+
+def test_format_history_keeps_newest_turns_within_budget():
+    text = format_history(_turns(50), token_budget=40)
+
+    assert "answer 49" in text
+    assert "question 0" not in text
+
+
+def test_format_history_includes_summary():
+    text = format_history(_turns(1), summary="patient asked about metformin")
+
+    assert text.startswith("\nSUMMARY OF EARLIER CONVERSATION: patient asked about metformin")
+    assert text.endswith("ASSISTANT: answer 0")
+
+
+def test_compactor_folds_overflow_into_summary():
+    calls = []
+
+    async def summarize(previous, turns):
+        calls.append((previous, turns))
+        return f"summary of {len(turns)} messages"
+
+    store = _FakeStore()
+
+    async def scenario():
+        compactor = HistoryCompactor(summarize, keep_last=4, compact_every=4)
+
+        for i in range(3):
+            compactor.maybe_compact(store, "s1", await store.save_turn("s1", f"question {i}", f"answer {i}"))
+        await compactor.aclose()
+
+        # 6 messages < keep_last + compact_every, nothing to do yet
+        assert calls == []
+
+        compactor.maybe_compact(store, "s1", await store.save_turn("s1", "question 3", "answer 3"))
+        await compactor.aclose()
+
+    asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert store.summary == "summary of 4 messages"
+    assert [turn["message"] for turn in store.history] == ["question 2", "answer 2", "question 3", "answer 3"]
+
+
+def test_compaction_failure_keeps_history():
+    async def summarize(previous, turns):
+        raise RuntimeError("llm down")
+
+    store = _FakeStore()
+    store.history = _turns(5)
+
+    async def scenario():
+        compactor = HistoryCompactor(summarize, keep_last=2, compact_every=2)
+        compactor.maybe_compact(store, "s1", len(store.history))
+        await compactor.aclose()
+
+    asyncio.run(scenario())
+
+    assert len(store.history) == 10
+    assert store.summary == ""
@@ -0,0 +1,88 @@
+import pytest
+from langchain_core.documents import Document
+
+from src.pipelines.hybrid_retriever import HybridRetriever, matches_filter, reciprocal_rank_fusion
+from src.pipelines.lexical_index import LexicalIndex, build_lexical_index
+
+
+_CORPUS = {
+    "c1": "Metformin is first-line therapy for type 2 diabetes mellitus.",
+    "c2": "Asthma is a chronic inflammatory disease of the airways.",
+    "c3": "HbA1c reflects average glucose over three months in diabetes.",
+    "c4": "Salbutamol relieves bronchospasm in acute asthma.",
+}
+
+
+class _StubVectorStore:
+    def _similarity_search_with_relevance_scores(self, query, k=4, filter=None):
+        # pretend the embedding model only ever finds the asthma chunks
+        hits = [(Document(id=i, page_content=_CORPUS[i], metadata={"page": 1}), score) for i, score in [("c2", 0.4), ("c4", 0.3)]]
+        return hits[:k]
+
+    def get_by_ids(self, ids):
+        return [Document(id=i, page_content=_CORPUS[i], metadata={"page": 2}) for i in ids]
+
+
+def _index(tmp_path):
+    path = str(tmp_path / "lexical")
+    build_lexical_index(list(_CORPUS), list(_CORPUS.values()), path)
+    return LexicalIndex(path)
+
+
+def test_bm25_ranks_exact_terms(tmp_path):
+    index = _index(tmp_path)
+
+    hits = index.search("metformin dosing", k=3)
+    assert [doc_id for doc_id, _ in hits] == ["c1"]
+
+    hits = index.search("diabetes", k=3)
+    assert {doc_id for doc_id, _ in hits} == {"c1", "c3"}
+
+    assert index.search("zzz unknown", k=3) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], rrf_k=60)
+    assert fused[0][0] == "b"
+    assert {doc_id for doc_id, _ in fused} == {"a", "b", "c", "d"}
+
+
+def test_hybrid_retriever_pulls_lexical_only_hits(tmp_path):
+    retriever = HybridRetriever(
+        vectorstore=_StubVectorStore(),
+        lexical_index=_index(tmp_path),
+        k=3,
+        fetch_k=4,
+    )
+
+    docs = retriever.invoke("metformin")
+    assert "c1" in [doc.id for doc in docs]
+    assert len(docs) == 3
+
+
+def test_hybrid_scores_come_from_the_vector_side(tmp_path):
+    retriever = HybridRetriever(
+        vectorstore=_StubVectorStore(),
+        lexical_index=_index(tmp_path),
+        k=3,
+        fetch_k=4,
+    )
+
+    scores = {doc.id: score for doc, score in retriever.scored_documents("metformin")}
+
+    assert scores["c2"] == 0.4
+    # BM25-only hit: fetched by ID, never scored by the vector search
+    assert scores["c1"] is None
+
+
+def test_operator_filters_are_applied_locally(tmp_path):
+    def ids(filter):
+        retriever = HybridRetriever(vectorstore=_StubVectorStore(), lexical_index=_index(tmp_path), k=4, fetch_k=4, filter=filter)
+        return {doc.id for doc in retriever.invoke("metformin asthma")}
+
+    # vector hits are on page 1, BM25-only hits fetched by ID on page 2
+    assert ids({"$or": [{"page": 1}, {"page": {"$gt": 5}}]}) == {"c2", "c4"}
+    assert ids({"$and": [{"page": {"$in": [2, 3]}}, {"page": {"$ne": 3}}]}) == {"c1"}
+
+    with pytest.raises(ValueError):
+        matches_filter({"page": 1}, {"page": {"$like": "1"}})
@@ -0,0 +1,25 @@
+from scripts.benchmarks.import_time import measure
+from src.utils.lazy import LazyImport
+
+
+# wall-clock budgets live in the benchmark script (`--check`); here only the
+# structural property is asserted, in a fresh interpreter per module
+def test_api_import_defers_heavy_clients():
+    result = measure("app.main", runs=1)
+
+    assert result["deferred_loaded"] == [], f"imported at startup: {result['deferred_loaded']}"
+
+
+def test_cli_retrieval_import_skips_chroma_and_ollama():
+    result = measure("src.pipelines.retrieval", runs=1)
+
+    assert result["deferred_loaded"] == []
+
+
+def test_lazy_import_resolves_on_first_use():
+    lazy_join = LazyImport("os.path", "join")
+
+    assert "not loaded" in repr(lazy_join)
+    assert lazy_join("a", "b").replace("\\", "/") == "a/b"
+    assert lazy_join.__name__ == "join"
+    assert "(loaded)" in repr(lazy_join)
@@ -0,0 +1,68 @@
+import types
+
+from langchain_core.documents import Document
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from src.pipelines.ingestion import discover_pdf_paths, load_pdf_documents, split_documents
+
+
+def test_discover_pdf_paths_accepts_dir_glob_and_file(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ["b.pdf", "a.pdf", "notes.txt", "sub/c.pdf"]:
+        (tmp_path / name).write_bytes(b"")
+
+    expected = [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf"), str(tmp_path / "sub" / "c.pdf")]
+
+    assert discover_pdf_paths(str(tmp_path)) == expected
+    assert discover_pdf_paths(str(tmp_path / "*.pdf")) == expected[:2]
+    assert discover_pdf_paths(str(tmp_path / "a.pdf")) == expected[:1]
+
+
+def test_split_documents_streams_from_generator():
+    pages = (
+        Document(page_content=f"page {i} " + "word " * 400, metadata={"source": "book.pdf", "page": i})
+        for i in range(3)
+    )
+
+    chunks = split_documents(pages)
+    assert isinstance(chunks, types.GeneratorType)
+
+    chunks = list(chunks)
+    assert len(chunks) > 3
+    assert len({chunk.metadata["chunk_id"] for chunk in chunks}) == len(chunks)
+    assert [chunk.metadata["page"] for chunk in chunks] == sorted(chunk.metadata["page"] for chunk in chunks)
+
+
+def _write_pdf(path, texts):
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for text in texts:
+        page = writer.add_blank_page(width=300, height=200)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)}),
+        })
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 20 100 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_load_pdf_documents_in_process_pool_keeps_page_order(tmp_path):
+    paths = [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+    _write_pdf(paths[0], [f"alpha {i}" for i in range(3)])
+    _write_pdf(paths[1], [f"beta {i}" for i in range(2)])
+
+    pages = list(load_pdf_documents(paths, max_workers=2, pages_per_task=1))
+
+    assert [page.page_content for page in pages] == ["alpha 0", "alpha 1", "alpha 2", "beta 0", "beta 1"]
+    assert [(page.metadata["source"], page.metadata["page"]) for page in pages] == [
+        (paths[0], 0), (paths[0], 1), (paths[0], 2), (paths[1], 0), (paths[1], 1),
+    ]
+    assert {page.metadata["total_pages"] for page in pages[:3]} == {3}
+    assert [page.metadata["page_label"] for page in pages[3:]] == ["1", "2"]
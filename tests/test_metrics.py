@@ -0,0 +1,65 @@
+import asyncio
+
+from src.utils import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo latency", ("stage",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "pack")
+
+    text = registry.render()
+
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="pack",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="pack",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="pack",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="pack"} 3' in text
+
+
+def test_spans_and_stream_timer_fill_the_request_trace():
+    before = metrics.STAGE_SECONDS.count("ttft")
+    token = metrics._trace.set({})
+    try:
+        with metrics.span("pack"):
+            pass
+
+        timer = metrics.StreamTimer()
+        for _ in range(3):
+            timer.tick()
+        generation_time = timer.finish()
+
+        trace = metrics.current_trace()
+    finally:
+        metrics._trace.reset(token)
+
+    assert set(trace) == {"pack", "ttft", "decode"}
+    assert 0 <= timer.ttft <= generation_time
+    assert metrics.STAGE_SECONDS.count("ttft") == before + 1
+
+
+def test_middleware_records_route_status_and_first_byte():
+    class Route:
+        path = "/items/{item_id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        metrics.observe_stage("vector_search", 0.01)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    middleware = metrics.MetricsMiddleware(app, slow_request_seconds=0)
+    scope = {"type": "http", "method": "GET", "path": "/items/42"}
+    asyncio.run(middleware(scope, receive, send))
+
+    assert metrics.HTTP_REQUEST_SECONDS.count("GET", "/items/{item_id}", "201") == 1
+    assert metrics.HTTP_FIRST_BYTE_SECONDS.count("GET", "/items/{item_id}") == 1
+    assert metrics.HTTP_IN_FLIGHT.value() == 0
@@ -0,0 +1,86 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from configs import rag_config
+from src.pipelines import rag_chain, retrieval
+from src.pipelines.flat_index import FlatVectorStore
+from scripts.benchmarks.stand_ins import stand_ins
+
+
+class _TableEmbeddings(Embeddings):
+    table = {
+        "q": [1.0, 0.0, 0.0],
+        "close": [0.9, 0.1, 0.0],
+        "far": [0.0, 1.0, 0.0],
+    }
+
+    def embed_query(self, text):
+        return self.table[text]
+
+    def embed_documents(self, texts):
+        return [self.table[text] for text in texts]
+
+
+def test_reranked_results_carry_the_best_relevance_score(monkeypatch):
+    embeddings = _TableEmbeddings()
+    store = FlatVectorStore.from_texts(["close", "far"], embeddings, ids=["close", "far"])
+
+    monkeypatch.setattr(retrieval, "_vectorstore", store)
+    monkeypatch.setattr(retrieval, "_retrievers", {})
+    monkeypatch.setattr(retrieval, "get_embeddings", lambda: embeddings)
+
+    scored = retrieval.retrieve_with_scores("q", k=2)
+    assert [doc.id for doc, _ in scored] == ["close", "far"]
+    assert scored[0][1] > scored[1][1]
+
+    result = retrieval.retrieve_reranked("q", k=1, rerank_mode="none")
+    assert result.top_score == scored[0][1]
+    assert result.stats()["top_score"] == round(scored[0][1], 3)
+
+    async_result = asyncio.run(retrieval.aretrieve_reranked("q", k=1, rerank_mode="mmr", fetch_k=2))
+    assert async_result.top_score == result.top_score
+
+
+def _no_llm():
+    raise AssertionError("the gate should have answered without the LLM")
+
+
+def test_weak_retrieval_is_refused_without_the_llm(monkeypatch):
+    monkeypatch.setattr(rag_config, "REFUSAL_GATE_ENABLED", True)
+    # every relevance score is <= 1, so this gate always fires
+    monkeypatch.setattr(rag_config, "REFUSAL_GATE_MIN_SCORE", 2.0)
+
+    before = rag_chain.GATED_REFUSALS.value("rag")
+
+    async def ask():
+        return [event async for event in rag_chain.astream_rag_answer("What is asthma?", k=2, use_cache=False)]
+
+    with stand_ins(tokens_per_second=0, first_token_latency=0, answer_tokens=3, embed_latency=0, dim=16, chunks=20):
+        monkeypatch.setattr(rag_chain, "get_llm", _no_llm)
+
+        events = asyncio.run(ask())
+        result = rag_chain.build_rag_answer("What is gout?", k=2, use_cache=False)
+
+    text = "".join(event["text"] for event in events if event["type"] == "token")
+    assert text == rag_chain.REFUSAL_ANSWER
+    assert events[-1]["gated"] is True
+    assert result["answer"] == rag_chain.REFUSAL_ANSWER and result["gated"] and result["sources"] == []
+    assert result["timing"]["generation_time"] == 0.0
+    assert rag_chain.GATED_REFUSALS.value("rag") - before == 2
+
+
+def test_gate_can_be_overridden_and_skips_chat_by_default(monkeypatch):
+    monkeypatch.setattr(rag_config, "REFUSAL_GATE_ENABLED", True)
+    monkeypatch.setattr(rag_config, "REFUSAL_GATE_MIN_SCORE", 2.0)
+
+    async def chat():
+        return [event async for event in rag_chain.astream_chat_answer("And its treatment?", history=[], k=2)]
+
+    with stand_ins(tokens_per_second=0, first_token_latency=0, answer_tokens=3, embed_latency=0, dim=16, chunks=20):
+        shadow = rag_chain.build_rag_answer("What is gout?", k=2, use_cache=False, refusal_gate=False)
+        chat_events = asyncio.run(chat())
+
+    assert shadow["answer"] != rag_chain.REFUSAL_ANSWER and "gated" not in shadow
+    assert rag_chain.gate_refuses(shadow["rerank"]["top_score"])
+    assert chat_events[-1]["type"] == "done" and "gated" not in chat_events[-1]
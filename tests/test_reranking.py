@@ -0,0 +1,82 @@
+import asyncio
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from configs import retrieval_config
+from src.pipelines import reranking, retrieval
+from src.pipelines.flat_index import FlatVectorStore
+
+
+def _doc(text, doc_id=None):
+    return Document(page_content=text, id=doc_id, metadata={"page": 1, "source": "book.pdf"})
+
+
+def test_mmr_skips_near_duplicates():
+    query = [1.0, 0.0, 0.0]
+    vectors = [
+        [1.0, 0.10, 0.0],   # best match
+        [0.99, 0.14, 0.0],  # near-duplicate of the best match
+        [0.80, 0.0, 0.60],  # less relevant but distinct
+    ]
+
+    assert reranking.mmr_select(query, vectors, k=2, lambda_mult=0.3) == [0, 2]
+    assert reranking.mmr_select(query, vectors, k=2, lambda_mult=1.0) == [0, 1]
+
+
+def test_none_mode_keeps_retrieval_order():
+    docs = [_doc(str(i)) for i in range(5)]
+    result = reranking.rerank("q", docs, 3, "none", query_vector_fn=None, doc_vectors_fn=None)
+
+    assert result.docs == docs[:3]
+    assert result.stats() == {"mode": "none", "candidates": 5, "selected": 3, "rerank_time": 0.0}
+
+
+def test_cross_encoder_falls_back_to_mmr(monkeypatch):
+    monkeypatch.setattr(reranking, "get_cross_encoder", lambda: None)
+    docs = [_doc("a"), _doc("b")]
+
+    result = reranking.rerank(
+        "q", docs, 1, "cross_encoder",
+        query_vector_fn=lambda: [1.0, 0.0],
+        doc_vectors_fn=lambda candidates: np.array([[0.0, 1.0], [1.0, 0.0]]),
+    )
+
+    assert result.mode == "mmr"
+    assert [doc.page_content for doc in result.docs] == ["b"]
+
+
+class _TableEmbeddings(Embeddings):
+    table = {
+        "q": [1.0, 0.0, 0.0],
+        "dose a": [1.0, 0.10, 0.0],
+        "dose a again": [0.99, 0.14, 0.0],
+        "side effects": [0.80, 0.0, 0.60],
+        "unrelated": [0.0, 0.0, 1.0],
+    }
+
+    def embed_query(self, text):
+        return self.table[text]
+
+    def embed_documents(self, texts):
+        return [self.table[text] for text in texts]
+
+
+def test_retrieve_reranked_overfetches_and_uses_stored_vectors(monkeypatch):
+    embeddings = _TableEmbeddings()
+    texts = ["dose a", "dose a again", "side effects", "unrelated"]
+    store = FlatVectorStore.from_texts(texts, embeddings, ids=texts)
+
+    monkeypatch.setattr(retrieval, "_vectorstore", store)
+    monkeypatch.setattr(retrieval, "_retrievers", {})
+    monkeypatch.setattr(retrieval, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(retrieval_config, "MMR_LAMBDA", 0.3)
+
+    result = asyncio.run(retrieval.aretrieve_reranked("q", k=2, rerank_mode="mmr", fetch_k=3))
+
+    assert result.candidates == 3
+    assert [doc.id for doc in result.docs] == ["dose a", "side effects"]
+
+    plain = retrieval.retrieve_reranked("q", k=2, rerank_mode="none")
+    assert [doc.id for doc in plain.docs] == ["dose a", "dose a again"]
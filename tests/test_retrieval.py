@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+from configs import retrieval_config
+from src.pipelines import retrieval
+from src.pipelines.flat_index import FlatVectorStore, write_flat_index
+from src.pipelines.lexical_index import LexicalIndex, build_lexical_index
+
+
+class _StubVectorStore:
+    def __init__(self):
+        self.built = []
+
+    def as_retriever(self, search_type="similarity", search_kwargs=None):
+        self.built.append((search_type, search_kwargs))
+        return {"search_type": search_type, "search_kwargs": search_kwargs}
+
+
+def test_retriever_registry_is_keyed_per_k(monkeypatch):
+    store = _StubVectorStore()
+    monkeypatch.setattr(retrieval, "_vectorstore", store)
+    monkeypatch.setattr(retrieval, "_retrievers", {})
+
+    r4 = retrieval.get_retriever(k=4)
+    r8 = retrieval.get_retriever(k=8)
+
+    assert r4["search_kwargs"] == {"k": 4}
+    assert r8["search_kwargs"] == {"k": 8}
+    assert retrieval.get_retriever(k=4) is r4
+    assert len(store.built) == 2
+
+
+def test_retriever_registry_keys_on_filter(monkeypatch):
+    store = _StubVectorStore()
+    monkeypatch.setattr(retrieval, "_vectorstore", store)
+    monkeypatch.setattr(retrieval, "_retrievers", {})
+
+    a = retrieval.get_retriever(k=4, filter={"page": 1, "source": "x"})
+    b = retrieval.get_retriever(k=4, filter={"source": "x", "page": 1})
+
+    assert a is b
+    assert a["search_kwargs"]["filter"] == {"page": 1, "source": "x"}
+
+
+def test_flat_index_rebuilt_on_disk_is_reloaded(monkeypatch, tmp_path):
+    path = str(tmp_path / "flat")
+    write_flat_index(path, ["a", "b"], ["alpha", "beta"], [{}, {}], [[1.0, 0.0], [0.0, 1.0]])
+
+    monkeypatch.setattr(retrieval_config, "VECTOR_BACKEND", "flat")
+    monkeypatch.setattr(retrieval_config, "FLAT_INDEX_PATH", path)
+    monkeypatch.setattr(retrieval_config, "FLAT_INDEX_RELOAD_CHECK_SECONDS", 0)
+    monkeypatch.setattr(retrieval, "get_embeddings", lambda: None)
+    monkeypatch.setattr(retrieval, "_vectorstore", None)
+    monkeypatch.setattr(retrieval, "_retrievers", {})
+
+    before = retrieval.get_collection_fingerprint()
+    retriever = retrieval.get_retriever(k=1, search_type="similarity")
+    assert retrieval.get_collection_fingerprint() == before
+
+    write_flat_index(path, ["a", "b", "c"], ["alpha", "beta", "gamma"], [{}, {}, {}], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+
+    assert retrieval.get_collection_fingerprint() != before
+    assert retrieval._vectorstore.ids == ["a", "b", "c"]
+    assert retrieval.get_retriever(k=1, search_type="similarity") is not retriever
+
+
+def test_async_reload_runs_off_the_event_loop(monkeypatch, tmp_path):
+    path = str(tmp_path / "flat")
+    write_flat_index(path, ["a"], ["alpha"], [{}], [[1.0, 0.0]])
+
+    monkeypatch.setattr(retrieval_config, "FLAT_INDEX_RELOAD_CHECK_SECONDS", 0)
+    monkeypatch.setattr(retrieval, "get_embeddings", lambda: None)
+    monkeypatch.setattr(retrieval, "_vectorstore", FlatVectorStore.load(path, None))
+    monkeypatch.setattr(retrieval, "_retrievers", {})
+
+    write_flat_index(path, ["a", "b"], ["alpha", "beta"], [{}, {}], [[1.0, 0.0], [0.0, 1.0]])
+
+    threads = []
+    load = FlatVectorStore.load
+
+    def recording_load(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return load(*args, **kwargs)
+
+    monkeypatch.setattr(FlatVectorStore, "load", recording_load)
+
+    async def main():
+        await retrieval._areload_if_rebuilt()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(main())
+
+    assert retrieval._vectorstore.ids == ["a", "b"]
+    assert threads and loop_thread not in threads
+
+
+def test_lexical_index_rebuilt_on_disk_is_reloaded(monkeypatch, tmp_path):
+    path = str(tmp_path / "lexical")
+    build_lexical_index(["a"], ["metformin dosing"], path)
+
+    monkeypatch.setattr(retrieval_config, "FLAT_INDEX_RELOAD_CHECK_SECONDS", 0)
+    monkeypatch.setattr(retrieval, "_lexical_index", LexicalIndex(path))
+    monkeypatch.setattr(retrieval, "_retrievers", {"stale": object()})
+
+    build_lexical_index(["b", "c"], ["metformin therapy", "asthma"], path)
+    retrieval._reload_if_rebuilt()
+
+    assert [doc_id for doc_id, _ in retrieval._lexical_index.search("metformin", 5)] == ["b"]
+    assert retrieval._retrievers == {}
@@ -0,0 +1,33 @@
+import asyncio
+
+from src.pipelines import rag_chain, retrieval
+from scripts.benchmarks.service_load import run_load, summarize
+from scripts.benchmarks.stand_ins import stand_ins
+
+
+def test_load_harness_drives_every_endpoint_with_stand_ins():
+    from app.main import app
+
+    original_vectorstore, original_llm = retrieval._vectorstore, rag_chain._llm
+
+    async def drive():
+        async with app.router.lifespan_context(app):
+            return {
+                endpoint: await run_load(app, endpoint, requests=6, concurrency=3, sessions=2)
+                for endpoint in ("ask", "ask-stream", "chat")
+            }
+
+    with stand_ins(tokens_per_second=0, first_token_latency=0, answer_tokens=5, embed_latency=0, dim=16, chunks=50):
+        runs = asyncio.run(drive())
+
+    for endpoint, run in runs.items():
+        run["peak_rss_mb"] = 0.0
+        row = summarize([run], endpoint, 3)
+
+        assert row["requests"] == 6
+        assert row["errors"] == 0
+        assert row["ttft_p50_ms"] <= row["latency_p99_ms"]
+
+    # stand-ins are removed again
+    assert retrieval._vectorstore is original_vectorstore
+    assert rag_chain._llm is original_llm
@@ -0,0 +1,297 @@
+import asyncio
+import fnmatch
+import json
+
+import redis
+
+from configs import session_config
+from src.utils.session_store import FallbackSessionStore, InMemorySessionStore, RedisSessionStore
+
+
+class _FakeRedisData:
+    """Just enough Redis semantics for RedisSessionStore, with bytes values."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    @staticmethod
+    def _b(value):
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    def get(self, key):
+        value = self.data.get(key)
+        return value if isinstance(value, bytes) else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = self._b(value)
+        if ex:
+            self.ttls[key] = ex
+
+    def rpush(self, key, *values):
+        self.data.setdefault(key, []).extend(self._b(v) for v in values)
+        return len(self.data[key])
+
+    def lpush(self, key, *values):
+        for value in values:
+            self.data.setdefault(key, []).insert(0, self._b(value))
+        return len(self.data[key])
+
+    def lrange(self, key, start, stop):
+        items = self.data.get(key, [])
+        stop = len(items) if stop == -1 else stop + 1
+        return items[start:stop] if start >= 0 else items[max(len(items) + start, 0):stop]
+
+    def ltrim(self, key, start, stop):
+        self.data[key] = self.lrange(key, start, stop)
+
+    def expire(self, key, seconds):
+        if key in self.data:
+            self.ttls[key] = seconds
+
+    def ttl(self, key):
+        return self.ttls.get(key, -1)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+        self.ttls.pop(key, None)
+
+
+class _FakeAsyncRedis:
+    def __init__(self):
+        self.store = _FakeRedisData()
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        async def call(*args, **kwargs):
+            self.round_trips += 1
+            return method(*args, **kwargs)
+
+        return call
+
+    @property
+    def data(self):
+        return self.store.data
+
+    @property
+    def ttls(self):
+        return self.store.ttls
+
+    async def scan_iter(self, match=None, count=None, _type=None):
+        for key in list(self.store.data):
+            if isinstance(self.store.data[key], bytes) and fnmatch.fnmatch(key, match):
+                yield key.encode("utf-8")
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+        self.buffering = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, *keys):
+        self.buffering = False
+
+    async def unwatch(self):
+        pass
+
+    def multi(self):
+        self.buffering = True
+
+    def __getattr__(self, name):
+        method = getattr(self.client.store, name)
+
+        if not self.buffering:
+            async def immediate(*args, **kwargs):
+                return method(*args, **kwargs)
+            return immediate
+
+        def queue(*args, **kwargs):
+            self.queued.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        self.client.round_trips += 1
+        return [method(*args, **kwargs) for method, args, kwargs in self.queued]
+
+
+class _DownStore:
+    name = "redis"
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        async def fail(*args):
+            self.calls += 1
+            raise redis.ConnectionError("connection refused")
+        return fail
+
+
+def test_save_turn_appends_and_reads_tail():
+    async def scenario(store):
+        for i in range(3):
+            length = await store.save_turn("s1", f"question {i}", f"answer {i}")
+
+        assert length == 6
+        assert [m["message"] for m in await store.get_history("s1", last_n=2)] == ["question 2", "answer 2"]
+        assert len(await store.get_history("s1")) == 6
+
+    client = _FakeAsyncRedis()
+    asyncio.run(scenario(RedisSessionStore(client=client)))
+    assert client.ttls["medical_chat:s1:turns"] > 0
+
+    asyncio.run(scenario(InMemorySessionStore()))
+
+
+def test_load_session_is_one_round_trip():
+    client = _FakeAsyncRedis()
+    store = RedisSessionStore(client=client)
+    asyncio.run(store.save_turn("s1", "hi", "hello"))
+    asyncio.run(store.apply_compaction("s1", "greeting exchanged", []))
+
+    client.round_trips = 0
+    history, summary = asyncio.run(store.load_session("s1", last_n=4))
+
+    assert client.round_trips == 1
+    assert summary == "greeting exchanged"
+    assert history[0] == {"role": "user", "message": "hi"}
+
+
+def test_compaction_keeps_turns_written_after_snapshot():
+    async def scenario(store):
+        for i in range(3):
+            await store.save_turn("s1", f"question {i}", f"answer {i}")
+
+        # compactor summarised the first 2 messages, then another turn arrived
+        compacted = (await store.get_history("s1"))[:2]
+        await store.save_turn("s1", "question 3", "answer 3")
+        assert await store.apply_compaction("s1", "summary", compacted) == 2
+
+        messages = [m["message"] for m in await store.get_history("s1")]
+        assert messages[0] == "question 1"
+        assert messages[-1] == "answer 3"
+        assert await store.get_summary("s1") == "summary"
+
+    asyncio.run(scenario(RedisSessionStore(client=_FakeAsyncRedis())))
+    asyncio.run(scenario(InMemorySessionStore()))
+
+
+def test_compaction_only_drops_messages_the_summary_covers(monkeypatch):
+    monkeypatch.setattr(session_config, "SESSION_MAX_MESSAGES", 4)
+
+    async def scenario(store):
+        for i in range(2):
+            await store.save_turn("s1", f"question {i}", f"answer {i}")
+        compacted = (await store.get_history("s1"))[:2]
+
+        # a turn lands mid-summary and the cap trims the compacted pair itself
+        await store.save_turn("s1", "question 2", "answer 2")
+        assert await store.apply_compaction("s1", "summary", compacted) == 0
+
+        compacted = (await store.get_history("s1"))[:4]
+        await store.save_turn("s1", "question 3", "answer 3")
+        # question 1 / answer 1 went to the cap, question 2 / answer 2 to the summary
+        assert await store.apply_compaction("s1", "summary 2", compacted) == 2
+
+        messages = [m["message"] for m in await store.get_history("s1")]
+        assert messages == ["question 3", "answer 3"]
+        assert await store.get_summary("s1") == "summary 2"
+
+    asyncio.run(scenario(RedisSessionStore(client=_FakeAsyncRedis())))
+    asyncio.run(scenario(InMemorySessionStore()))
+
+
+def test_compaction_retries_when_the_list_changes_under_watch():
+    client = _FakeAsyncRedis()
+    store = RedisSessionStore(client=client)
+    conflicts = []
+
+    class _ConflictOncePipeline(_FakePipeline):
+        async def execute(self):
+            if not conflicts:
+                # another writer appends between WATCH and EXEC
+                conflicts.append(client.store.rpush("medical_chat:s1:turns", json.dumps({"role": "user", "message": "late"})))
+                raise redis.WatchError("watched key changed")
+            return await super().execute()
+
+    async def scenario():
+        await store.save_turn("s1", "question 0", "answer 0")
+        compacted = await store.get_history("s1")
+
+        client.pipeline = lambda transaction=True: _ConflictOncePipeline(client)
+        assert await store.apply_compaction("s1", "summary", compacted) == 2
+        return [m["message"] for m in await store.get_history("s1")]
+
+    assert asyncio.run(scenario()) == ["late"]
+    assert len(conflicts) == 1
+
+
+def test_legacy_sessions_are_migrated():
+    client = _FakeAsyncRedis()
+    legacy = [{"role": "user", "message": "old q"}, {"role": "assistant", "message": "old a"}]
+    client.store.set("medical_chat:s1", json.dumps(legacy), ex=500)
+
+    store = RedisSessionStore(client=client)
+    asyncio.run(store.apply_compaction("s2", "unrelated summary", []))
+
+    assert asyncio.run(store.migrate_legacy_keys()) == 1
+    assert asyncio.run(store.get_history("s1")) == legacy
+    assert client.ttls["medical_chat:s1:turns"] == 500
+    assert "medical_chat:s1" not in client.data
+    assert asyncio.run(store.get_summary("s2")) == "unrelated summary"
+
+    # re-running is a no-op
+    assert asyncio.run(store.migrate_legacy_keys()) == 0
+
+
+def test_memory_store_expires_and_evicts_lru():
+    now = [0.0]
+    store = InMemorySessionStore(max_sessions=2, ttl=10, clock=lambda: now[0])
+
+    async def scenario():
+        await store.save_turn("a", "q", "a")
+        await store.save_turn("b", "q", "a")
+        await store.get_history("a")          # touch a, so b is least recent
+        await store.save_turn("c", "q", "a")
+
+        assert len(store) == 2
+        assert await store.get_history("b") == []
+        assert len(await store.get_history("a")) == 2
+
+        now[0] = 11
+        assert await store.get_history("a") == []
+
+    asyncio.run(scenario())
+
+
+def test_fallback_serves_from_memory_and_skips_primary_while_down():
+    now = [0.0]
+    primary = _DownStore()
+    store = FallbackSessionStore(primary, InMemorySessionStore(), retry_after=5, clock=lambda: now[0])
+
+    async def scenario():
+        await store.save_turn("s1", "q", "a")
+        history, _ = await store.load_session("s1")
+        assert len(history) == 2
+        assert store.degraded
+        assert primary.calls == 1
+
+        now[0] = 6
+        await store.get_history("s1")
+        assert primary.calls == 2
+
+    asyncio.run(scenario())
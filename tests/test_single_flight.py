@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.pipelines import rag_chain
+from src.pipelines.generation_scheduler import GenerationScheduler
+from src.pipelines.single_flight import COALESCED, AsyncSingleFlight, AsyncStreamFlight, SingleFlight, StreamFlight
+from scripts.benchmarks.stand_ins import stand_ins
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = AsyncSingleFlight("test-call")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": 42}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("q", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [shared for _, shared in results].count(False) == 1
+    assert all(result == {"answer": 42} for result, _ in results)
+
+
+def test_threads_share_results_and_errors():
+    flight = SingleFlight("test-thread-call")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        raise RuntimeError("ollama down")
+
+    errors = []
+
+    def ask():
+        try:
+            flight.do("q", compute)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=ask) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(errors) == 4
+
+
+def test_late_joiner_replays_then_follows_the_live_stream():
+    flight = AsyncStreamFlight("test-stream")
+
+    async def produce():
+        for i in range(4):
+            yield {"type": "token", "text": str(i)}
+            await asyncio.sleep(0.01)
+        yield {"type": "done"}
+
+    def mark(event):
+        return {**event, "joined": True} if event["type"] == "done" else event
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [event async for event in flight.stream("q", produce, mark)]
+
+    async def main():
+        return await asyncio.gather(collect(0), collect(0.025))
+
+    first, late = asyncio.run(main())
+
+    assert [event.get("text") for event in first] == ["0", "1", "2", "3", None]
+    assert [event.get("text") for event in late] == ["0", "1", "2", "3", None]
+    assert "joined" not in first[-1] and late[-1]["joined"]
+
+
+def test_stream_errors_reach_every_thread():
+    flight = StreamFlight("test-thread-stream")
+
+    def produce():
+        yield {"type": "token", "text": "a"}
+        time.sleep(0.02)
+        raise RuntimeError("boom")
+
+    def consume():
+        with pytest.raises(RuntimeError):
+            list(flight.stream("q", produce))
+
+    threads = [threading.Thread(target=consume) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_duplicate_streamed_questions_run_one_generation():
+    before = COALESCED.value("stream")
+
+    async def ask(question):
+        return [event async for event in rag_chain.astream_rag_answer(question, k=2, use_cache=True)]
+
+    async def main():
+        return await asyncio.gather(*(ask(q) for q in ["What is asthma?"] * 3 + ["what is  ASTHMA?", "What is gout?"]))
+
+    with stand_ins(tokens_per_second=200, first_token_latency=0.02, answer_tokens=5, embed_latency=0, dim=16, chunks=20):
+        streams = asyncio.run(main())
+
+    texts = ["".join(e["text"] for e in events if e["type"] == "token") for events in streams]
+    assert len(set(texts[:4])) == 1
+    assert COALESCED.value("stream") - before == 3
+    assert [events[-1].get("coalesced") for events in streams] == [None, True, True, True, None]
+
+
+def test_answers_are_cached_per_token_budget():
+    with stand_ins(tokens_per_second=0, first_token_latency=0, answer_tokens=5, embed_latency=0, dim=16, chunks=20, answer_cache=True):
+        rag_chain.build_rag_answer("What is gout?", k=2, token_budget=200, refusal_gate=False)
+        same = rag_chain.build_rag_answer("What is gout?", k=2, token_budget=200, refusal_gate=False)
+        larger = rag_chain.build_rag_answer("What is gout?", k=2, token_budget=2000, refusal_gate=False)
+
+    assert same.get("cache_hit") == "exact"
+    assert larger.get("cache_hit") is None
+
+
+def test_abandoned_async_stream_cancels_the_producer_and_frees_its_slot():
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=4, deadlines={"interactive": 1.0, "standard": 1.0, "batch": 1.0})
+    flight = AsyncStreamFlight("test")
+    finished = []
+
+    async def generate():
+        async with scheduler.aslot("standard"):
+            for i in range(1000):
+                yield i
+                await asyncio.sleep(0.001)
+        finished.append(True)
+
+    async def main():
+        first = flight.stream("q", generate)
+        second = flight.stream("q", generate)
+        assert await first.__anext__() == 0
+        assert await second.__anext__() == 0
+
+        # one of two subscribers leaving keeps the generation running
+        await first.aclose()
+        assert await second.__anext__() == 1
+
+        await second.aclose()
+        await asyncio.sleep(0.01)
+        return scheduler.active
+
+    assert asyncio.run(main()) == 0
+    assert finished == []
+
+
+def test_abandoned_thread_stream_closes_the_generator():
+    closed = threading.Event()
+
+    def generate():
+        try:
+            for i in range(1000):
+                yield i
+                time.sleep(0.001)
+        finally:
+            closed.set()
+
+    flight = StreamFlight("test")
+    events = flight.stream("q", generate)
+    assert next(events) == 0
+    events.close()
+
+    assert closed.wait(1.0)
+    assert flight._flights == {}
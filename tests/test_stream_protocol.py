@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+
+import app.main as main
+from src.utils import stream_protocol
+from streamlit_app.api_client import DoneEvent, SourcesEvent, TimingEvent, TokenEvent, parse_event
+
+
+async def _fake_stream(question, k=4, **kwargs):
+    yield stream_protocol.token_event("Line one\n[SOURCES]: not a marker")
+    for event in [
+        stream_protocol.sources_event([{"source": "book.pdf", "page": 3}]),
+        stream_protocol.timing_event(0.1, 0.2),
+        stream_protocol.done_event(cache_hit=None),
+    ]:
+        yield event
+
+
+def _post(path, json, headers=None):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=json, headers=headers or {})
+
+    return asyncio.run(request())
+
+
+def test_ndjson_round_trip_through_typed_client(monkeypatch):
+    monkeypatch.setattr(main, "astream_rag_answer", _fake_stream)
+
+    response = _post("/ask-stream", {"question": "q"})
+    assert response.headers["content-type"].startswith(stream_protocol.NDJSON_MEDIA_TYPE)
+
+    events = [parse_event(line) for line in response.text.splitlines()]
+
+    # marker-like text and newlines inside a token stay inside that token
+    assert events[0] == TokenEvent(text="Line one\n[SOURCES]: not a marker")
+    assert events[1] == SourcesEvent(sources=[{"source": "book.pdf", "page": 3}])
+    assert events[2] == TimingEvent(retrieval=0.1, llm=0.2, total=0.3)
+    assert events[3] == DoneEvent(cache_hit=None)
+
+
+def test_sse_is_served_when_requested(monkeypatch):
+    monkeypatch.setattr(main, "astream_rag_answer", _fake_stream)
+
+    response = _post("/ask-stream", {"question": "q"}, headers={"Accept": "text/event-stream"})
+    assert response.headers["content-type"].startswith(stream_protocol.SSE_MEDIA_TYPE)
+
+    frames = response.text.strip().split("\n\n")
+    assert [frame.split("\n")[0] for frame in frames] == [
+        "event: token", "event: sources", "event: timing", "event: done"
+    ]
+
+
+def test_unknown_events_are_skipped():
+    assert parse_event('{"type": "progress", "pct": 50}') is None
+    assert parse_event('{"type": "done", "cache_hit": "exact", "extra": 1}') == DoneEvent(cache_hit="exact")
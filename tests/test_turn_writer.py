@@ -0,0 +1,79 @@
+import asyncio
+
+from src.pipelines.turn_writer import TurnWriter
+from src.utils.session_store import InMemorySessionStore
+
+
+class _FlakyStore(InMemorySessionStore):
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.batches = []
+
+    async def save_turns(self, turns):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("redis down")
+
+        self.batches.append(len(turns))
+        return await super().save_turns(turns)
+
+
+def test_queued_turns_are_batched_in_order():
+    store = _FlakyStore()
+
+    async def scenario():
+        writer = TurnWriter(store, max_batch=3)
+        for i in range(5):
+            writer.submit("s1", f"question {i}", f"answer {i}")
+
+        writer.start()
+        await writer.aclose()
+        return writer
+
+    writer = asyncio.run(scenario())
+
+    assert store.batches == [3, 2]
+    assert writer.written == 5
+    messages = [m["message"] for m in asyncio.run(store.get_history("s1"))]
+    assert messages[::2] == [f"question {i}" for i in range(5)]
+
+
+def test_failed_writes_are_retried():
+    store = _FlakyStore(failures=2)
+
+    async def scenario():
+        writer = TurnWriter(store, max_retries=3, retry_backoff=0.001)
+        writer.start()
+        writer.submit("s1", "q", "a")
+        await writer.aclose()
+        return writer
+
+    writer = asyncio.run(scenario())
+
+    assert writer.written == 1
+    assert len(asyncio.run(store.get_history("s1"))) == 2
+
+
+def test_turns_are_dropped_after_last_retry():
+    store = _FlakyStore(failures=10)
+
+    async def scenario():
+        writer = TurnWriter(store, max_retries=1, retry_backoff=0.001)
+        writer.start()
+        writer.submit("s1", "q", "a")
+        await writer.aclose()
+        return writer
+
+    writer = asyncio.run(scenario())
+
+    assert writer.written == 0
+    assert writer.dropped == 1
+
+
+def test_full_queue_rejects_without_blocking():
+    async def scenario():
+        writer = TurnWriter(InMemorySessionStore(), queue_size=1)
+        return writer.submit("s1", "q", "a"), writer.submit("s1", "q", "a")
+
+    assert asyncio.run(scenario()) == (True, False)
@@ -0,0 +1,79 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from configs import ingestion_config, retrieval_config
+from src.pipelines import vectorstore
+from src.pipelines.ingestion import make_chunk_id
+
+
+class _FakeEmbeddings(Embeddings):
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0, 0.5]
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self.embed_query(text) for text in texts]
+
+
+def _chunk(text, page=0, source="book.pdf"):
+    return Document(
+        page_content=text,
+        metadata={"page": page, "source": source, "chunk_id": make_chunk_id(source, page, text)}
+    )
+
+
+def _use_tmp_store(tmp_path, monkeypatch):
+    embeddings = _FakeEmbeddings()
+    monkeypatch.setattr(vectorstore, "CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(retrieval_config, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical"))
+    monkeypatch.setattr(retrieval_config, "FLAT_INDEX_PATH", str(tmp_path / "flat"))
+    monkeypatch.setattr(vectorstore, "get_ollama_embedding", lambda: embeddings)
+    return embeddings
+
+
+def test_create_chroma_database_streams_batches(tmp_path, monkeypatch):
+    _use_tmp_store(tmp_path, monkeypatch)
+
+    chunks = (_chunk(f"chunk number {i}", page=i) for i in range(25))
+    vector_db = vectorstore.create_chroma_database(chunks, batch_size=4, max_concurrency=3)
+
+    assert vector_db._collection.count() == 25
+
+
+def test_chunk_ids_are_deterministic():
+    assert make_chunk_id("a.pdf", 1, "text") == make_chunk_id("a.pdf", 1, "text")
+    assert make_chunk_id("a.pdf", 1, "text") != make_chunk_id("a.pdf", 2, "text")
+    assert make_chunk_id("a.pdf", 1, "text") != make_chunk_id("a.pdf", 1, "text", occurrence=1)
+
+
+def test_incremental_reindex_embeds_only_changes(tmp_path, monkeypatch):
+    embeddings = _use_tmp_store(tmp_path, monkeypatch)
+
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"v1")
+    monkeypatch.setattr(ingestion_config, "PDF_SOURCES", str(tmp_path))
+
+    corpus = {"texts": ["alpha", "beta", "gamma"]}
+    monkeypatch.setattr(
+        vectorstore, "run_ingestion_pipeline",
+        lambda sources: (_chunk(text, source=source) for source in sources for text in corpus["texts"])
+    )
+
+    vector_db = vectorstore.run_vector_pipeline()
+    assert vector_db._collection.count() == 3
+    assert embeddings.embedded == 3
+
+    # unchanged file: nothing re-chunked or re-embedded
+    vectorstore.run_vector_pipeline()
+    assert embeddings.embedded == 3
+
+    # one chunk edited, one removed
+    pdf.write_bytes(b"v2")
+    corpus["texts"] = ["alpha", "beta v2"]
+
+    vector_db = vectorstore.run_vector_pipeline()
+    assert embeddings.embedded == 4
+    assert sorted(vector_db._collection.get()["documents"]) == ["alpha", "beta v2"]
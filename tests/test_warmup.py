@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+
+from src.pipelines.warmup import WarmUp
+from scripts.benchmarks.stand_ins import stand_ins
+
+
+def test_failed_steps_are_retried_before_ready():
+    calls = []
+
+    def flaky_llm():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("ollama is starting")
+
+    warm_up = WarmUp(steps=[("vectorstore", lambda: None), ("llm", flaky_llm)], retry_seconds=0)
+    assert warm_up.status() == {"ready": False, "steps": {"vectorstore": None, "llm": None}, "error": None}
+
+    asyncio.run(warm_up.run())
+
+    status = warm_up.status()
+    assert status["ready"] and status["error"] is None
+    assert set(status["steps"]) == {"vectorstore", "llm"}
+    assert all(seconds is not None for seconds in status["steps"].values())
+    assert len(calls) == 3
+
+
+def test_ready_endpoint_gates_on_warm_up():
+    from app import main
+
+    async def run():
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+                # health answers while warm-up is still going
+                health = await client.get("/health")
+                await main.warm_up.wait()
+                return health, await client.get("/ready")
+
+    with stand_ins(tokens_per_second=0, first_token_latency=0, answer_tokens=1, embed_latency=0, dim=16, chunks=20):
+        health, ready = asyncio.run(run())
+
+    assert health.status_code == 200
+    assert ready.status_code == 200
+    body = ready.json()
+    assert body["ready"] is True
+    assert list(body["steps"]) == ["vectorstore", "embed", "search", "llm"]
+    assert all(seconds is not None for seconds in body["steps"].values())
+    assert body["session_store"] == "memory"
+
+
+def test_ready_endpoint_is_503_before_startup():
+    from app import main
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            return await client.get("/ready")
+
+    original = main.warm_up
+    main.warm_up = WarmUp(steps=[("llm", lambda: None)])
+    try:
+        response = asyncio.run(run())
+    finally:
+        main.warm_up = original
+
+    assert response.status_code == 503
+    assert response.json()["ready"] is False